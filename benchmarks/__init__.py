@@ -0,0 +1 @@
+""" Benchmarks of the routing stack, run on synthetic networks described with the puzzle's input format. """
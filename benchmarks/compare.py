@@ -0,0 +1,46 @@
+"""
+Compare two JSON results files written by benchmarks.run, typically for two different commits.
+
+Usage: python -m benchmarks.compare baseline.json candidate.json
+       Prints, for each scenario, engine and size found in both files, the ratio of each metric (candidate / baseline).
+"""
+
+import json
+import sys
+
+
+METRICS = ["parse_seconds", "build_seconds", "query_seconds", "parse_peak_bytes", "build_peak_bytes",
+           "bytes_per_stop", "bytes_per_route"]
+
+
+def load_results(file_path):
+    with open(file_path) as file_stream:
+        report = json.load(file_stream)
+
+    return report.get("commit"), {(result["scenario"], result["engine"], result["stops"]): result
+                                  for result in report["results"]}
+
+
+def compare(baseline_path, candidate_path):
+    """ :return: Lines describing the ratio of each metric between both results files """
+    baseline_commit, baseline_results = load_results(baseline_path)
+    candidate_commit, candidate_results = load_results(candidate_path)
+
+    lines = ["{} -> {}".format(baseline_commit, candidate_commit),
+             "{:20} {:8} {:>8} ".format("scenario", "engine", "stops") +
+             " ".join("{:>17}".format(metric) for metric in METRICS)]
+
+    for key in sorted(baseline_results.keys() & candidate_results.keys()):
+        ratios = []
+        for metric in METRICS:
+            # Metrics missing from results files written before they were introduced are not compared
+            baseline_value, candidate_value = baseline_results[key].get(metric), candidate_results[key].get(metric)
+            ratios.append("{:>17}".format("{:.2f}x".format(candidate_value / baseline_value)
+                                          if baseline_value and candidate_value is not None else "n/a"))
+        lines.append("{:20} {:8} {:>8} ".format(*key) + " ".join(ratios))
+
+    return lines
+
+
+if __name__ == "__main__":
+    print("\n".join(compare(*sys.argv[1:3])))
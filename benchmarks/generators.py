@@ -0,0 +1,163 @@
+""" Implements the generation of synthetic networks, described with the puzzle's input format. """
+
+import math
+
+
+BASE_LATITUDE = 47.2
+BASE_LONGITUDE = -1.6
+STOP_SPACING = 0.001  # Between neighboring stops, in the coordinates unit of the puzzle's input
+
+
+def format_stop(stop_id, name, latitude, longitude):
+    """ :return: Description of a stop, as given by the puzzle's input """
+    return 'StopArea:{},"{}",,{:.8f},{:.8f},,,1,'.format(stop_id, name, latitude, longitude)
+
+
+def format_route(start_id, end_id):
+    """ :return: Description of a route, as given by the puzzle's input """
+    return "StopArea:{} StopArea:{}".format(start_id, end_id)
+
+
+def generate_grid_network(side, bridge_rows=None, id_prefix="S", origin=(BASE_LATITUDE, BASE_LONGITUDE)):
+    """
+    Grid city: side x side stops, each one linked both ways to its horizontal and vertical neighbors.
+
+    :parameter  bridge_rows:    If given, a river splits the grid in two halves, which are only linked on these rows
+    :type       bridge_rows:    Collection of integers
+
+    :parameter  id_prefix, origin:  Prefix of the stops ids, and coordinates of the first stop; meant for generating
+                                    several distinct grids
+    :type       id_prefix, origin:  String, Tuple (Float, Float)
+
+    :return:    Descriptions of the stops and routes of the network
+    :rtype:     Tuple (List of strings, List of strings)
+    """
+    def get_id(row, column):
+        return "{}{}_{}".format(id_prefix, row, column)
+
+    stops = [format_stop(get_id(row, column), "Stop {} {} {}".format(id_prefix, row, column),
+                         origin[0] + row * STOP_SPACING, origin[1] + column * STOP_SPACING)
+             for row in range(side) for column in range(side)]
+    routes = []
+    for row in range(side):
+        for column in range(side):
+            for neighbor_row, neighbor_column in ((row + 1, column), (row, column + 1)):
+                crosses_river = neighbor_column == side // 2 and neighbor_column != column
+                if crosses_river and bridge_rows is not None and row not in bridge_rows:
+                    continue
+
+                if neighbor_row < side and neighbor_column < side:
+                    routes.append(format_route(get_id(row, column), get_id(neighbor_row, neighbor_column)))
+                    routes.append(format_route(get_id(neighbor_row, neighbor_column), get_id(row, column)))
+    return stops, routes
+
+
+def generate_radial_network(lines_count, stops_per_line):
+    """
+    Radial metro: lines going both ways from a central hub, each line's stops being further and further apart, and a
+    ring line linking the terminus of the lines.
+
+    :return:    Descriptions of the stops and routes of the network
+    :rtype:     Tuple (List of strings, List of strings)
+    """
+    stops = [format_stop("HUB", "Hub", BASE_LATITUDE, BASE_LONGITUDE)]
+    routes = []
+    for line in range(lines_count):
+        angle = 2 * math.pi * line / lines_count
+        previous_id = "HUB"
+        for position in range(1, stops_per_line + 1):
+            stop_id = "L{}_{}".format(line, position)
+            distance = STOP_SPACING * position * (1 + position / stops_per_line)
+            stops.append(format_stop(stop_id, "Line {} stop {}".format(line, position),
+                                     BASE_LATITUDE + distance * math.sin(angle),
+                                     BASE_LONGITUDE + distance * math.cos(angle)))
+            routes.append(format_route(previous_id, stop_id))
+            routes.append(format_route(stop_id, previous_id))
+            previous_id = stop_id
+
+    for line in range(lines_count):
+        terminus_id = "L{}_{}".format(line, stops_per_line)
+        next_terminus_id = "L{}_{}".format((line + 1) % lines_count, stops_per_line)
+        if lines_count > 1:
+            routes.append(format_route(terminus_id, next_terminus_id))
+
+    return stops, routes
+
+
+def generate_islands_network(islands_count, side):
+    """
+    Disconnected islands: several grid cities, with no route between them.
+
+    :return:    Descriptions of the stops and routes of the network
+    :rtype:     Tuple (List of strings, List of strings)
+    """
+    stops = []
+    routes = []
+    for island in range(islands_count):
+        island_stops, island_routes = generate_grid_network(
+            side, id_prefix="I{}S".format(island),
+            origin=(BASE_LATITUDE, BASE_LONGITUDE + island * (side + 10) * STOP_SPACING))
+        stops.extend(island_stops)
+        routes.extend(island_routes)
+
+    return stops, routes
+
+
+def get_headway(hour):
+    """ :return: Time between two departures along a route, in seconds, at the given hour of the day """
+    if 7 <= hour < 9 or 16 <= hour < 19:
+        return 300
+    if hour < 21:
+        return 600
+    return 1200
+
+
+def generate_route_schedules(routes, random_generator, first_hour=5, last_hour=24):
+    """
+    Timetable of a network: departures along each route from the first hour to the last one, more frequent at peak
+    hours, when travel times are also longer. The departures of each route are shifted by a random phase.
+
+    :parameter  routes: Descriptions of the routes of the network
+    :type       routes: Iterable of strings
+
+    :return:    Description, departure times and travel times of each route, the times being in seconds
+    :rtype:     List of (String, List of integers, List of integers)
+    """
+    schedules = []
+    for route in routes:
+        travel_time = random_generator.randint(60, 240)
+        departure_time = first_hour * 3600 + random_generator.randrange(get_headway(first_hour))
+        departure_times = []
+        travel_times = []
+        while departure_time < last_hour * 3600:
+            headway = get_headway(departure_time // 3600)
+            departure_times.append(departure_time)
+            travel_times.append(travel_time * 3 // 2 if headway == get_headway(7) else travel_time)
+            departure_time += headway
+
+        schedules.append((route, departure_times, travel_times))
+
+    return schedules
+
+
+def get_stop_id_descriptions(stops):
+    """ :return: Ids descriptions of the given stops, as found in the start and goal lines of the puzzle's input """
+    return [stop.split(',', 1)[0] for stop in stops]
+
+
+def generate_queries(stops, queries_count, random_generator):
+    """ :return: Random (start, goal) pairs of stop ids descriptions """
+    stop_ids = get_stop_id_descriptions(stops)
+    return [(random_generator.choice(stop_ids), random_generator.choice(stop_ids)) for _ in range(queries_count)]
+
+
+def generate_unreachable_queries(islands_count, side, queries_count, random_generator):
+    """ :return: Random (start, goal) pairs of stop ids descriptions, on different islands of an islands network """
+    queries = []
+    for _ in range(queries_count):
+        start_island, goal_island = random_generator.sample(range(islands_count), 2)
+        queries.append(tuple("StopArea:I{}S{}_{}".format(island, random_generator.randrange(side),
+                                                         random_generator.randrange(side))
+                             for island in (start_island, goal_island)))
+
+    return queries
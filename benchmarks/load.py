@@ -0,0 +1,121 @@
+"""
+Measure the latency and the throughput of a running query server (see tools/query_server).
+
+Usage: python -m benchmarks.load --grid SIDE [--tcp HOST:PORT | --unix PATH] [--queries 2000] [--connections 8]
+                                 [--pipeline 4] [--output results.json]
+       Run from the project's root directory, against a server started with the same --grid SIDE, whose stops ids
+       the random queries are drawn from.
+
+Each connection keeps up to --pipeline queries in flight. The latency of a query is measured from the sending of its
+line to the reading of its response.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks.generators import generate_grid_network, generate_queries
+
+
+PERCENTILES = [50, 90, 99]
+
+
+async def run_connection(open_connection, queries, pipeline, latencies, errors):
+    """ Send the given queries on a new connection, keeping the given number of them in flight. """
+    reader, writer = await open_connection()
+    send_times = {}
+    in_flight_slots = asyncio.Semaphore(pipeline)
+
+    async def read_responses():
+        for _ in queries:
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - send_times.pop(response["id"]))
+            if "error" in response:
+                errors.append(response["error"])
+            in_flight_slots.release()
+
+    reading_task = asyncio.create_task(read_responses())
+    for query_id, (start, goal) in enumerate(queries):
+        await in_flight_slots.acquire()
+        send_times[query_id] = time.perf_counter()
+        writer.write(json.dumps({"id": query_id, "start": start, "goal": goal}).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    await reading_task
+    writer.close()
+    await writer.wait_closed()
+
+
+def get_percentile(sorted_values, percentile):
+    """ :return: Nearest-rank percentile of the given sorted values """
+    rank = max(1, -(-percentile * len(sorted_values) // 100))
+    return sorted_values[rank - 1]
+
+
+async def run_load(open_connection, queries, connections_count, pipeline):
+    """ :return: Measures of the given queries, spread across the given number of connections """
+    latencies = []
+    errors = []
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(run_connection(open_connection, queries[connection::connections_count], pipeline,
+                                          latencies, errors)
+                           for connection in range(connections_count)))
+    duration = time.perf_counter() - start_time
+
+    latencies.sort()
+    results = {"queries": len(latencies),
+               "errors": len(errors),
+               "seconds": duration,
+               "queries_per_second": len(latencies) / duration if duration else None,
+               "mean_latency_ms": 1000 * sum(latencies) / len(latencies) if latencies else None,
+               "max_latency_ms": 1000 * latencies[-1] if latencies else None}
+    for percentile in PERCENTILES:
+        results["p{}_latency_ms".format(percentile)] = 1000 * get_percentile(latencies, percentile) if latencies \
+            else None
+
+    return results
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Measure the latency and the throughput of a running query server.")
+    parser.add_argument("--grid", type=int, required=True, metavar="SIDE",
+                        help="side of the synthetic grid network the server was started on")
+    address_group = parser.add_mutually_exclusive_group()
+    address_group.add_argument("--tcp", default="127.0.0.1:8642", metavar="HOST:PORT")
+    address_group.add_argument("--unix", metavar="PATH")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--pipeline", type=int, default=4, help="number of queries in flight per connection")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="path of the JSON results file")
+    arguments = parser.parse_args(arguments)
+
+    stops, _ = generate_grid_network(arguments.grid)
+    queries = generate_queries(stops, arguments.queries, random.Random(arguments.seed))
+
+    if arguments.unix:
+        def open_connection():
+            return asyncio.open_unix_connection(arguments.unix)
+    else:
+        host, port = arguments.tcp.rsplit(":", 1)
+
+        def open_connection():
+            return asyncio.open_connection(host, int(port))
+
+    results = asyncio.run(run_load(open_connection, queries, arguments.connections, arguments.pipeline))
+    results["arguments"] = vars(arguments)
+
+    print("{queries} queries ({errors} errors) in {seconds:.2f} s: {queries_per_second:.1f} queries/s, latency "
+          "p50 {p50_latency_ms:.2f} ms, p90 {p90_latency_ms:.2f} ms, p99 {p99_latency_ms:.2f} ms, max "
+          "{max_latency_ms:.2f} ms".format(**results))
+
+    if arguments.output:
+        with open(arguments.output, "w") as file_stream:
+            json.dump(results, file_stream, indent=2)
+
+
+if __name__ == "__main__":
+    main()
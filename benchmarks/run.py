@@ -0,0 +1,176 @@
+"""
+Run the routing stack benchmarks, and write their results as JSON.
+
+Usage: python -m benchmarks.run [--sizes 1000 10000 ...] [--engines compact dict] [--queries 200]
+                                [--output results.json]
+       Run from the project's root directory. The sizes are approximate numbers of stops; each one is run against
+       every scenario (grid city, radial metro, disconnected islands with unreachable goals).
+
+The phases are timed separately:
+- parse: reading the puzzle's input text, and extracting the stops fields and the routes stops ids;
+- build: constructing the TanNetwork from the stops and routes descriptions (which includes its own parsing);
+- query: answering random shortest path queries, one at a time.
+The memory peaks of the parse and build phases, and the search statistics of the queries, are measured in a second
+pass, as tracing allocations and counting search operations slow them down. So is the memory retained by the built
+network, split into bytes per stop (the stops objects alone) and bytes per route (the rest of the network).
+"""
+
+import argparse
+import io
+import json
+import math
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+
+from benchmarks.generators import (generate_grid_network, generate_islands_network, generate_queries,
+                                   generate_radial_network, generate_unreachable_queries)
+from src.main import read_puzzle_input
+from src.tan_network import TanNetwork, TanStop
+from src.utils import SearchStatistics
+
+
+ISLANDS_COUNT = 4
+RADIAL_LINES_COUNT = 16
+
+
+def generate_scenarios(stops_count, queries_count, random_generator):
+    """ :return: Name, stops descriptions, routes descriptions and queries of each scenario, for the given size """
+    side = max(2, round(math.sqrt(stops_count)))
+    yield ("grid",) + generate_grid_network(side) + (None,)
+
+    stops, routes = generate_radial_network(RADIAL_LINES_COUNT, max(1, stops_count // RADIAL_LINES_COUNT))
+    yield "radial", stops, routes, None
+
+    island_side = max(2, round(math.sqrt(stops_count / ISLANDS_COUNT)))
+    stops, routes = generate_islands_network(ISLANDS_COUNT, island_side)
+    yield "islands", stops, routes, None
+    yield ("islands_unreachable", stops, routes,
+           generate_unreachable_queries(ISLANDS_COUNT, island_side, queries_count, random_generator))
+
+
+def format_puzzle_input(start, goal, stops, routes):
+    lines = [start, goal, str(len(stops))] + stops + [str(len(routes))] + routes
+    return "\n".join(lines) + "\n"
+
+
+def parse(input_text):
+    _, _, stops, routes = read_puzzle_input(io.StringIO(input_text))
+    parsed_stops = [TanStop(stop) for stop in stops]
+    parsed_routes = [tuple(TanStop.extract_field_value('id', stop) for stop in route.split()) for route in routes]
+    return parsed_stops, parsed_routes
+
+
+def measure_peak_memory(function, *arguments):
+    """ :return: Peak of the memory allocated while calling the given function, in bytes """
+    tracemalloc.start()
+    function(*arguments)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def measure_retained_memory(function, *arguments):
+    """ :return: Memory still allocated once the given function returned, its result being kept alive, in bytes """
+    tracemalloc.start()
+    result = function(*arguments)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained
+
+
+def build_stops(stops):
+    return [TanStop(stop) for stop in stops]
+
+
+def run_scenario(name, stops, routes, queries, compact):
+    input_text = format_puzzle_input(*queries[0], stops, routes)
+
+    start_time = time.perf_counter()
+    parse(input_text)
+    parse_duration = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    tan_network = TanNetwork(stops, routes, compact)
+    build_duration = time.perf_counter() - start_time
+
+    impossible_count = 0
+    start_time = time.perf_counter()
+    for start, goal in queries:
+        if not tan_network.get_shortest_path(start, goal):
+            impossible_count += 1
+    query_duration = time.perf_counter() - start_time
+
+    statistics = SearchStatistics()
+    for start, goal in queries:
+        tan_network.get_shortest_path(start, goal, statistics=statistics)
+
+    del tan_network
+    stops_bytes = measure_retained_memory(build_stops, stops)
+    network_bytes = measure_retained_memory(TanNetwork, stops, routes, compact)
+
+    return {"scenario": name,
+            "engine": "compact" if compact else "dict",
+            "stops": len(stops),
+            "routes": len(routes),
+            "queries": len(queries),
+            "impossible_queries": impossible_count,
+            "parse_seconds": parse_duration,
+            "build_seconds": build_duration,
+            "query_seconds": query_duration,
+            "queries_per_second": len(queries) / query_duration if query_duration else None,
+            "parse_peak_bytes": measure_peak_memory(parse, input_text),
+            "build_peak_bytes": measure_peak_memory(TanNetwork, stops, routes, compact),
+            "network_retained_bytes": network_bytes,
+            "bytes_per_stop": stops_bytes / len(stops),
+            "bytes_per_route": (network_bytes - stops_bytes) / len(routes) if routes else None,
+            "search_statistics": statistics.as_dict()}
+
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Run the routing stack benchmarks on synthetic networks.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="approximate numbers of stops")
+    parser.add_argument("--engines", nargs="+", choices=["compact", "dict"], default=["compact"])
+    parser.add_argument("--queries", type=int, default=200, help="number of queries per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="path of the JSON results file; printed to stdout if not given")
+    arguments = parser.parse_args(arguments)
+
+    random_generator = random.Random(arguments.seed)
+    results = []
+    for stops_count in arguments.sizes:
+        for name, stops, routes, queries in generate_scenarios(stops_count, arguments.queries, random_generator):
+            if queries is None:
+                queries = generate_queries(stops, arguments.queries, random_generator)
+
+            for engine in arguments.engines:
+                result = run_scenario(name, stops, routes, queries, engine == "compact")
+                results.append(result)
+                print("{scenario:20} {engine:8} {stops:8} stops: parse {parse_seconds:7.3f} s, build "
+                      "{build_seconds:7.3f} s, {queries_per_second:9.1f} queries/s".format(**result), flush=True)
+
+    report = {"commit": get_commit(),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "arguments": vars(arguments),
+              "results": results}
+
+    if arguments.output:
+        with open(arguments.output, "w") as file_stream:
+            json.dump(report, file_stream, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+""" Implements the Contraction Hierarchies preprocessing of compact graphs, and the matching query engine. """
+
+import math
+import struct
+from array import array
+from heapq import heappop, heappush
+
+
+CONTRACTION_MAGIC = b"TANCHRC\0"
+CONTRACTION_VERSION = 1
+
+_HEADER = struct.Struct("=8sI")  # Magic, version
+_SECTION_LENGTH = struct.Struct("=Q")
+_SECTIONS_TYPECODES = ['q', 'q', 'q', 'd', 'q', 'q', 'q', 'd', 'q']
+
+
+class ContractionHierarchy:
+    """
+    Graph augmented with shortcuts by the Contraction Hierarchies preprocessing, meant for answering shortest path
+    queries in a fraction of the time a regular search takes.
+
+    The vertices are ranked, and contracted one by one from the lowest rank: each contraction adds the shortcuts needed
+    to preserve the shortest paths going through the contracted vertex. A query then only needs a bidirectional search
+    climbing the ranks from both ends; the shortcuts it goes through are finally unpacked into the original edges.
+
+    The edges are stored in two compressed sparse row layouts, both going up the ranks:
+    - the upward rows, holding for each vertex its edges to higher ranked vertices;
+    - the downward rows, holding for each vertex its edges from higher ranked vertices, reversed.
+    Each edge also stores the vertex a shortcut skips (-1 for an original edge).
+    """
+
+    def __init__(self, ranks, upward_rows, downward_rows):
+        """
+        :parameter  ranks:          Rank of each vertex, by vertex index
+        :type       ranks:          Sequence of integers
+
+        :parameter  upward_rows, downward_rows: Offsets, targets (or sources), weights and middles of the edges
+        :type       upward_rows, downward_rows: Tuples of four sequences
+        """
+        self.ranks = ranks
+        self.upward_rows = upward_rows
+        self.downward_rows = downward_rows
+
+    @property
+    def shortcuts_count(self):
+        return sum(1 for rows in (self.upward_rows, self.downward_rows) for middle in rows[3] if middle != -1)
+
+    @property
+    def edges_count(self):
+        return len(self.upward_rows[1]) + len(self.downward_rows[1])
+
+    def get_shortest_index_path(self, start_index, goal_index):
+        """
+        Compute the shortest path between two vertices given by their indices, with a bidirectional search only
+        climbing the ranks.
+
+        :return:    Indices of the vertices composing the shortest path, within the original graph.
+                    Empty list if there is no valid path
+        """
+        if start_index == goal_index:
+            return [start_index]
+
+        # Forward search data first, backward search data second
+        rows = (self.upward_rows, self.downward_rows)
+        cost_to = ({start_index: 0.0}, {goal_index: 0.0})
+        path_traces = ({}, {})
+        already_visited = (set(), set())
+        queues = ([(0.0, start_index)], [(0.0, goal_index)])
+
+        best_cost = math.inf
+        meeting_vertex = None
+
+        while queues[0] or queues[1]:
+            # Unlike regular bidirectional searches, each search must go on until its own frontier exceeds the best
+            # cost, as the meeting vertex is the highest ranked vertex of the path, not one halfway
+            side = 0 if queues[0] and (not queues[1] or queues[0][0][0] <= queues[1][0][0]) else 1
+            cost_to_current, current = heappop(queues[side])
+            if cost_to_current >= best_cost:
+                del queues[side][:]
+                continue
+            if current in already_visited[side]:
+                continue
+
+            already_visited[side].add(current)
+            other_side_cost_to = cost_to[1 - side]
+            if current in other_side_cost_to and cost_to_current + other_side_cost_to[current] < best_cost:
+                best_cost = cost_to_current + other_side_cost_to[current]
+                meeting_vertex = current
+
+            offsets, neighbors, weights, _ = rows[side]
+            side_cost_to = cost_to[side]
+            for slot in range(offsets[current], offsets[current + 1]):
+                neighbor = neighbors[slot]
+                cost_to_neighbor = cost_to_current + weights[slot]
+                if cost_to_neighbor < side_cost_to.get(neighbor, math.inf):
+                    side_cost_to[neighbor] = cost_to_neighbor
+                    path_traces[side][neighbor] = current
+                    heappush(queues[side], (cost_to_neighbor, neighbor))
+
+        if meeting_vertex is None:
+            return []
+
+        path = [meeting_vertex]
+        vertex = meeting_vertex
+        while vertex in path_traces[0]:
+            vertex = path_traces[0][vertex]
+            path.append(vertex)
+
+        path.reverse()
+
+        vertex = meeting_vertex
+        while vertex in path_traces[1]:
+            vertex = path_traces[1][vertex]
+            path.append(vertex)
+
+        return self._unpack(path)
+
+    def _unpack(self, path):
+        """ :return: Given path, with all its shortcuts replaced by the original edges they skip """
+        unpacked_path = [path[0]]
+        edges_to_unpack = [(start, end) for start, end in zip(reversed(path[:-1]), reversed(path[1:]))]
+
+        while edges_to_unpack:
+            start, end = edges_to_unpack.pop()
+            middle = self._get_middle(start, end)
+            if middle == -1:
+                unpacked_path.append(end)
+            else:
+                edges_to_unpack.append((middle, end))
+                edges_to_unpack.append((start, middle))
+
+        return unpacked_path
+
+    def _get_middle(self, start, end):
+        """ :return: Vertex skipped by the edge between the two given vertices; -1 if it is an original edge """
+        if self.ranks[start] < self.ranks[end]:
+            offsets, neighbors, _, middles = self.upward_rows
+            row_vertex, neighbor = start, end
+        else:
+            offsets, neighbors, _, middles = self.downward_rows
+            row_vertex, neighbor = end, start
+
+        for slot in range(offsets[row_vertex], offsets[row_vertex + 1]):
+            if neighbors[slot] == neighbor:
+                return middles[slot]
+
+        raise KeyError((start, end))
+
+
+def build_contraction_hierarchy(compact_graph, witness_search_limit=64):
+    """
+    Rank the vertices of a graph and contract them, following the edge difference heuristic: the vertices adding the
+    fewest shortcuts compared to the edges they remove, and having the fewest contracted neighbors, go first.
+
+    :parameter  compact_graph:          Graph to preprocess
+    :type       compact_graph:          CompactDirectedGraph
+
+    :parameter  witness_search_limit:   Maximum number of vertices settled by the search looking for a path making
+                                        a shortcut unnecessary; lower limits speed up the preprocessing, at the cost of
+                                        unnecessary shortcuts
+    :type       witness_search_limit:   Integer
+
+    :rtype:     ContractionHierarchy
+    """
+    vertices_count = len(compact_graph.offsets) - 1
+
+    # Remaining edges, as {neighbor: (weight, middle)} dictionaries by vertex, keeping the lightest parallel edge
+    successors = [{} for _ in range(vertices_count)]
+    predecessors = [{} for _ in range(vertices_count)]
+    for start in range(vertices_count):
+        for slot in range(compact_graph.offsets[start], compact_graph.offsets[start + 1]):
+            end, weight = compact_graph.targets[slot], compact_graph.weights[slot]
+            if end != start and weight < successors[start].get(end, (math.inf,))[0]:
+                successors[start][end] = (weight, -1)
+                predecessors[end][start] = (weight, -1)
+
+    ranks = array('q', [-1]) * vertices_count
+    contracted_neighbors_counts = array('l', [0]) * vertices_count
+    all_edges = []  # Every edge, original or shortcut, as (start, end, weight, middle)
+
+    def find_shortcuts(vertex):
+        shortcuts = []
+        for predecessor, (predecessor_weight, _) in predecessors[vertex].items():
+            max_cost = predecessor_weight + max((weight for weight, _ in successors[vertex].values()), default=0)
+            witness_costs = _search_witnesses(successors, ranks, predecessor, vertex, max_cost,
+                                              witness_search_limit)
+            for successor, (successor_weight, _) in successors[vertex].items():
+                if successor == predecessor:
+                    continue
+
+                cost_via_vertex = predecessor_weight + successor_weight
+                if witness_costs.get(successor, math.inf) > cost_via_vertex:
+                    shortcuts.append((predecessor, successor, cost_via_vertex))
+
+        return shortcuts
+
+    def get_priority(vertex):
+        return (len(find_shortcuts(vertex)) - len(predecessors[vertex]) - len(successors[vertex]) +
+                contracted_neighbors_counts[vertex])
+
+    queue = [(get_priority(vertex), vertex) for vertex in range(vertices_count)]
+    queue.sort()
+    next_rank = 0
+
+    while queue:
+        _, vertex = heappop(queue)
+        priority = get_priority(vertex)  # Lazy update: priorities change as the neighbors get contracted
+        if queue and priority > queue[0][0]:
+            heappush(queue, (priority, vertex))
+            continue
+
+        for predecessor, (weight, middle) in predecessors[vertex].items():
+            all_edges.append((predecessor, vertex, weight, middle))
+            del successors[predecessor][vertex]
+            contracted_neighbors_counts[predecessor] += 1
+        for successor, (weight, middle) in successors[vertex].items():
+            all_edges.append((vertex, successor, weight, middle))
+            del predecessors[successor][vertex]
+            contracted_neighbors_counts[successor] += 1
+
+        for start, end, weight in find_shortcuts(vertex):
+            if weight < successors[start].get(end, (math.inf,))[0]:
+                successors[start][end] = (weight, vertex)
+                predecessors[end][start] = (weight, vertex)
+
+        predecessors[vertex].clear()
+        successors[vertex].clear()
+        ranks[vertex] = next_rank
+        next_rank += 1
+
+    upward_edges = [(start, end, weight, middle) for start, end, weight, middle in all_edges
+                    if ranks[start] < ranks[end]]
+    downward_edges = [(end, start, weight, middle) for start, end, weight, middle in all_edges
+                      if ranks[start] > ranks[end]]
+
+    return ContractionHierarchy(ranks, _build_rows(upward_edges, vertices_count),
+                                _build_rows(downward_edges, vertices_count))
+
+
+def _search_witnesses(successors, ranks, start, excluded_vertex, max_cost, settled_limit):
+    """ :return: Costs of the paths found from the start vertex, avoiding the excluded and contracted vertices """
+    cost_to = {start: 0.0}
+    queue = [(0.0, start)]
+    settled_count = 0
+
+    while queue and settled_count < settled_limit:
+        cost_to_current, current = heappop(queue)
+        if cost_to_current > cost_to[current]:  # Outdated queue entry
+            continue
+        if cost_to_current > max_cost:
+            break
+
+        settled_count += 1
+        for neighbor, (weight, _) in successors[current].items():
+            if neighbor == excluded_vertex or ranks[neighbor] != -1:
+                continue
+
+            cost_to_neighbor = cost_to_current + weight
+            if cost_to_neighbor < cost_to.get(neighbor, math.inf):
+                cost_to[neighbor] = cost_to_neighbor
+                heappush(queue, (cost_to_neighbor, neighbor))
+
+    return cost_to
+
+
+def _build_rows(edges, vertices_count):
+    """ :return: Offsets, ends, weights and middles of the given (start, end, weight, middle) edges, by start """
+    edges.sort(key=lambda edge: edge[0])
+
+    offsets = array('q', [0]) * (vertices_count + 1)
+    for start, _, _, _ in edges:
+        offsets[start + 1] += 1
+    for index in range(vertices_count):
+        offsets[index + 1] += offsets[index]
+
+    return (offsets,
+            array('q', (edge[1] for edge in edges)),
+            array('d', (edge[2] for edge in edges)),
+            array('q', (edge[3] for edge in edges)))
+
+
+def save_contraction_hierarchy(hierarchy, file_path):
+    """ Save a contraction hierarchy into a binary file, meant to be stored alongside the snapshot of its network. """
+    sections = [hierarchy.ranks] + list(hierarchy.upward_rows) + list(hierarchy.downward_rows)
+
+    with open(file_path, "wb") as file_stream:
+        file_stream.write(_HEADER.pack(CONTRACTION_MAGIC, CONTRACTION_VERSION))
+        for section, typecode in zip(sections, _SECTIONS_TYPECODES):
+            file_stream.write(_SECTION_LENGTH.pack(len(section)))
+            array(typecode, section).tofile(file_stream)
+
+
+def load_contraction_hierarchy(file_path):
+    """ :rtype: ContractionHierarchy """
+    with open(file_path, "rb") as file_stream:
+        magic, version = _HEADER.unpack(file_stream.read(_HEADER.size))
+        if magic != CONTRACTION_MAGIC:
+            raise ValueError("{} is not a contraction hierarchy file".format(file_path))
+        if version != CONTRACTION_VERSION:
+            raise ValueError("Unsupported contraction hierarchy version {} (expected {})".format(version,
+                                                                                              CONTRACTION_VERSION))
+
+        sections = []
+        for typecode in _SECTIONS_TYPECODES:
+            section = array(typecode)
+            section.fromfile(file_stream, _SECTION_LENGTH.unpack(file_stream.read(_SECTION_LENGTH.size))[0])
+            sections.append(section)
+
+    return ContractionHierarchy(sections[0], tuple(sections[1:5]), tuple(sections[5:9]))
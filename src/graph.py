@@ -1,9 +1,11 @@
 """ Implements the logic related to graph theory. """
 
 import math
-from collections import namedtuple
+from array import array
+from collections import OrderedDict, namedtuple
+from heapq import heappop, heappush
 
-from src.utils import PriorityQueue
+from src.utils import IndexedPriorityQueue, InstrumentedPriorityQueue
 
 
 DirectedEdge = namedtuple('DirectedEdge', ['start', 'end'])
@@ -23,11 +25,12 @@ class DirectedGraph:
         Convenience class used to contain the data needed by the A* algorithm, and perform the data operations
         associated with the main steps of the latter.
         """
-        def __init__(self, vertices, start_vertex):
+        def __init__(self, vertices, start_vertex, priority_queue=None):
             self._cost_to = {vertex: math.inf for vertex in vertices}
             self._cost_to[start_vertex] = 0
 
-            self._priority_queue = PriorityQueue()
+            # Each vertex is queued at most once, its priority being decreased whenever a cheaper path to it is found
+            self._priority_queue = IndexedPriorityQueue() if priority_queue is None else priority_queue
             self._priority_queue.push(0, start_vertex)
 
             self._current_vertex = None
@@ -48,18 +51,31 @@ class DirectedGraph:
             return self._cost_to[vertex]
 
         def register_neighbor(self, neighbor, cost_to_neighbor, estimated_cost_via_neighbor):
+            """
+            Record the path to the given neighbor through the current vertex, if it is cheaper than the known one.
+
+            :return:    Whether the path was recorded
+            :rtype:     Boolean
+            """
+            if cost_to_neighbor >= self._cost_to[neighbor]:
+                return False
+
             self._path_trace[neighbor] = self.current_vertex
             self._cost_to[neighbor] = cost_to_neighbor
             self._priority_queue.push(estimated_cost_via_neighbor, neighbor)
+            return True
 
         def reconstruct_path_to(self, vertex):
-            current = vertex
+            # Walked back from the given vertex, then reversed once, rather than prepending each vertex
+            path_trace = self._path_trace
             path = [vertex]
 
-            while current in self._path_trace.keys():
-                current = self._path_trace[current]
-                path.insert(0, current)
+            current = path_trace.get(vertex)
+            while current is not None:
+                path.append(current)
+                current = path_trace.get(current)
 
+            path.reverse()
             return path
 
         def has_already_visited(self, vertex):
@@ -68,12 +84,40 @@ class DirectedGraph:
         def has_vertices_to_visit(self):
             return not self._priority_queue.is_empty()
 
+    class InstrumentedAStarData(AStarData):
+        """ Same as AStarData, recording the operations performed by the A* algorithm in a SearchStatistics. """
+        def __init__(self, vertices, start_vertex, statistics):
+            super().__init__(vertices, start_vertex, InstrumentedPriorityQueue(statistics))
+            self._statistics = statistics
+
+        def visit_next_vertex(self):
+            visited_vertices_count = len(self._already_visited_vertices)
+            super().visit_next_vertex()
+
+            if len(self._already_visited_vertices) > visited_vertices_count:
+                self._statistics.vertices_settled += 1
+            else:  # The vertex was already visited, through a cheaper entry of the queue
+                self._statistics.stale_pops += 1
+
+        def register_neighbor(self, neighbor, cost_to_neighbor, estimated_cost_via_neighbor):
+            is_registered = super().register_neighbor(neighbor, cost_to_neighbor, estimated_cost_via_neighbor)
+            if is_registered:
+                self._statistics.edges_relaxed += 1
+
+            return is_registered
+
+        def has_already_visited(self, vertex):
+            self._statistics.edges_scanned += 1
+            return super().has_already_visited(vertex)
+
     def __init__(self, edges):
         """
         :parameter  edges:  Edges composing the graph
         :type       edges:  Iterable of DirectedEdge
         """
         self.representation = {}
+        self.reverse_representation = {}  # Same as representation, the edges being reversed
+        self.version = 0  # Incremented on every change of the graph, so that derived data can detect it is outdated
 
         for edge in edges:
             self.add_edge(edge)
@@ -83,14 +127,63 @@ class DirectedGraph:
         :parameter  edge:   Edge to add to the graph's representation
         :type       edge:   DirectedEdge
         """
+        self.add_edge_between(edge.start, edge.end)
+
+    def add_edge_between(self, start_vertex, end_vertex):
+        """
+        Same as add_edge, without requiring a DirectedEdge to be built; meant for bulk loading edges.
+        """
+        try:
+            self.representation[start_vertex].add(end_vertex)
+        except KeyError:
+            self.representation[start_vertex] = {end_vertex}
+
+        if end_vertex not in self.representation:
+            self.representation[end_vertex] = set()
+
         try:
-            self.representation[edge.start].add(edge.end)
+            self.reverse_representation[end_vertex].add(start_vertex)
         except KeyError:
-            self.representation[edge.start] = set([edge.end])
+            self.reverse_representation[end_vertex] = {start_vertex}
 
-        self.representation.setdefault(edge.end, set())
+        if start_vertex not in self.reverse_representation:
+            self.reverse_representation[start_vertex] = set()
 
-    def get_shortest_path_a_star(self, start_vertex, goal_vertex, cost_heuristic):
+        self.version += 1
+
+    def add_vertex(self, vertex):
+        """
+        :parameter  vertex: Vertex to add to the graph's representation, without any edge
+        """
+        self.representation.setdefault(vertex, set())
+        self.reverse_representation.setdefault(vertex, set())
+        self.version += 1
+
+    def remove_edge(self, edge):
+        """
+        :parameter  edge:   Edge to remove from the graph's representation; its vertices are kept
+        :type       edge:   DirectedEdge
+
+        :raises     KeyError:   If the edge is not part of the graph
+        """
+        self.representation[edge.start].remove(edge.end)
+        self.reverse_representation[edge.end].remove(edge.start)
+        self.version += 1
+
+    def remove_vertex(self, vertex):
+        """
+        :parameter  vertex: Vertex to remove from the graph's representation, along with all its edges
+
+        :raises     KeyError:   If the vertex is not part of the graph
+        """
+        for successor in self.representation.pop(vertex):
+            self.reverse_representation[successor].discard(vertex)
+        for predecessor in self.reverse_representation.pop(vertex) - {vertex}:
+            self.representation[predecessor].discard(vertex)
+
+        self.version += 1
+
+    def get_shortest_path_a_star(self, start_vertex, goal_vertex, cost_heuristic, statistics=None):
         """
         Compute the shortest path between two points, using the A* algorithm.
 
@@ -102,34 +195,1171 @@ class DirectedGraph:
                                     to A*.
         :type       cost_heuristic: Function with the following signature: f(vertex_1, vertex_2)
 
+        :parameter  statistics:     If given, records the operations and phase durations of the search
+        :type       statistics:     SearchStatistics
+
         :return:    Shortest path between both given vertices. Empty list if there is no valid path
         """
-        a_star = DirectedGraph.AStarData(self.vertices, start_vertex)
+        if statistics is None:
+            a_star = DirectedGraph.AStarData(self.vertices, start_vertex)
+        else:
+            statistics.queries += 1
+            statistics.start_phase('initialization')
+            a_star = DirectedGraph.InstrumentedAStarData(self.vertices, start_vertex, statistics)
+            statistics.start_phase('search')
 
         while a_star.has_vertices_to_visit():
             a_star.visit_next_vertex()
 
             if a_star.current_vertex == goal_vertex:
-                return a_star.reconstruct_path_to(a_star.current_vertex)
+                if statistics is not None:
+                    statistics.start_phase('reconstruction')
+                path = a_star.reconstruct_path_to(a_star.current_vertex)
+                break
 
-            for neighbor in self.representation[a_star.current_vertex]:
+            for neighbor in self.representation.get(a_star.current_vertex, ()):  # Vertices without edges may be absent
                 if a_star.has_already_visited(neighbor):
                     continue
 
                 cost_to_neighbor = a_star.get_cost_to(a_star.current_vertex) +\
-                                   self.get_distance(a_star.current_vertex, neighbor)
+                                   self.get_edge_weight(a_star.current_vertex, neighbor)
                 estimated_cost_via_neighbor = cost_to_neighbor + cost_heuristic(neighbor, goal_vertex)
 
                 a_star.register_neighbor(neighbor, cost_to_neighbor, estimated_cost_via_neighbor)
+        else:
+            path = []
 
-        return []
+        if statistics is not None:
+            statistics.stop_phase()
+
+        return path
+
+    def get_shortest_path_bidirectional_a_star(self, start_vertex, goal_vertex, cost_heuristic):
+        """
+        Compute the shortest path between two points, using a bidirectional variant of the A* algorithm: a forward
+        search from the start vertex and a backward search from the goal vertex run alternately, until they meet.
+
+        To keep the result optimal, both searches are guided by the average of the forward and backward heuristics,
+        (h(n, goal) - h(start, n)) / 2 and its opposite, which remain consistent as long as the heuristic is.
+
+        Same interface as get_shortest_path_a_star.
+        """
+        representation, reverse_representation = self.representation, self.reverse_representation
+        get_edge_weight = self.get_edge_weight
+
+        return _search_bidirectionally(
+            start_vertex, goal_vertex,
+            lambda vertex: (cost_heuristic(vertex, goal_vertex) - cost_heuristic(start_vertex, vertex)) / 2,
+            lambda vertex: ((successor, get_edge_weight(vertex, successor))
+                            for successor in representation.get(vertex, ())),
+            lambda vertex: ((predecessor, get_edge_weight(predecessor, vertex))
+                            for predecessor in reverse_representation.get(vertex, ())))
+
+    def get_shortest_path_tree(self, start_vertex, max_cost=math.inf, goal_vertices=None):
+        """
+        Compute the shortest paths from one vertex to all the others, with a single sweep of Dijkstra's algorithm.
+
+        :parameter  max_cost:       If given, the sweep stops at the vertices whose cost exceeds it, which are then left
+                                    out of the tree
+        :type       max_cost:       Float
+
+        :parameter  goal_vertices:  If given, the sweep stops as soon as all these vertices are reached
+        :type       goal_vertices:  Iterable of vertices
+
+        :return:    Tree of the shortest paths from the given vertex, readable for any number of goals
+        :rtype:     ShortestPathTree
+        """
+        tree = ShortestPathTree()
+        goals_left = None if goal_vertices is None else set(goal_vertices)
+        cost_to = {start_vertex: 0.0}
+        path_trace = {}
+
+        priority_queue = IndexedPriorityQueue()
+        priority_queue.push(0.0, start_vertex)
+
+        while not priority_queue.is_empty() and goals_left != set():
+            current = priority_queue.pop()
+            cost_to_current = cost_to[current]
+            tree.add(current, cost_to_current, path_trace.get(current))
+            if goals_left is not None:
+                goals_left.discard(current)
+
+            for neighbor in self.representation.get(current, ()):  # Vertices without edges may be absent
+                if neighbor in tree:
+                    continue
+
+                cost_to_neighbor = cost_to_current + self.get_edge_weight(current, neighbor)
+                if cost_to_neighbor <= max_cost and cost_to_neighbor < cost_to.get(neighbor, math.inf):
+                    cost_to[neighbor] = cost_to_neighbor
+                    path_trace[neighbor] = current
+                    priority_queue.push(cost_to_neighbor, neighbor)
+
+        return tree
+
+    def get_k_shortest_paths(self, start_vertex, goal_vertex, paths_count):
+        """
+        Compute the cheapest loopless paths between two vertices, using Yen's algorithm (see _search_k_shortest_paths).
+        The edges avoided by each search are skipped by the search itself, rather than removed from the graph.
+
+        :parameter  paths_count:    Maximum number of paths to find; fewer are returned if there are no others
+        :type       paths_count:    Integer
+
+        :return:    Paths between both given vertices, by increasing cost. Empty list if there is no valid path
+        :rtype:     List of lists of vertices
+        """
+        representation, reverse_representation = self.representation, self.reverse_representation
+        get_edge_weight = self.get_edge_weight
+
+        return _search_k_shortest_paths(
+            start_vertex, goal_vertex, paths_count,
+            lambda vertex: ((successor, get_edge_weight(vertex, successor))
+                            for successor in representation.get(vertex, ())),
+            lambda vertex: ((predecessor, get_edge_weight(predecessor, vertex))
+                            for predecessor in reverse_representation.get(vertex, ())))
 
     @property
     def vertices(self):
         """ :return: Vertices composing the graph """
         return self.representation.keys()
 
+    def get_edge_weight(self, start_vertex, end_vertex):
+        """
+        :return:    Cost of going through the edge between the two given vertices.
+                    Defaults to the distance between them; subclasses may override it to read precomputed weights.
+        """
+        return self.get_distance(start_vertex, end_vertex)
+
     @staticmethod
     def get_distance(vertex_1, vertex_2):
         """ :return: Distance between the two given vertices """
         raise NotImplementedError
+
+
+def _search_bidirectionally(start_vertex, goal_vertex, get_forward_potential, get_successors, get_predecessors):
+    """
+    Bidirectional A* algorithm, shared by the graph representations.
+
+    :parameter  get_forward_potential:  Consistent potential guiding the forward search; its opposite guides the
+                                        backward search
+    :type       get_forward_potential:  Function with the following signature: f(vertex)
+
+    :parameter  get_successors, get_predecessors:   Functions giving the vertices adjacent to a vertex, along with the
+                                                    weights of the matching edges
+    :type       get_successors, get_predecessors:   Functions with the following signature:
+                                                    f(vertex) -> Iterable of (vertex, weight)
+
+    :return:    Shortest path between both given vertices. Empty list if there is no valid path
+    """
+    if start_vertex == goal_vertex:
+        return [start_vertex]
+
+    potentials = {}
+
+    def get_potential(vertex):
+        try:
+            return potentials[vertex]
+        except KeyError:
+            potential = potentials[vertex] = get_forward_potential(vertex)
+            return potential
+
+    # Forward search data first, backward search data second
+    get_neighbors = (get_successors, get_predecessors)
+    potential_signs = (1, -1)
+    cost_to = ({start_vertex: 0}, {goal_vertex: 0})
+    path_traces = ({}, {})
+    already_visited = (set(), set())
+    priority_queues = (IndexedPriorityQueue(), IndexedPriorityQueue())
+    priority_queues[0].push(get_potential(start_vertex), start_vertex)
+    priority_queues[1].push(-get_potential(goal_vertex), goal_vertex)
+
+    best_cost = math.inf
+    meeting_vertex = None
+
+    while True:
+        next_priorities = [math.inf if queue.is_empty() else queue.peek_priority() for queue in priority_queues]
+        if next_priorities[0] + next_priorities[1] >= best_cost:
+            break
+
+        side = 0 if next_priorities[0] <= next_priorities[1] else 1
+        current = priority_queues[side].pop()
+        already_visited[side].add(current)
+        side_cost_to, other_side_cost_to = cost_to[side], cost_to[1 - side]
+        potential_sign = potential_signs[side]
+
+        for neighbor, edge_weight in get_neighbors[side](current):
+            if neighbor in already_visited[side]:
+                continue
+
+            cost_to_neighbor = side_cost_to[current] + edge_weight
+            if cost_to_neighbor < side_cost_to.get(neighbor, math.inf):
+                side_cost_to[neighbor] = cost_to_neighbor
+                path_traces[side][neighbor] = current
+                priority_queues[side].push(cost_to_neighbor + potential_sign * get_potential(neighbor), neighbor)
+
+                if neighbor in other_side_cost_to and cost_to_neighbor + other_side_cost_to[neighbor] < best_cost:
+                    best_cost = cost_to_neighbor + other_side_cost_to[neighbor]
+                    meeting_vertex = neighbor
+
+    if meeting_vertex is None:
+        return []
+
+    # Join the paths found by both searches, at their meeting vertex
+    path = [meeting_vertex]
+    vertex = meeting_vertex
+    while vertex in path_traces[0]:
+        vertex = path_traces[0][vertex]
+        path.append(vertex)
+
+    path.reverse()
+
+    vertex = meeting_vertex
+    while vertex in path_traces[1]:
+        vertex = path_traces[1][vertex]
+        path.append(vertex)
+
+    return path
+
+
+def _search_k_shortest_paths(start_vertex, goal_vertex, paths_count, get_successors, get_predecessors):
+    """
+    Yen's algorithm, shared by the graph representations: each new path is the cheapest of the candidate paths made of
+    a prefix of an already found path (the root), followed by a spur path found without going back to the root's
+    vertices, nor through the edges the found paths sharing this root take out of it.
+
+    The bans only apply within the spur searches; the graph itself is left untouched. All the spur searches are guided
+    by the costs to the goal vertex in the graph without bans, which they share (see _ReverseSearch): those are exact
+    as long as a spur path avoids the bans, so that most spur searches only follow the shortest path tree to the goal.
+
+    :parameter  paths_count:    Maximum number of paths to find
+    :type       paths_count:    Integer
+
+    :parameter  get_successors, get_predecessors:   Functions giving the vertices adjacent to a vertex, along with the
+                                                    weights of the matching edges
+    :type       get_successors, get_predecessors:   Functions with the following signature:
+                                                    f(vertex) -> Iterable of (vertex, weight)
+
+    :return:    Loopless paths between both given vertices, by increasing cost
+    :rtype:     List of lists of vertices
+    """
+    reverse_search = _ReverseSearch(goal_vertex, get_predecessors)
+    if paths_count < 1 or reverse_search.get_cost(start_vertex) == math.inf:
+        return []
+
+    paths = [reverse_search.get_path(start_vertex)]
+    candidates = []  # Heap of (cost, insertion counter, path)
+    known_paths = {tuple(paths[0])}
+
+    while len(paths) < paths_count:
+        previous_path = paths[-1]
+        root_cost = 0.0
+
+        for spur_position, spur_vertex in enumerate(previous_path[:-1]):
+            root = previous_path[:spur_position + 1]
+            banned_successors = {path[spur_position + 1] for path in paths
+                                 if len(path) > spur_position + 1 and path[:spur_position + 1] == root}
+
+            spur_cost, spur_path = _search_spur_path(spur_vertex, goal_vertex, get_successors, reverse_search,
+                                                     set(root[:-1]), banned_successors)
+            if spur_path:
+                path = root[:-1] + spur_path
+                if tuple(path) not in known_paths:
+                    known_paths.add(tuple(path))
+                    heappush(candidates, (root_cost + spur_cost, len(known_paths), path))
+
+            root_cost += min(weight for successor, weight in get_successors(spur_vertex)
+                             if successor == previous_path[spur_position + 1])
+
+        if not candidates:
+            break
+
+        paths.append(heappop(candidates)[2])
+
+    return paths
+
+
+def _search_spur_path(spur_vertex, goal_vertex, get_successors, reverse_search, banned_vertices, banned_successors):
+    """
+    A* search of the cheapest path from the spur vertex to the goal vertex, avoiding the banned vertices, and the edges
+    from the spur vertex to the banned successors.
+    The search ends as soon as it settles a vertex whose path to the goal, within the shortest path tree of
+    reverse_search, avoids the bans: the costs to the goal guiding the search being lower bounds, that path cannot be
+    beaten.
+
+    :return:    Cost and vertices of the spur path; infinite cost and empty list if there is none
+    :rtype:     Tuple (Float, List of vertices)
+    """
+    if reverse_search.get_cost(spur_vertex) == math.inf:
+        return math.inf, []
+
+    cost_to = {spur_vertex: 0.0}
+    path_trace = {}
+    already_visited = set()
+    priority_queue = IndexedPriorityQueue()
+    priority_queue.push(reverse_search.get_cost(spur_vertex), spur_vertex)
+
+    while not priority_queue.is_empty():
+        current = priority_queue.pop()
+        already_visited.add(current)
+
+        # Going back through the spur vertex would take one of its banned edges, or could have been done from it
+        tree_path = reverse_search.get_path(current)
+        if current == spur_vertex:
+            is_tree_path_allowed = len(tree_path) == 1 or tree_path[1] not in banned_successors
+        else:
+            is_tree_path_allowed = spur_vertex not in tree_path
+
+        if is_tree_path_allowed and banned_vertices.isdisjoint(tree_path):
+            path = [current]
+            while path[-1] in path_trace:
+                path.append(path_trace[path[-1]])
+
+            path.reverse()
+            return cost_to[current] + reverse_search.get_cost(current), path + tree_path[1:]
+
+        for neighbor, edge_weight in get_successors(current):
+            if neighbor in already_visited or neighbor in banned_vertices or \
+                    (current == spur_vertex and neighbor in banned_successors):
+                continue
+
+            cost_to_goal = reverse_search.get_cost(neighbor)
+            cost_to_neighbor = cost_to[current] + edge_weight
+            if cost_to_goal < math.inf and cost_to_neighbor < cost_to.get(neighbor, math.inf):
+                cost_to[neighbor] = cost_to_neighbor
+                path_trace[neighbor] = current
+                priority_queue.push(cost_to_neighbor + cost_to_goal, neighbor)
+
+    return math.inf, []
+
+
+class _ReverseSearch:
+    """
+    Dijkstra sweep from a goal vertex along the reversed edges, giving the costs from other vertices to the goal vertex,
+    and the shortest path tree leading to it.
+    The sweep is resumed only as far as needed to settle the vertices whose cost is asked for.
+    """
+
+    def __init__(self, goal_vertex, get_predecessors):
+        self._get_predecessors = get_predecessors
+        self._costs = {}  # Cost to the goal vertex of each settled vertex
+        self._next_vertices = {goal_vertex: None}  # Next vertex towards the goal vertex, within the shortest path tree
+        self._tentative_costs = {goal_vertex: 0.0}
+        self._priority_queue = IndexedPriorityQueue()
+        self._priority_queue.push(0.0, goal_vertex)
+
+    def get_cost(self, vertex):
+        """ :return: Cost of the shortest path from the given vertex to the goal vertex; infinite if there is none """
+        costs = self._costs
+        if vertex in costs:
+            return costs[vertex]
+
+        priority_queue, tentative_costs = self._priority_queue, self._tentative_costs
+        next_vertices = self._next_vertices
+        while not priority_queue.is_empty():
+            current = priority_queue.pop()
+            cost_to_goal = costs[current] = tentative_costs.pop(current)
+
+            for predecessor, edge_weight in self._get_predecessors(current):
+                if predecessor in costs:
+                    continue
+
+                cost_via_current = cost_to_goal + edge_weight
+                if cost_via_current < tentative_costs.get(predecessor, math.inf):
+                    tentative_costs[predecessor] = cost_via_current
+                    next_vertices[predecessor] = current
+                    priority_queue.push(cost_via_current, predecessor)
+
+            if current == vertex:
+                return cost_to_goal
+
+        return math.inf
+
+    def get_path(self, vertex):
+        """ :return: Shortest path from the given vertex to the goal vertex; the vertex must have been settled """
+        path = [vertex]
+        next_vertex = self._next_vertices[vertex]
+        while next_vertex is not None:
+            path.append(next_vertex)
+            next_vertex = self._next_vertices[next_vertex]
+
+        return path
+
+
+def _insert_row_item(offsets, targets, weights, row, target, weight):
+    """ Insert an edge at the end of a row of a compressed sparse row layout, shifting the following rows. """
+    slot = offsets[row + 1]
+    targets.insert(slot, target)
+    weights.insert(slot, weight)
+    offsets[row + 1:] = array(offsets.typecode, map((1).__add__, offsets[row + 1:]))
+
+
+def _remove_row_items(offsets, targets, weights, row, target):
+    """
+    Remove the edges going to a target from a row of a compressed sparse row layout, shifting the following rows.
+
+    :return:    Number of removed edges
+    """
+    removed_count = 0
+    for slot in reversed(range(offsets[row], offsets[row + 1])):
+        if targets[slot] == target:
+            del targets[slot]
+            del weights[slot]
+            removed_count += 1
+
+    if removed_count:
+        offsets[row + 1:] = array(offsets.typecode, (offset - removed_count for offset in offsets[row + 1:]))
+
+    return removed_count
+
+
+class ShortestPathTree:
+    """
+    Shortest paths from a single vertex to the vertices it reaches, as computed by a sweep of Dijkstra's algorithm.
+
+    The vertices are stored in the order the sweep settled them, hence by increasing cost, along with their cost and the
+    position of their predecessor within the tree; the path to any vertex is then read back without searching again.
+    """
+
+    def __init__(self, get_vertex_key=lambda vertex: vertex):
+        """
+        :parameter  get_vertex_key: Function giving the hashable key identifying a vertex within the tree
+        :type       get_vertex_key: Function with the following signature: f(vertex)
+        """
+        self.vertices = []
+        self.costs = array('d')
+        self.predecessors = array('l')  # Position of the predecessor of each vertex; -1 for the root
+        self._get_vertex_key = get_vertex_key
+        self._positions = {}
+
+    def add(self, vertex, cost, predecessor=None):
+        """
+        :parameter  predecessor:    Vertex preceding the given one on its shortest path, already part of the tree;
+                                    None for the root
+        """
+        self._positions[self._get_vertex_key(vertex)] = len(self.vertices)
+        self.vertices.append(vertex)
+        self.costs.append(cost)
+        self.predecessors.append(-1 if predecessor is None else self._positions[self._get_vertex_key(predecessor)])
+
+    def get_cost(self, vertex):
+        """ :return: Cost of the shortest path to the given vertex; infinite if it is not part of the tree """
+        try:
+            return self.costs[self._positions[self._get_vertex_key(vertex)]]
+        except KeyError:
+            return math.inf
+
+    def get_path(self, vertex):
+        """ :return: Shortest path to the given vertex. Empty list if it is not part of the tree """
+        try:
+            position = self._positions[self._get_vertex_key(vertex)]
+        except KeyError:
+            return []
+
+        path = []
+        while position != -1:
+            path.append(self.vertices[position])
+            position = self.predecessors[position]
+
+        path.reverse()
+        return path
+
+    def map_vertices(self, get_vertex, get_vertex_key=lambda vertex: vertex):
+        """
+        :parameter  get_vertex: Function giving the vertex to use in place of each vertex of this tree
+        :type       get_vertex: Function with the following signature: f(vertex)
+
+        :return:    Tree of the same paths, sharing the costs and predecessors of this one, along other vertices
+        :rtype:     ShortestPathTree
+        """
+        tree = ShortestPathTree(get_vertex_key)
+        tree.vertices = [get_vertex(vertex) for vertex in self.vertices]
+        tree.costs, tree.predecessors = self.costs, self.predecessors
+        tree._positions = {get_vertex_key(vertex): position for position, vertex in enumerate(tree.vertices)}
+        return tree
+
+    def __contains__(self, vertex):
+        return self._get_vertex_key(vertex) in self._positions
+
+    def __len__(self):
+        return len(self.vertices)
+
+
+class ShortestPathCache:
+    """
+    Bounded cache of shortest paths, evicting the least recently used ones first.
+
+    Since any prefix of a shortest path is itself a shortest path, a cached path also answers the queries going from
+    its start vertex to any vertex along it.
+
+    The cached paths are tied to a version of the graph (see DirectedGraph.version), and are all dropped as soon as
+    they are looked up for another version; unless the graph repairs the cache beforehand (see repair), when a change
+    can only affect some of the paths.
+    """
+
+    def __init__(self, capacity, get_vertex_key=lambda vertex: vertex):
+        """
+        :parameter  capacity:       Maximum number of paths to keep
+        :type       capacity:       Integer
+
+        :parameter  get_vertex_key: Function giving the hashable key identifying a vertex within the cache
+        :type       get_vertex_key: Function with the following signature: f(vertex)
+        """
+        self.capacity = capacity
+        self._get_vertex_key = get_vertex_key
+        self._paths = OrderedDict()  # Path by (start key, goal key), from the least to the most recently used
+        self._prefixes = {}  # Key of a cached path going through a vertex, by (start key, vertex key)
+        self._version = None
+
+        self.hits = 0
+        self.prefix_hits = 0  # Part of the hits, answered by the prefix of a longer cached path
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.discarded = 0  # Paths dropped by repairs
+
+    def get(self, start_key, goal_key, version):
+        """
+        :parameter  version:    Version of the graph the path is looked up for
+
+        :return:    Cached shortest path between both given vertices (possibly empty if there is no valid path);
+                    None if it is not cached.
+        """
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+        key = (start_key, goal_key)
+        try:
+            path = self._paths[key]
+        except KeyError:
+            try:
+                prefix_key = self._prefixes[key]
+            except KeyError:
+                self.misses += 1
+                return None
+
+            path = self._paths[prefix_key]
+            self._paths.move_to_end(prefix_key)
+            self.hits += 1
+            self.prefix_hits += 1
+
+            get_vertex_key = self._get_vertex_key
+            for position, vertex in enumerate(path):
+                if get_vertex_key(vertex) == goal_key:
+                    return list(path[:position + 1])
+
+        self._paths.move_to_end(key)
+        self.hits += 1
+        return list(path)
+
+    def put(self, start_key, goal_key, path):
+        """ Cache the given shortest path between both given vertices, possibly evicting the least recently used """
+        if self.capacity <= 0:
+            return
+
+        key = (start_key, goal_key)
+        if key in self._paths:
+            self._remove(key)
+        elif len(self._paths) >= self.capacity:
+            self._remove(next(iter(self._paths)))
+            self.evictions += 1
+
+        self._paths[key] = tuple(path)
+        for vertex in path:
+            self._prefixes.setdefault((start_key, self._get_vertex_key(vertex)), key)
+
+    def repair(self, previous_version, version, removed_edges_keys=(), removed_vertices_keys=()):
+        """
+        Keep the cached paths valid across a change of the graph which only removed edges or vertices, or added
+        vertices without edges: since such changes cannot make any path shorter, only the paths going through the
+        removed edges and vertices have to be dropped.
+
+        :parameter  previous_version, version:  Versions of the graph before and after the change; if the cache is not
+                                                up to date with the former, it is emptied instead of being repaired
+        :type       previous_version, version:  Integers
+
+        :parameter  removed_edges_keys:     Keys of the start and end vertices of each removed edge
+        :type       removed_edges_keys:     Iterable of (key, key)
+
+        :parameter  removed_vertices_keys:  Keys of the removed vertices
+        :type       removed_vertices_keys:  Iterable of keys
+        """
+        if self._version != previous_version:
+            self.clear()
+            self._version = version
+            return
+
+        removed_edges_keys = set(removed_edges_keys)
+        removed_vertices_keys = set(removed_vertices_keys)
+        get_vertex_key = self._get_vertex_key
+
+        for key, path in list(self._paths.items()):
+            path_keys = [get_vertex_key(vertex) for vertex in path]
+            if (not removed_vertices_keys.isdisjoint(key) or not removed_vertices_keys.isdisjoint(path_keys)
+                    or not removed_edges_keys.isdisjoint(zip(path_keys, path_keys[1:]))):
+                self._remove(key)
+                self.discarded += 1
+
+        self._version = version
+
+    def clear(self):
+        if self._paths:
+            self.invalidations += 1
+
+        self._paths.clear()
+        self._prefixes.clear()
+
+    def _remove(self, key):
+        start_key = key[0]
+        for vertex in self._paths.pop(key):
+            prefix_key = (start_key, self._get_vertex_key(vertex))
+            if self._prefixes.get(prefix_key) == key:
+                del self._prefixes[prefix_key]
+
+    def __len__(self):
+        return len(self._paths)
+
+
+class CompactDirectedGraph:
+    """
+    Represents a directed graph, stored with a compressed sparse row (CSR) layout.
+
+    Vertices are interned to consecutive integer indices, and the successors of the vertex of index i are stored in
+    targets[offsets[i]:offsets[i + 1]], next to the weights of the matching edges in the weights array.
+    Compared to DirectedGraph, this layout avoids a set per vertex, and lets the search loop work on integers only;
+    the counterpart is that modifying the graph once built is costly, as the following rows have to be shifted.
+
+    Edges weights are computed once, at construction time, by the function given to the constructor.
+    """
+
+    class SearchState:
+        """
+        Convenience class containing the per-vertex data needed by the searches, preallocated once and meant to be
+        reused across queries.
+
+        Each entry is stamped with the generation of the search that wrote it, and is only valid for that search;
+        starting a new search therefore only requires to increment the generation, rather than clearing the arrays.
+        """
+        _MAX_GENERATION = 0xFFFFFFFF
+
+        def __init__(self, vertices_count):
+            self.cost_to = array('d', [0.0]) * vertices_count
+            self.path_trace = array('l', [-1]) * vertices_count
+            self.reached = array('I', [0]) * vertices_count  # Generation which last wrote cost_to and path_trace
+            self.visited = array('I', [0]) * vertices_count  # Generation which last visited the vertex
+            self.generation = 0
+
+        def start(self, start_index):
+            """
+            Invalidate the data of the previous search, and register the start vertex of a new one.
+
+            :return:    Generation of the new search
+            """
+            if self.generation == self._MAX_GENERATION:
+                vertices_count = len(self.cost_to)
+                self.reached = array('I', [0]) * vertices_count
+                self.visited = array('I', [0]) * vertices_count
+                self.generation = 0
+
+            self.generation += 1
+            self.reached[start_index] = self.generation
+            self.cost_to[start_index] = 0.0
+            self.path_trace[start_index] = -1
+
+            return self.generation
+
+        def reconstruct_index_path(self, index):
+            path = [index]
+            while self.path_trace[index] != -1:
+                index = self.path_trace[index]
+                path.append(index)
+
+            path.reverse()
+            return path
+
+    def __init__(self, edges, get_weight, vertices=()):
+        """
+        :parameter  edges:      Edges composing the graph
+        :type       edges:      Iterable of DirectedEdge
+
+        :parameter  get_weight: Function computing the weight of an edge
+        :type       get_weight: Function with the following signature: f(start_vertex, end_vertex)
+
+        :parameter  vertices:   Vertices to intern first, in the given order, whether they belong to an edge or not
+        :type       vertices:   Iterable of vertices
+        """
+        self._vertices = []
+        self._vertex_indices = {}
+
+        for vertex in vertices:
+            self._intern(vertex)
+
+        starts = array('l')
+        ends = array('l')
+        for edge in edges:
+            starts.append(self._intern(edge.start))
+            ends.append(self._intern(edge.end))
+
+        weights = array('d', (get_weight(self._vertices[start], self._vertices[end])
+                              for start, end in zip(starts, ends)))
+
+        self._build_rows(starts, ends, weights)
+
+    @classmethod
+    def from_indexed_edges(cls, vertices, starts, ends, weights):
+        """
+        Build a graph whose edges are already expressed with vertices indices, and whose weights are already known.
+
+        :parameter  vertices:   Vertices composing the graph, the position of each one being its index
+        :type       vertices:   Sequence of vertices
+
+        :parameter  starts, ends, weights:  Start vertex index, end vertex index and weight of each edge
+        :type       starts, ends, weights:  Sequences of the same length
+        """
+        graph = cls.__new__(cls)
+        graph._vertices = list(vertices)
+        graph._vertex_indices = {vertex: index for index, vertex in enumerate(graph._vertices)}
+        graph._build_rows(starts, ends, weights)
+        return graph
+
+    @classmethod
+    def from_rows(cls, offsets, targets, weights):
+        """
+        Build a graph around an already built compressed sparse row layout, without copying it.
+        The vertices are then their own indices.
+
+        :type   offsets, targets:   Sequences of integers, such as arrays or memoryviews
+        :type   weights:            Sequence of floats, such as an array or a memoryview
+        """
+        graph = cls.__new__(cls)
+        graph._vertices = range(len(offsets) - 1)
+        graph._vertex_indices = graph._vertices  # Indexing a range by a vertex gives back the vertex itself
+        graph.offsets, graph.targets, graph.weights = offsets, targets, weights
+        return graph
+
+    def _build_rows(self, starts, ends, weights):
+        # Counting sort of the edges by start vertex
+        self.offsets = array('l', [0]) * (len(self._vertices) + 1)
+        for start in starts:
+            self.offsets[start + 1] += 1
+        for index in range(len(self._vertices)):
+            self.offsets[index + 1] += self.offsets[index]
+
+        self.targets = array('l', [0]) * len(ends)
+        self.weights = array('d', [0.0]) * len(ends)
+        next_slots = self.offsets[:-1]
+
+        for start, end, weight in zip(starts, ends, weights):
+            slot = next_slots[start]
+            next_slots[start] += 1
+
+            self.targets[slot] = end
+            self.weights[slot] = weight
+
+    def add_vertex(self, vertex):
+        """
+        Add a vertex without any edge.
+        The search data owned by this graph is reallocated on next use; search states allocated beforehand can no
+        longer be used with this graph.
+
+        :return:    Index the vertex is interned to
+        """
+        self._make_mutable()
+        index = self._intern(vertex)
+        if index == len(self.offsets) - 1:
+            self.offsets.append(self.offsets[-1])
+            if hasattr(self, '_reverse_rows'):
+                self._reverse_rows[0].append(self._reverse_rows[0][-1])
+            if hasattr(self, '_search_state'):
+                del self._search_state
+
+        return index
+
+    def add_index_edge(self, start_index, end_index, weight):
+        """ Add an edge between two vertices given by their indices. """
+        self._make_mutable()
+        _insert_row_item(self.offsets, self.targets, self.weights, start_index, end_index, weight)
+        if hasattr(self, '_reverse_rows'):
+            _insert_row_item(*self._reverse_rows, end_index, start_index, weight)
+
+    def remove_index_edge(self, start_index, end_index):
+        """
+        Remove the edge between two vertices given by their indices, including its duplicates if any.
+
+        :raises     KeyError:   If there is no such edge
+        """
+        self._make_mutable()
+        if not _remove_row_items(self.offsets, self.targets, self.weights, start_index, end_index):
+            raise KeyError((start_index, end_index))
+
+        if hasattr(self, '_reverse_rows'):
+            _remove_row_items(*self._reverse_rows, end_index, start_index)
+
+    def has_index_edge(self, start_index, end_index):
+        """ :return: Whether there is an edge between two vertices given by their indices """
+        return any(self.targets[slot] == end_index
+                   for slot in range(self.offsets[start_index], self.offsets[start_index + 1]))
+
+    def _make_mutable(self):
+        """ Copy the rows and the vertices into resizable containers, if they are not (see from_rows). """
+        if not isinstance(self.offsets, array):
+            self.offsets, self.targets = array('l', self.offsets), array('l', self.targets)
+            self.weights = array('d', self.weights)
+
+        if not isinstance(self._vertices, list):
+            self._vertices = list(self._vertices)
+            self._vertex_indices = {vertex: index for index, vertex in enumerate(self._vertices)}
+
+    def _intern(self, vertex):
+        try:
+            return self._vertex_indices[vertex]
+        except KeyError:
+            index = self._vertex_indices[vertex] = len(self._vertices)
+            self._vertices.append(vertex)
+            return index
+
+    def get_shortest_path_a_star(self, start_vertex, goal_vertex, cost_heuristic, statistics=None):
+        """
+        Compute the shortest path between two points, using the A* algorithm.
+        Same interface as DirectedGraph.get_shortest_path_a_star.
+
+        :return:    Shortest path between both given vertices. Empty list if there is no valid path
+        """
+        vertices = self._vertices
+        index_path = self.get_shortest_index_path_a_star(self.get_vertex_index(start_vertex),
+                                                         self.get_vertex_index(goal_vertex),
+                                                         lambda index: cost_heuristic(vertices[index], goal_vertex),
+                                                         statistics=statistics)
+        return [vertices[index] for index in index_path]
+
+    def get_shortest_index_path_a_star(self, start_index, goal_index, index_heuristic, search_state=None,
+                                       statistics=None):
+        """
+        Compute the shortest path between two vertices given by their indices, using the A* algorithm.
+
+        :parameter  index_heuristic:    Function estimating the cost to get from a vertex to the goal vertex
+        :type       index_heuristic:    Function with the following signature: f(vertex_index)
+
+        :parameter  search_state:       Search data to reuse; defaults to the one owned by this graph
+        :type       search_state:       CompactDirectedGraph.SearchState
+
+        :parameter  statistics:         If given, records the operations and phase durations of the search
+        :type       statistics:         SearchStatistics
+
+        :return:    Indices of the vertices composing the shortest path. Empty list if there is no valid path
+        """
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+
+        state = search_state or self.search_state
+        generation = state.start(start_index)
+        cost_to, path_trace, reached, visited = state.cost_to, state.path_trace, state.reached, state.visited
+
+        push, pop = heappush, heappop
+        if statistics is not None:
+            # Only the queue operations are counted during the search; the other counters are derived afterwards
+            push, pop = statistics.push, statistics.pop
+            pushes_count, pops_count = statistics.heap_pushes, statistics.heap_pops
+            statistics.queries += 1
+            statistics.start_phase('search')
+
+        queue = []
+        push(queue, (0.0, start_index))
+        path = []
+
+        while queue:
+            current = pop(queue)[1]
+            if visited[current] == generation:
+                continue
+
+            if current == goal_index:
+                if statistics is not None:
+                    statistics.start_phase('reconstruction')
+                path = state.reconstruct_index_path(current)
+                break
+
+            visited[current] = generation
+            cost_to_current = cost_to[current]
+
+            for slot in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[slot]
+                if visited[neighbor] == generation:
+                    continue
+
+                cost_to_neighbor = cost_to_current + weights[slot]
+                if reached[neighbor] != generation or cost_to_neighbor < cost_to[neighbor]:
+                    reached[neighbor] = generation
+                    cost_to[neighbor] = cost_to_neighbor
+                    path_trace[neighbor] = current
+                    push(queue, (cost_to_neighbor + index_heuristic(neighbor), neighbor))
+
+        if statistics is not None:
+            statistics.stop_phase()
+            self._derive_statistics(statistics, state, pushes_count, pops_count, goal_reached=bool(path))
+
+        return path
+
+    def _derive_statistics(self, statistics, state, pushes_count, pops_count, goal_reached):
+        """
+        Derive the counters of a search from the queue operations it performed, and from its search state.
+
+        :parameter  pushes_count, pops_count:   Queue operations counters, before the search
+        :parameter  goal_reached:               Whether the search was stopped by popping the goal vertex
+        """
+        expanded_vertices = [index for index, generation in enumerate(state.visited) if generation == state.generation]
+        settled_count = len(expanded_vertices) + goal_reached  # The goal vertex is settled, but not expanded
+
+        statistics.vertices_settled += settled_count
+        statistics.stale_pops += statistics.heap_pops - pops_count - settled_count
+        # Every relaxation pushes an entry, unlike the start vertex
+        statistics.edges_relaxed += statistics.heap_pushes - pushes_count - 1
+        statistics.edges_scanned += sum(self.offsets[index + 1] - self.offsets[index] for index in expanded_vertices)
+
+    def get_shortest_index_path_bidirectional_a_star(self, start_index, goal_index, index_heuristic_to_goal,
+                                                     index_heuristic_from_start):
+        """
+        Compute the shortest path between two vertices given by their indices, using the bidirectional variant of the
+        A* algorithm described in DirectedGraph.get_shortest_path_bidirectional_a_star.
+
+        :parameter  index_heuristic_to_goal:    Function estimating the cost to get from a vertex to the goal vertex
+        :parameter  index_heuristic_from_start: Function estimating the cost to get from the start vertex to a vertex
+        :type       index_heuristic_to_goal, index_heuristic_from_start:    Functions with the following signature:
+                                                                            f(vertex_index)
+
+        :return:    Indices of the vertices composing the shortest path. Empty list if there is no valid path
+        """
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        reverse_offsets, sources, reverse_weights = self.reverse_rows
+
+        return _search_bidirectionally(
+            start_index, goal_index,
+            lambda index: (index_heuristic_to_goal(index) - index_heuristic_from_start(index)) / 2,
+            lambda index: zip(targets[offsets[index]:offsets[index + 1]],
+                              weights[offsets[index]:offsets[index + 1]]),
+            lambda index: zip(sources[reverse_offsets[index]:reverse_offsets[index + 1]],
+                              reverse_weights[reverse_offsets[index]:reverse_offsets[index + 1]]))
+
+    def get_k_shortest_index_paths(self, start_index, goal_index, paths_count):
+        """
+        Compute the cheapest loopless paths between two vertices given by their indices, using Yen's algorithm.
+        Same interface as DirectedGraph.get_k_shortest_paths; the vertices of the paths are the indices.
+        """
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        reverse_offsets, sources, reverse_weights = self.reverse_rows
+
+        return _search_k_shortest_paths(
+            start_index, goal_index, paths_count,
+            lambda index: zip(targets[offsets[index]:offsets[index + 1]],
+                              weights[offsets[index]:offsets[index + 1]]),
+            lambda index: zip(sources[reverse_offsets[index]:reverse_offsets[index + 1]],
+                              reverse_weights[reverse_offsets[index]:reverse_offsets[index + 1]]))
+
+    def get_shortest_index_paths_from(self, start_index, goal_indices, search_state=None):
+        """
+        Compute the shortest paths from one vertex to several others, with a single sweep of Dijkstra's algorithm.
+        The sweep stops as soon as all the goal vertices are reached.
+
+        :parameter  goal_indices:   Indices of the vertices to reach
+        :type       goal_indices:   Sequence of integers
+
+        :parameter  search_state:   Search data to reuse; defaults to the one owned by this graph
+        :type       search_state:   CompactDirectedGraph.SearchState
+
+        :return:    Indices of the vertices composing each shortest path, in the order of the given goals.
+                    Empty list for each goal without valid path.
+        """
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+
+        state = search_state or self.search_state
+        generation = state.start(start_index)
+        cost_to, path_trace, reached, visited = state.cost_to, state.path_trace, state.reached, state.visited
+
+        goals_left = set(goal_indices)
+        queue = [(0.0, start_index)]
+
+        while queue and goals_left:
+            cost_to_current, current = heappop(queue)
+            if visited[current] == generation:
+                continue
+
+            visited[current] = generation
+            goals_left.discard(current)
+
+            for slot in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[slot]
+                if visited[neighbor] == generation:
+                    continue
+
+                cost_to_neighbor = cost_to_current + weights[slot]
+                if reached[neighbor] != generation or cost_to_neighbor < cost_to[neighbor]:
+                    reached[neighbor] = generation
+                    cost_to[neighbor] = cost_to_neighbor
+                    path_trace[neighbor] = current
+                    heappush(queue, (cost_to_neighbor, neighbor))
+
+        return [state.reconstruct_index_path(goal_index) if visited[goal_index] == generation else []
+                for goal_index in goal_indices]
+
+    def get_shortest_index_path_tree(self, start_index, max_cost=math.inf, goal_indices=None, search_state=None):
+        """
+        Compute the shortest paths from one vertex to all the others, given by their indices, with a single sweep of
+        Dijkstra's algorithm.
+        Same interface as DirectedGraph.get_shortest_path_tree; the vertices of the tree are the indices.
+
+        :parameter  search_state:   Search data to reuse; defaults to the one owned by this graph
+        :type       search_state:   CompactDirectedGraph.SearchState
+
+        :rtype:     ShortestPathTree
+        """
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+
+        state = search_state or self.search_state
+        generation = state.start(start_index)
+        cost_to, path_trace, reached, visited = state.cost_to, state.path_trace, state.reached, state.visited
+
+        tree = ShortestPathTree()
+        goals_left = None if goal_indices is None else set(goal_indices)
+        queue = [(0.0, start_index)]
+
+        while queue and goals_left != set():
+            cost_to_current, current = heappop(queue)
+            if visited[current] == generation:
+                continue
+
+            visited[current] = generation
+            predecessor = path_trace[current]
+            tree.add(current, cost_to_current, None if predecessor == -1 else predecessor)
+            if goals_left is not None:
+                goals_left.discard(current)
+
+            for slot in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[slot]
+                if visited[neighbor] == generation:
+                    continue
+
+                cost_to_neighbor = cost_to_current + weights[slot]
+                if cost_to_neighbor <= max_cost and (reached[neighbor] != generation
+                                                     or cost_to_neighbor < cost_to[neighbor]):
+                    reached[neighbor] = generation
+                    cost_to[neighbor] = cost_to_neighbor
+                    path_trace[neighbor] = current
+                    heappush(queue, (cost_to_neighbor, neighbor))
+
+        return tree
+
+    def get_distances_from(self, start_index, reverse=False):
+        """
+        Compute the shortest path costs from one vertex to all the others, with a full sweep of Dijkstra's algorithm.
+
+        :parameter  reverse:    Whether to follow the edges backward, hence computing the costs from all the vertices
+                                to the given one
+        :type       reverse:    Boolean
+
+        :return:    Cost of the shortest path to each vertex, by vertex index; infinite for unreachable vertices
+        :rtype:     array of floats
+        """
+        offsets, targets, weights = self.reverse_rows if reverse else (self.offsets, self.targets, self.weights)
+
+        cost_to = array('d', [math.inf]) * (len(offsets) - 1)
+        cost_to[start_index] = 0.0
+        queue = [(0.0, start_index)]
+
+        while queue:
+            cost_to_current, current = heappop(queue)
+            if cost_to_current > cost_to[current]:  # Outdated queue entry
+                continue
+
+            for slot in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[slot]
+                cost_to_neighbor = cost_to_current + weights[slot]
+                if cost_to_neighbor < cost_to[neighbor]:
+                    cost_to[neighbor] = cost_to_neighbor
+                    heappush(queue, (cost_to_neighbor, neighbor))
+
+        return cost_to
+
+    def get_shortest_index_paths(self, index_pairs, get_index_heuristic, search_state=None):
+        """
+        Compute the shortest paths of a batch of queries.
+        The queries sharing the same start vertex are answered by a single one-to-many sweep, while the other ones are
+        answered by the A* algorithm.
+
+        :parameter  index_pairs:            Indices of the start and goal vertices of each query
+        :type       index_pairs:            Iterable of (Integer, Integer)
+
+        :parameter  get_index_heuristic:    Function building the heuristic to use for reaching a given goal vertex
+        :type       get_index_heuristic:    Function with the following signature: f(goal_index) -> f(vertex_index)
+
+        :return:    Indices of the vertices composing the shortest path of each query, in the given order
+        """
+        goals_per_start = {}
+        queries_count = 0
+        for start_index, goal_index in index_pairs:
+            query_positions, goal_indices = goals_per_start.setdefault(start_index, ([], []))
+            query_positions.append(queries_count)
+            goal_indices.append(goal_index)
+            queries_count += 1
+
+        paths = [None] * queries_count
+        for start_index, (query_positions, goal_indices) in goals_per_start.items():
+            if len(goal_indices) == 1:
+                index_paths = [self.get_shortest_index_path_a_star(start_index, goal_indices[0],
+                                                                   get_index_heuristic(goal_indices[0]), search_state)]
+            else:
+                index_paths = self.get_shortest_index_paths_from(start_index, goal_indices, search_state)
+
+            for query_position, index_path in zip(query_positions, index_paths):
+                paths[query_position] = index_path
+
+        return paths
+
+    @property
+    def reverse_rows(self):
+        """
+        :return:    Offsets, sources and weights of the reversed edges, with the same layout as the graph's rows;
+                    built on first use.
+        """
+        try:
+            return self._reverse_rows
+        except AttributeError:
+            vertices_count = len(self.offsets) - 1
+            reverse_offsets = array('l', [0]) * (vertices_count + 1)
+            for target in self.targets:
+                reverse_offsets[target + 1] += 1
+            for index in range(vertices_count):
+                reverse_offsets[index + 1] += reverse_offsets[index]
+
+            sources = array('l', [0]) * len(self.targets)
+            reverse_weights = array('d', [0.0]) * len(self.targets)
+            next_slots = reverse_offsets[:-1]
+
+            for source in range(vertices_count):
+                for slot in range(self.offsets[source], self.offsets[source + 1]):
+                    reverse_slot = next_slots[self.targets[slot]]
+                    next_slots[self.targets[slot]] += 1
+
+                    sources[reverse_slot] = source
+                    reverse_weights[reverse_slot] = self.weights[slot]
+
+            self._reverse_rows = reverse_offsets, sources, reverse_weights
+            return self._reverse_rows
+
+    @property
+    def search_state(self):
+        """ :return: Search data owned by this graph, allocated on first use and reused by every later search """
+        try:
+            return self._search_state
+        except AttributeError:
+            self._search_state = CompactDirectedGraph.SearchState(len(self._vertices))
+            return self._search_state
+
+    def get_vertex_index(self, vertex):
+        """ :return: Index the given vertex is interned to """
+        return self._vertex_indices[vertex]
+
+    def get_vertex(self, index):
+        """ :return: Vertex interned to the given index """
+        return self._vertices[index]
+
+    @property
+    def vertices(self):
+        """ :return: Vertices composing the graph, ordered by index """
+        return self._vertices
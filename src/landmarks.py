@@ -0,0 +1,243 @@
+""" Implements the landmarks preprocessing of compact graphs, providing tight A* heuristics (ALT algorithm). """
+
+import math
+import struct
+from array import array
+
+
+LANDMARKS_MAGIC = b"TANLMRK\0"
+LANDMARKS_VERSION = 1
+
+_HEADER = struct.Struct("=8sIII")  # Magic, version, landmarks count, vertices count
+
+
+class Landmarks:
+    """
+    Shortest path costs between a few landmark vertices and all the vertices of a graph, in both directions.
+
+    By the triangle inequality, for any landmark L, the cost of going from a vertex v to a vertex t is at least
+    d(v, L) - d(t, L) and d(L, t) - d(L, v); the maximum of those lower bounds is a consistent heuristic, usually far
+    tighter than geometric ones on networks whose routes are winding.
+
+    The costs are stored vertex by vertex, so that evaluating the heuristic for a vertex reads contiguous memory.
+    """
+
+    def __init__(self, landmark_indices, costs_from_landmarks, costs_to_landmarks):
+        """
+        :parameter  landmark_indices:       Indices of the landmark vertices
+        :type       landmark_indices:       Sequence of integers
+
+        :parameter  costs_from_landmarks:   Cost d(L, v) at position v * landmarks_count + l, L being the landmark l
+        :parameter  costs_to_landmarks:     Cost d(v, L) at position v * landmarks_count + l, L being the landmark l
+        :type       costs_from_landmarks, costs_to_landmarks:   Sequences of floats
+        """
+        self.landmark_indices = landmark_indices
+        self._costs_from_landmarks = costs_from_landmarks
+        self._costs_to_landmarks = costs_to_landmarks
+
+    @property
+    def landmarks_count(self):
+        return len(self.landmark_indices)
+
+    def get_lower_bound(self, start_index, goal_index):
+        """ :return: Lower bound of the cost of going from the given start vertex to the given goal vertex """
+        return self.build_index_heuristic(goal_index)(start_index)
+
+    def build_index_heuristic(self, vertex_index, reverse=False, start_index=None, active_landmarks_count=None):
+        """
+        :parameter  vertex_index:   Index of the vertex the costs are estimated to (or from, when reverse)
+        :type       vertex_index:   Integer
+
+        :parameter  reverse:        Whether to estimate the costs from the given vertex rather than to it
+        :type       reverse:        Boolean
+
+        :parameter  start_index, active_landmarks_count:    If both given, only the landmarks giving the best lower
+                                                            bounds for the given start vertex are used, which makes
+                                                            each evaluation cheaper
+        :type       start_index, active_landmarks_count:    Integers
+
+        :return:    Function estimating the cost between a vertex, given by its index, and the given vertex
+        :rtype:     Function with the following signature: f(vertex_index)
+        """
+        landmarks_count = self.landmarks_count
+        # When reverse, d(t, v) >= d(L, v) - d(L, t) and d(t, L) - d(v, L): the roles of both tables are swapped
+        if reverse:
+            costs_to, costs_from = self._costs_from_landmarks, self._costs_to_landmarks
+        else:
+            costs_to, costs_from = self._costs_to_landmarks, self._costs_from_landmarks
+
+        base = vertex_index * landmarks_count
+        bounds_terms = [(landmark, costs_to[base + landmark], costs_from[base + landmark])
+                        for landmark in range(landmarks_count)]
+
+        if start_index is not None and active_landmarks_count is not None:
+            start_base = start_index * landmarks_count
+            bounds_terms.sort(key=lambda terms: -_get_lower_bound(costs_to[start_base + terms[0]],
+                                                                  costs_from[start_base + terms[0]],
+                                                                  terms[1], terms[2]))
+            del bounds_terms[active_landmarks_count:]
+
+        def index_heuristic(index):
+            index_base = index * landmarks_count
+            best_bound = 0.0
+            for landmark, cost_to_landmark, cost_from_landmark in bounds_terms:
+                bound = _get_lower_bound(costs_to[index_base + landmark], costs_from[index_base + landmark],
+                                         cost_to_landmark, cost_from_landmark)
+                if bound > best_bound:
+                    best_bound = bound
+
+            return best_bound
+
+        return index_heuristic
+
+    def add_vertex(self):
+        """ Extend the costs tables to a vertex added to the graph without any edge, hence unreachable. """
+        self._make_mutable()
+        self._costs_from_landmarks.extend([math.inf] * self.landmarks_count)
+        self._costs_to_landmarks.extend([math.inf] * self.landmarks_count)
+
+    def repair(self, compact_graph, added_edge=None):
+        """
+        Keep the landmarks valid across a change of their graph.
+
+        Removing edges only makes the shortest paths longer, so the costs computed beforehand remain lower bounds of
+        the new ones, still fulfilling the triangle inequality on the remaining edges: the heuristic stays admissible
+        and consistent, only less tight, and nothing has to be done.
+        An added edge may however shorten the paths to or from some landmarks: the costs of these landmarks only are
+        computed again.
+
+        :parameter  compact_graph:  The graph, already changed
+        :type       compact_graph:  CompactDirectedGraph
+
+        :parameter  added_edge:     Start vertex index, end vertex index and weight of the added edge, if any
+        :type       added_edge:     Tuple (Integer, Integer, Float)
+
+        :return:    Number of costs sweeps computed again, up to two per landmark (to and from it)
+        :rtype:     Integer
+        """
+        if added_edge is None:
+            return 0
+
+        self._make_mutable()
+        start_index, end_index, weight = added_edge
+        landmarks_count = self.landmarks_count
+        start_base, end_base = start_index * landmarks_count, end_index * landmarks_count
+        repaired_count = 0
+
+        for landmark, landmark_index in enumerate(self.landmark_indices):
+            if self._costs_from_landmarks[start_base + landmark] + weight < \
+                    self._costs_from_landmarks[end_base + landmark]:
+                self._costs_from_landmarks[landmark::landmarks_count] = compact_graph.get_distances_from(
+                    landmark_index)
+                repaired_count += 1
+
+            if weight + self._costs_to_landmarks[end_base + landmark] < \
+                    self._costs_to_landmarks[start_base + landmark]:
+                self._costs_to_landmarks[landmark::landmarks_count] = compact_graph.get_distances_from(
+                    landmark_index, reverse=True)
+                repaired_count += 1
+
+        return repaired_count
+
+    def _make_mutable(self):
+        if not isinstance(self._costs_from_landmarks, array):
+            self._costs_from_landmarks = array('d', self._costs_from_landmarks)
+        if not isinstance(self._costs_to_landmarks, array):
+            self._costs_to_landmarks = array('d', self._costs_to_landmarks)
+
+
+def _get_lower_bound(vertex_cost_to_landmark, vertex_cost_from_landmark, goal_cost_to_landmark,
+                     goal_cost_from_landmark):
+    # Unreachable landmarks carry no information, unless they prove the goal to be unreachable from the vertex
+    bound = 0.0
+    if goal_cost_to_landmark != math.inf:
+        bound = vertex_cost_to_landmark - goal_cost_to_landmark
+    if vertex_cost_from_landmark != math.inf:
+        bound = max(bound, goal_cost_from_landmark - vertex_cost_from_landmark)
+
+    return bound
+
+
+def compute_landmarks(compact_graph, landmarks_count=8, first_landmark_index=0):
+    """
+    Select landmarks with the farthest-point strategy, and compute their costs to and from all the vertices.
+    Each new landmark is the vertex farthest from the ones already selected, vertices unreachable from them coming
+    first, so that each disconnected part of the graph gets a landmark.
+
+    :parameter  compact_graph:          Graph to preprocess
+    :type       compact_graph:          CompactDirectedGraph
+
+    :parameter  landmarks_count:        Number of landmarks to select; more landmarks give tighter bounds, at the
+                                        cost of memory and of more expensive evaluations
+    :type       landmarks_count:        Integer
+
+    :parameter  first_landmark_index:   Vertex the selection starts from; it is not itself a landmark
+    :type       first_landmark_index:   Integer
+
+    :rtype:     Landmarks
+    """
+    vertices_count = len(compact_graph.offsets) - 1
+    landmarks_count = min(landmarks_count, vertices_count)
+
+    landmark_indices = array('l')
+    costs_from_landmarks = []
+    costs_to_landmarks = []
+    closest_landmark_costs = compact_graph.get_distances_from(first_landmark_index)
+
+    while len(landmark_indices) < landmarks_count:
+        landmark_index = max((index for index in range(vertices_count) if index not in landmark_indices),
+                             key=closest_landmark_costs.__getitem__)
+        landmark_indices.append(landmark_index)
+        costs_from_landmarks.append(compact_graph.get_distances_from(landmark_index))
+        costs_to_landmarks.append(compact_graph.get_distances_from(landmark_index, reverse=True))
+
+        if len(landmark_indices) == 1:  # The first vertex only served to find the first landmark
+            closest_landmark_costs = array('d', costs_from_landmarks[0])
+        else:
+            for index, cost in enumerate(costs_from_landmarks[-1]):
+                if cost < closest_landmark_costs[index]:
+                    closest_landmark_costs[index] = cost
+
+    return Landmarks(landmark_indices,
+                     _interleave(costs_from_landmarks, vertices_count),
+                     _interleave(costs_to_landmarks, vertices_count))
+
+
+def _interleave(costs_per_landmark, vertices_count):
+    """ :return: Costs of all the landmarks, stored vertex by vertex """
+    interleaved_costs = array('d', [0.0]) * (vertices_count * len(costs_per_landmark))
+    for landmark, costs in enumerate(costs_per_landmark):
+        interleaved_costs[landmark::len(costs_per_landmark)] = costs
+
+    return interleaved_costs
+
+
+def save_landmarks(landmarks, file_path):
+    """ Save landmarks into a binary file, meant to be stored alongside the snapshot of their network. """
+    vertices_count = len(landmarks._costs_from_landmarks) // max(1, landmarks.landmarks_count)
+
+    with open(file_path, "wb") as file_stream:
+        file_stream.write(_HEADER.pack(LANDMARKS_MAGIC, LANDMARKS_VERSION, landmarks.landmarks_count,
+                                       vertices_count))
+        array('q', landmarks.landmark_indices).tofile(file_stream)
+        array('d', landmarks._costs_from_landmarks).tofile(file_stream)
+        array('d', landmarks._costs_to_landmarks).tofile(file_stream)
+
+
+def load_landmarks(file_path):
+    """ :rtype: Landmarks """
+    with open(file_path, "rb") as file_stream:
+        magic, version, landmarks_count, vertices_count = _HEADER.unpack(file_stream.read(_HEADER.size))
+        if magic != LANDMARKS_MAGIC:
+            raise ValueError("{} is not a landmarks file".format(file_path))
+        if version != LANDMARKS_VERSION:
+            raise ValueError("Unsupported landmarks version {} (expected {})".format(version, LANDMARKS_VERSION))
+
+        landmark_indices = array('q')
+        landmark_indices.fromfile(file_stream, landmarks_count)
+        costs_from_landmarks = array('d')
+        costs_from_landmarks.fromfile(file_stream, landmarks_count * vertices_count)
+        costs_to_landmarks = array('d')
+        costs_to_landmarks.fromfile(file_stream, landmarks_count * vertices_count)
+
+    return Landmarks(landmark_indices, costs_from_landmarks, costs_to_landmarks)
@@ -1,5 +1,7 @@
 """ Implements the main functions used to solve the puzzle. """
 
+from itertools import islice
+
 from src.tan_network import TanNetwork
 
 
@@ -17,13 +19,86 @@ def format_output(path):
         return "\n".join([stop.name for stop in path])
 
 
-def solve_puzzle(start, goal, stops, routes):
+def write_output(path, stream):
+    """
+    Same as format_output, the output being written to a text stream, followed by a line break.
+    The stops names are written one by one, rather than being joined into a whole output string first.
+
+    :parameter  stream: Stream to write the output to, such as sys.stdout
+    :type       stream: Text stream
+    """
+    if not path:
+        stream.write("IMPOSSIBLE\n")
+        return
+
+    write = stream.write
+    for stop in path:
+        write(stop.name)
+        write("\n")
+
+
+def write_outputs(paths, stream):
+    """
+    Same as write_output for several paths, such as the ones of TanNetwork.get_shortest_paths, their outputs following
+    each other. The whole batch is written at once, rather than one output string per path.
+
+    :parameter  paths:  Paths solving the queries
+    :type       paths:  Iterable of lists of TanStop instances
+    """
+    lines = []
+    for path in paths:
+        if path:
+            lines += [stop.name for stop in path]
+        else:
+            lines.append("IMPOSSIBLE")
+
+    lines.append("")
+    stream.write("\n".join(lines))
+
+
+def solve_puzzle(start, goal, stops, routes, compact=False):
     """
     Encapsulates the logic used to solve the puzzle.
     This function directly takes the puzzle's inputs as arguments, and outputs the solution with the expected format.
 
     Such encapsulation allows to conveniently perform functional tests.
+
+    :parameter  compact:    Whether the network should rely on its compact graph representation (see TanNetwork)
     """
-    tan_network = TanNetwork(stops, routes)
+    tan_network = TanNetwork(stops, routes, compact)
     path = tan_network.get_shortest_path(start, goal)
     return format_output(path)
+
+
+def read_puzzle_input(stream):
+    """
+    Read the puzzle's input from a text stream, without holding the stops and routes descriptions in memory.
+
+    :parameter  stream: Stream of the puzzle's input, such as sys.stdin or a file opened with a large buffering
+    :type       stream: Iterable of lines
+
+    :return:    Start stop description, goal stop description, stops descriptions and routes descriptions.
+                The two latter are iterators reading the stream as they are consumed; they must be consumed in this
+                order, as does TanNetwork.
+    :rtype:     Tuple (String, String, Iterator of strings, Iterator of strings)
+    """
+    lines = (line.rstrip("\r\n") for line in stream)
+
+    def read_records():  # Being a generator, the records count is only read once the previous records are consumed
+        records_count = int(next(lines))
+        yield from islice(lines, records_count)
+
+    start = next(lines)
+    goal = next(lines)
+
+    return start, goal, read_records(), read_records()
+
+
+def solve_puzzle_from_stream(stream, compact=False):
+    """
+    Same as solve_puzzle, but reading the puzzle's input from a text stream, as it is consumed.
+
+    :parameter  stream: Stream of the puzzle's input, such as sys.stdin
+    :type       stream: Iterable of lines
+    """
+    return solve_puzzle(*read_puzzle_input(stream), compact=compact)
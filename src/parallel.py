@@ -0,0 +1,117 @@
+""" Implements the execution of shortest path queries by several processes sharing the same network. """
+
+from array import array
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+from src.graph import CompactDirectedGraph
+from src.tan_network import TanNetwork
+
+
+class ParallelQueryRunner:
+    """
+    Answers batches of shortest path queries on a TanNetwork, by spreading them across worker processes.
+
+    The network's compact graph and coordinates table are copied once into a shared memory block, which every worker
+    maps without copying; only the stop indices of the queries and of the resulting paths are then exchanged with the
+    workers.
+
+    Instances are meant to be used as context managers, so that the workers and the shared memory are released.
+    """
+
+    def __init__(self, tan_network, workers_count=None, chunk_size=256):
+        """
+        :parameter  tan_network:    Network to answer queries on; it must rely on a compact graph
+        :type       tan_network:    TanNetwork
+
+        :parameter  workers_count:  Number of worker processes; defaults to the number of CPUs
+        :type       workers_count:  Integer
+
+        :parameter  chunk_size:     Number of queries sent to a worker at once
+        :type       chunk_size:     Integer
+        """
+        if tan_network.compact_graph is None:
+            raise ValueError("Parallel queries require a TanNetwork relying on a compact graph")
+
+        self._tan_network = tan_network
+        self._chunk_size = chunk_size
+
+        graph = tan_network.compact_graph
+        sections = [graph.offsets, graph.targets, graph.weights] + list(tan_network.coordinates_table)
+
+        self._shared_memory = SharedMemory(create=True, size=max(1, sum(_get_bytes_count(s) for s in sections)))
+        try:
+            layout = []
+            position = 0
+            for section in sections:
+                bytes_count = _get_bytes_count(section)
+                self._shared_memory.buf[position:position + bytes_count] = memoryview(section).cast('B')
+                layout.append((memoryview(section).format, position, len(section)))  # Arrays or snapshot memoryviews
+                position += bytes_count
+
+            self._pool = Pool(workers_count, initializer=_initialize_worker,
+                              initargs=(self._shared_memory.name, layout))
+        except BaseException:
+            # Not released by close, as the instance is not built: it would otherwise outlive the process
+            self._shared_memory.close()
+            self._shared_memory.unlink()
+            raise
+
+    def get_shortest_paths(self, stop_description_pairs):
+        """
+        Same interface as TanNetwork.get_shortest_paths.
+
+        :return:    Shortest path of each query, in the given order. Empty list for each query without valid path.
+        :rtype:     List of lists of TanStop
+        """
+        index_pairs = [(self._tan_network.get_stop_index_from_string(start_description),
+                        self._tan_network.get_stop_index_from_string(goal_description))
+                       for start_description, goal_description in stop_description_pairs]
+        chunks = [index_pairs[position:position + self._chunk_size]
+                  for position in range(0, len(index_pairs), self._chunk_size)]
+
+        get_stop_from_index = self._tan_network.get_stop_from_index
+        return [[get_stop_from_index(index) for index in index_path]
+                for chunk_index_paths in self._pool.map(_answer_queries, chunks, chunksize=1)
+                for index_path in chunk_index_paths]
+
+    def close(self):
+        """ Stop the workers, and release the shared memory. """
+        self._pool.terminate()
+        self._pool.join()
+        self._shared_memory.close()
+        self._shared_memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_info):
+        self.close()
+
+
+def _get_bytes_count(section):
+    return len(section) * section.itemsize
+
+
+# State of a worker process, set once by _initialize_worker
+_worker_shared_memory = None
+_worker_graph = None
+_worker_coordinates_table = None
+
+
+def _initialize_worker(shared_memory_name, layout):
+    global _worker_shared_memory, _worker_graph, _worker_coordinates_table
+
+    _worker_shared_memory = SharedMemory(name=shared_memory_name)
+    offsets, targets, weights, latitudes, longitudes = [
+        _worker_shared_memory.buf[position:position + count * array(typecode).itemsize].cast(typecode)
+        for typecode, position, count in layout]
+
+    _worker_graph = CompactDirectedGraph.from_rows(offsets, targets, weights)
+    _worker_coordinates_table = latitudes, longitudes
+
+
+def _answer_queries(index_pairs):
+    latitudes, longitudes = _worker_coordinates_table
+    return _worker_graph.get_shortest_index_paths(
+        index_pairs, lambda goal_index: TanNetwork.build_index_heuristic(latitudes, longitudes, goal_index))
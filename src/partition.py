@@ -0,0 +1,503 @@
+""" Implements the partitioning of networks into geographic cells, the overlay graph linking them, and its queries. """
+
+import math
+import os
+import struct
+from array import array
+from heapq import heappop, heappush
+from multiprocessing import Pipe, Process
+
+from src.graph import CompactDirectedGraph
+
+
+PARTITION_MAGIC = b"TANPART\0"
+PARTITION_VERSION = 1
+
+_HEADER = struct.Struct("=8sI")  # Magic, version
+_SECTION_LENGTH = struct.Struct("=Q")
+_OVERLAY_SECTIONS_TYPECODES = ['q', 'q', 'q', 'q', 'd']  # Stops cells, boundary stops, offsets, targets, weights
+_CELL_SECTIONS_TYPECODES = ['q', 'q', 'q', 'd', 'q']  # Stops, offsets, targets, weights, boundary indices
+
+OVERLAY_FILE_NAME = "overlay.partition"
+CELL_FILE_NAME = "cell_{}.partition"
+
+
+class Cell:
+    """
+    Part of a network gathering geographically close stops, along with the routes between them only.
+
+    Its stops are given local indices, the position of each one within the stops array giving back its index within
+    the whole network. The boundary stops are the stops having routes to or from other cells.
+    """
+
+    def __init__(self, stops, rows, boundary_indices):
+        """
+        :parameter  stops:              Index of each stop of the cell within the network, by local index
+        :type       stops:              Sequence of integers
+
+        :parameter  rows:               Offsets, targets and weights of the routes within the cell, by local index
+        :type       rows:               Tuple of three sequences
+
+        :parameter  boundary_indices:   Local indices of the boundary stops
+        :type       boundary_indices:   Sequence of integers
+        """
+        self.stops = stops
+        self.graph = CompactDirectedGraph.from_rows(*rows)
+        self.boundary_indices = boundary_indices
+        self._local_indices = {stop_index: local_index for local_index, stop_index in enumerate(stops)}
+
+    def get_boundary_costs(self, stop_index, reverse=False):
+        """
+        :parameter  stop_index: Index of a stop of the cell, within the network
+        :type       stop_index: Integer
+
+        :parameter  reverse:    Whether to compute the costs from the boundary stops to the given one
+        :type       reverse:    Boolean
+
+        :return:    Cost of the shortest path within the cell from the given stop to each boundary stop it reaches,
+                    by boundary stop index within the network
+        :rtype:     Dictionary of integers to floats
+        """
+        costs = self.graph.get_distances_from(self._local_indices[stop_index], reverse)
+        return {self.stops[boundary_index]: costs[boundary_index] for boundary_index in self.boundary_indices
+                if costs[boundary_index] != math.inf}
+
+    def get_path(self, start_index, goal_index):
+        """
+        :parameter  start_index, goal_index:    Indices of stops of the cell, within the network
+        :type       start_index, goal_index:    Integers
+
+        :return:    Cost and stops indices of the shortest path within the cell; infinite cost and empty list if there
+                    is no such path
+        """
+        local_start, local_goal = self._local_indices[start_index], self._local_indices[goal_index]
+        local_path = self.graph.get_shortest_index_paths_from(local_start, [local_goal])[0]
+        if not local_path:
+            return math.inf, []
+
+        return self.graph.search_state.cost_to[local_goal], [self.stops[local_index] for local_index in local_path]
+
+    def get_clique_edges(self):
+        """
+        :return:    Start stop index, end stop index and cost of the shortest path within the cell between each pair of
+                    distinct boundary stops the first one reaches the second one from
+        :rtype:     Iterator of (Integer, Integer, Float)
+        """
+        for start in self.boundary_indices:
+            costs = self.graph.get_distances_from(start)
+            for end in self.boundary_indices:
+                if end != start and costs[end] != math.inf:
+                    yield self.stops[start], self.stops[end], costs[end]
+
+    @property
+    def sections(self):
+        return [self.stops, self.graph.offsets, self.graph.targets, self.graph.weights, self.boundary_indices]
+
+
+class Overlay:
+    """
+    Graph linking the cells of a partitioned network through their boundary stops only: its edges are the routes
+    between cells, and the shortest paths within each cell between each pair of its boundary stops (the cell's clique).
+    It also records the cell of every stop of the network.
+    """
+
+    def __init__(self, stop_cells, boundary_stops, rows):
+        """
+        :parameter  stop_cells:     Cell of each stop, by stop index; -1 for the indices of removed stops
+        :type       stop_cells:     Sequence of integers
+
+        :parameter  boundary_stops: Index of each boundary stop within the network, by overlay index
+        :type       boundary_stops: Sequence of integers
+
+        :parameter  rows:           Offsets, targets and weights of the overlay edges, by overlay index
+        :type       rows:           Tuple of three sequences
+        """
+        self.stop_cells = stop_cells
+        self.boundary_stops = boundary_stops
+        self.graph = CompactDirectedGraph.from_rows(*rows)
+        self._overlay_indices = {stop_index: overlay_index for overlay_index, stop_index in enumerate(boundary_stops)}
+
+    @property
+    def cells_count(self):
+        return max(self.stop_cells, default=-1) + 1
+
+    def get_shortest_boundary_path(self, start_costs, goal_costs):
+        """
+        Compute the shortest path between two sets of boundary stops, with a multi-source Dijkstra search.
+
+        :parameter  start_costs:    Cost to reach each boundary stop the path may start from, by stop index
+        :type       start_costs:    Dictionary of integers to floats
+
+        :parameter  goal_costs:     Cost to reach the goal from each boundary stop the path may end at, by stop index
+        :type       goal_costs:     Dictionary of integers to floats
+
+        :return:    Total cost and boundary stops indices of the cheapest path, start and goal costs included; infinite
+                    cost and empty list if there is no such path
+        """
+        offsets, targets, weights = self.graph.offsets, self.graph.targets, self.graph.weights
+        overlay_indices = self._overlay_indices
+
+        cost_to = {}
+        path_trace = {}
+        queue = []
+        for stop_index, cost in start_costs.items():
+            overlay_index = overlay_indices[stop_index]
+            cost_to[overlay_index] = cost
+            path_trace[overlay_index] = -1
+            heappush(queue, (cost, overlay_index))
+        goal_costs = {overlay_indices[stop_index]: cost for stop_index, cost in goal_costs.items()}
+
+        best_cost = math.inf
+        best_index = -1
+        while queue:
+            cost_to_current, current = heappop(queue)
+            if cost_to_current >= best_cost:  # No path through the remaining entries can be cheaper
+                break
+            if cost_to_current > cost_to[current]:  # Outdated queue entry
+                continue
+
+            if current in goal_costs and cost_to_current + goal_costs[current] < best_cost:
+                best_cost = cost_to_current + goal_costs[current]
+                best_index = current
+
+            for slot in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[slot]
+                cost_to_neighbor = cost_to_current + weights[slot]
+                if cost_to_neighbor < cost_to.get(neighbor, math.inf):
+                    cost_to[neighbor] = cost_to_neighbor
+                    path_trace[neighbor] = current
+                    heappush(queue, (cost_to_neighbor, neighbor))
+
+        if best_index == -1:
+            return math.inf, []
+
+        path = []
+        overlay_index = best_index
+        while overlay_index != -1:
+            path.append(self.boundary_stops[overlay_index])
+            overlay_index = path_trace[overlay_index]
+
+        path.reverse()
+        return best_cost, path
+
+    @property
+    def sections(self):
+        return [self.stop_cells, self.boundary_stops, self.graph.offsets, self.graph.targets, self.graph.weights]
+
+
+class Partition:
+    """ Overlay and cells of a partitioned network, all held by the same process. """
+
+    def __init__(self, overlay, cells):
+        """
+        :type   overlay:    Overlay
+        :type   cells:      List of Cell, by cell index
+        """
+        self.overlay = overlay
+        self.cells = cells
+
+
+class PartitionedQueryEngine:
+    """
+    Answers shortest path queries on a partitioned network, only searching the start stop's cell, the overlay and the
+    goal stop's cell: the costs from the start stop to the boundary of its cell, and from the boundary of the goal
+    stop's cell to the goal stop, are computed within these cells, then joined by a search of the overlay.
+    The cliques edges of the resulting path are finally unpacked by searching the cells they belong to, which are the
+    only other cells a query reads.
+
+    The cells are obtained through a function, so that they may be held by this process or by other ones.
+    """
+
+    def __init__(self, overlay, get_cell):
+        """
+        :type   overlay:    Overlay
+
+        :parameter  get_cell:   Function giving a cell, or any object with the same get_boundary_costs and get_path
+                                methods, by cell index
+        :type       get_cell:   Function with the following signature: f(cell_index) -> Cell
+        """
+        self._overlay = overlay
+        self._get_cell = get_cell
+
+    def get_shortest_index_path(self, start_index, goal_index):
+        """
+        :parameter  start_index, goal_index:    Indices of the stops to travel between, within the network
+        :type       start_index, goal_index:    Integers
+
+        :return:    Indices of the stops composing the shortest path; empty list if there is no valid path
+        """
+        if start_index == goal_index:
+            return [start_index]
+
+        stop_cells = self._overlay.stop_cells
+        start_cell, goal_cell = self._get_cell(stop_cells[start_index]), self._get_cell(stop_cells[goal_index])
+
+        best_cost, best_path = math.inf, []
+        if stop_cells[start_index] == stop_cells[goal_index]:  # The path may still go through other cells
+            best_cost, best_path = start_cell.get_path(start_index, goal_index)
+
+        exit_costs = start_cell.get_boundary_costs(start_index)
+        entry_costs = goal_cell.get_boundary_costs(goal_index, reverse=True)
+        overlay_cost, boundary_path = self._overlay.get_shortest_boundary_path(exit_costs, entry_costs)
+        if overlay_cost >= best_cost:
+            return best_path
+
+        path = start_cell.get_path(start_index, boundary_path[0])[1]
+        for start, end in zip(boundary_path, boundary_path[1:]):
+            if stop_cells[start] == stop_cells[end]:  # Clique edge, standing for a path within the cell
+                path.extend(self._get_cell(stop_cells[start]).get_path(start, end)[1][1:])
+            else:
+                path.append(end)
+        path.extend(goal_cell.get_path(boundary_path[-1], goal_index)[1][1:])
+
+        return path
+
+
+class PartitionCoordinator:
+    """
+    Local stand-in for the coordinator of a network whose cells are spread across several nodes: each worker process
+    loads its own share of the cells from a partition directory, and answers the cell searches of the queries, while
+    the coordinator only loads the overlay and runs its searches.
+
+    Instances are meant to be used as context managers, so that the workers are stopped.
+    """
+
+    def __init__(self, directory, workers_count=2):
+        """
+        :parameter  directory:      Directory the partition was saved into (see save_partition)
+        :type       directory:      String
+
+        :parameter  workers_count:  Number of worker processes, the cell of index i being loaded by the worker of
+                                    index i modulo this count
+        :type       workers_count:  Integer
+        """
+        self._overlay = load_overlay(directory)
+        self._connections = []
+        self._workers = []
+        for worker_index in range(workers_count):
+            connection, worker_connection = Pipe()
+            worker = Process(target=_serve_cells, daemon=True,
+                             args=(directory, range(worker_index, self._overlay.cells_count, workers_count),
+                                   worker_connection))
+            worker.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._workers.append(worker)
+
+        self._engine = PartitionedQueryEngine(self._overlay, self._get_remote_cell)
+
+    def get_shortest_index_path(self, start_index, goal_index):
+        """ Same interface as PartitionedQueryEngine.get_shortest_index_path. """
+        return self._engine.get_shortest_index_path(start_index, goal_index)
+
+    def _get_remote_cell(self, cell_index):
+        return _RemoteCell(self._connections[cell_index % len(self._connections)], cell_index)
+
+    def close(self):
+        """ Stop the workers. """
+        for connection in self._connections:
+            connection.send(None)
+            connection.close()
+        for worker in self._workers:
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_info):
+        self.close()
+
+
+class _RemoteCell:
+    """ Cell held by a worker process, whose searches are requested through a connection to that process. """
+
+    def __init__(self, connection, cell_index):
+        self._connection = connection
+        self._cell_index = cell_index
+
+    def get_boundary_costs(self, stop_index, reverse=False):
+        return self._request("get_boundary_costs", stop_index, reverse)
+
+    def get_path(self, start_index, goal_index):
+        return self._request("get_path", start_index, goal_index)
+
+    def _request(self, method_name, *arguments):
+        self._connection.send((self._cell_index, method_name, arguments))
+        is_success, result = self._connection.recv()
+        if not is_success:
+            raise result
+
+        return result
+
+
+def _serve_cells(directory, cell_indices, connection):
+    """ Load the given cells, then answer the searches requested through the given connection, until None is sent. """
+    cells = {cell_index: load_cell(directory, cell_index) for cell_index in cell_indices}
+
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+
+        cell_index, method_name, arguments = request
+        try:
+            connection.send((True, getattr(cells[cell_index], method_name)(*arguments)))
+        except Exception as exception:
+            connection.send((False, exception))
+
+
+def build_partition(tan_network, max_cell_size=256):
+    """
+    Split a network into cells by recursive coordinate bisection: the stops are sorted along the longer side of their
+    bounding box, and split at the median, until each part has at most the given number of stops. Then compute the
+    overlay linking the cells.
+    The partition reflects the network as it is; it has to be rebuilt once routes or stops are added or removed.
+
+    :parameter  tan_network:    Network to partition; it must rely on a compact graph
+    :type       tan_network:    TanNetwork
+
+    :parameter  max_cell_size:  Maximum number of stops per cell; larger cells have relatively fewer boundary stops,
+                                but make the searches within the start and goal cells longer
+    :type       max_cell_size:  Integer
+
+    :rtype:     Partition
+    """
+    graph = tan_network.compact_graph
+    if graph is None:
+        raise ValueError("Partitioning requires a TanNetwork relying on a compact graph")
+    if max_cell_size < 1:
+        raise ValueError("Cells must be allowed at least one stop")
+
+    latitudes, longitudes = tan_network.coordinates_table
+    cells_stops = _bisect_stops(latitudes, longitudes, sorted(tan_network.stop_indices.values()), max_cell_size)
+
+    vertices_count = len(graph.offsets) - 1
+    stop_cells = array('q', [-1]) * vertices_count
+    for cell_index, stops in enumerate(cells_stops):
+        for stop_index in stops:
+            stop_cells[stop_index] = cell_index
+
+    is_boundary = bytearray(vertices_count)
+    cut_edges = []  # Routes between cells
+    for start in range(vertices_count):
+        for slot in range(graph.offsets[start], graph.offsets[start + 1]):
+            end = graph.targets[slot]
+            if stop_cells[start] != stop_cells[end]:
+                is_boundary[start] = is_boundary[end] = 1
+                cut_edges.append((start, end, graph.weights[slot]))
+
+    cells = [_build_cell(graph, stop_cells, cell_index, stops, is_boundary)
+             for cell_index, stops in enumerate(cells_stops)]
+
+    boundary_stops = array('q', (stop_index for stop_index in range(vertices_count) if is_boundary[stop_index]))
+    overlay_indices = {stop_index: overlay_index for overlay_index, stop_index in enumerate(boundary_stops)}
+    starts, ends, weights = array('l'), array('l'), array('d')
+    for start, end, weight in cut_edges + [edge for cell in cells for edge in cell.get_clique_edges()]:
+        starts.append(overlay_indices[start])
+        ends.append(overlay_indices[end])
+        weights.append(weight)
+
+    overlay_graph = CompactDirectedGraph.from_indexed_edges(range(len(boundary_stops)), starts, ends, weights)
+    overlay = Overlay(stop_cells, boundary_stops, (overlay_graph.offsets, overlay_graph.targets, overlay_graph.weights))
+
+    return Partition(overlay, cells)
+
+
+def _bisect_stops(latitudes, longitudes, stop_indices, max_cell_size):
+    """ :return: Stops indices of each cell, sorted, neighboring cells being next to each other """
+    cells_stops = []
+    parts = [list(stop_indices)] if stop_indices else []
+
+    while parts:
+        stops = parts.pop()
+        if len(stops) <= max_cell_size:
+            cells_stops.append(array('q', sorted(stops)))
+            continue
+
+        part_latitudes = [latitudes[stop_index] for stop_index in stops]
+        part_longitudes = [longitudes[stop_index] for stop_index in stops]
+        # Scaled like within TanNetwork.get_distance, whose formula only cares about the magnitude of the cosine
+        width = (max(part_longitudes) - min(part_longitudes)) * abs(math.cos(sum(part_latitudes) / len(stops)))
+        height = max(part_latitudes) - min(part_latitudes)
+
+        stops.sort(key=(latitudes if height >= width else longitudes).__getitem__)
+        middle = len(stops) // 2
+        parts.append(stops[middle:])
+        parts.append(stops[:middle])  # Popped first, so that the cells follow the bisection order
+
+    return cells_stops
+
+
+def _build_cell(graph, stop_cells, cell_index, stops, is_boundary):
+    local_indices = {stop_index: local_index for local_index, stop_index in enumerate(stops)}
+
+    offsets = array('q', [0])
+    targets, weights = array('q'), array('d')
+    for stop_index in stops:
+        for slot in range(graph.offsets[stop_index], graph.offsets[stop_index + 1]):
+            end = graph.targets[slot]
+            if stop_cells[end] == cell_index:
+                targets.append(local_indices[end])
+                weights.append(graph.weights[slot])
+        offsets.append(len(targets))
+
+    boundary_indices = array('q', (local_index for local_index, stop_index in enumerate(stops)
+                                   if is_boundary[stop_index]))
+    return Cell(stops, (offsets, targets, weights), boundary_indices)
+
+
+def save_partition(partition, directory):
+    """
+    Save a partition into a directory: the overlay into one file, and each cell into its own file, so that the cells
+    can be loaded independently (see load_overlay and load_cell).
+    """
+    os.makedirs(directory, exist_ok=True)
+    _save_sections(partition.overlay.sections, _OVERLAY_SECTIONS_TYPECODES, os.path.join(directory, OVERLAY_FILE_NAME))
+    for cell_index, cell in enumerate(partition.cells):
+        _save_sections(cell.sections, _CELL_SECTIONS_TYPECODES,
+                       os.path.join(directory, CELL_FILE_NAME.format(cell_index)))
+
+
+def load_overlay(directory):
+    """ :rtype: Overlay """
+    stop_cells, boundary_stops, *rows = _load_sections(_OVERLAY_SECTIONS_TYPECODES,
+                                                       os.path.join(directory, OVERLAY_FILE_NAME))
+    return Overlay(stop_cells, boundary_stops, tuple(rows))
+
+
+def load_cell(directory, cell_index):
+    """ :rtype: Cell """
+    stops, *rows, boundary_indices = _load_sections(_CELL_SECTIONS_TYPECODES,
+                                                    os.path.join(directory, CELL_FILE_NAME.format(cell_index)))
+    return Cell(stops, tuple(rows), boundary_indices)
+
+
+def load_partition(directory):
+    """ :rtype: Partition """
+    overlay = load_overlay(directory)
+    return Partition(overlay, [load_cell(directory, cell_index) for cell_index in range(overlay.cells_count)])
+
+
+def _save_sections(sections, typecodes, file_path):
+    with open(file_path, "wb") as file_stream:
+        file_stream.write(_HEADER.pack(PARTITION_MAGIC, PARTITION_VERSION))
+        for section, typecode in zip(sections, typecodes):
+            file_stream.write(_SECTION_LENGTH.pack(len(section)))
+            array(typecode, section).tofile(file_stream)
+
+
+def _load_sections(typecodes, file_path):
+    with open(file_path, "rb") as file_stream:
+        magic, version = _HEADER.unpack(file_stream.read(_HEADER.size))
+        if magic != PARTITION_MAGIC:
+            raise ValueError("{} is not a partition file".format(file_path))
+        if version != PARTITION_VERSION:
+            raise ValueError("Unsupported partition version {} (expected {})".format(version, PARTITION_VERSION))
+
+        sections = []
+        for typecode in typecodes:
+            section = array(typecode)
+            section.fromfile(file_stream, _SECTION_LENGTH.unpack(file_stream.read(_SECTION_LENGTH.size))[0])
+            sections.append(section)
+
+    return sections
@@ -0,0 +1,172 @@
+""" Implements the renumbering of the stops of networks, so that stops close to each other get close indices. """
+
+from array import array
+from collections import deque
+
+from src.graph import CompactDirectedGraph
+from src.tan_network import TanNetwork
+
+
+_CURVE_BITS = 16  # Resolution of the grid the coordinates are snapped to, along each axis, for space-filling curves
+
+
+def get_hilbert_order(tan_network):
+    """
+    :return:    Stops indices sorted along a Hilbert curve over the stops coordinates; the indices of removed stops
+                come last. Unlike along a Morton curve, consecutive cells of the grid the curve runs over are always
+                adjacent.
+    :rtype:     array of integers
+    """
+    return _get_curve_order(tan_network, _get_hilbert_distance)
+
+
+def get_morton_order(tan_network):
+    """
+    :return:    Stops indices sorted along a Morton (Z-order) curve over the stops coordinates; the indices of removed
+                stops come last. Cheaper to compute than the Hilbert order, but with jumps between the quadrants.
+    :rtype:     array of integers
+    """
+    return _get_curve_order(tan_network, _get_morton_distance)
+
+
+def get_breadth_first_order(tan_network):
+    """
+    :return:    Stops indices in the order a breadth-first traversal of the routes, followed both ways, reaches them;
+                each part of the network unreachable from the previous ones is traversed from its first stop in
+                the current order. The indices of removed stops come last.
+    :rtype:     array of integers
+    """
+    graph = tan_network.compact_graph
+    if graph is None:
+        raise ValueError("Reordering requires a TanNetwork relying on a compact graph")
+
+    offsets, targets = graph.offsets, graph.targets
+    reverse_offsets, sources, _ = graph.reverse_rows
+
+    order = array('q')
+    is_reached = bytearray(tan_network.stops_count)
+    for root_index in sorted(tan_network.stop_indices.values()):
+        if is_reached[root_index]:
+            continue
+
+        is_reached[root_index] = 1
+        queue = deque([root_index])
+        while queue:
+            current = queue.popleft()
+            order.append(current)
+            for neighbors in (targets[offsets[current]:offsets[current + 1]],
+                              sources[reverse_offsets[current]:reverse_offsets[current + 1]]):
+                for neighbor in neighbors:
+                    if not is_reached[neighbor]:
+                        is_reached[neighbor] = 1
+                        queue.append(neighbor)
+
+    order.extend(index for index in range(tan_network.stops_count) if not is_reached[index])
+    return order
+
+
+def reorder_network(tan_network, order):
+    """
+    Build a copy of a network whose stops are renumbered in the given order: its stops, coordinates table and compact
+    graph rows are all laid out in that order, so that searches expanding stops close to each other read memory close
+    to each other.
+    The stops objects are shared with the given network; their ids, hence the stop descriptions of the queries, and
+    their names, hence the formatted outputs, are unchanged. The path cache, landmarks, contraction hierarchy, spatial
+    index and timetable of the given network are not carried over, as they rely on the former indices.
+
+    :parameter  tan_network:    Network to renumber; it must rely on a compact graph
+    :type       tan_network:    TanNetwork
+
+    :parameter  order:          Former index of each stop, by new index (see get_hilbert_order, get_morton_order and
+                                get_breadth_first_order)
+    :type       order:          Sequence of integers, permutation of the stops indices
+
+    :return:    Renumbered network, and the former index of each stop by new index, mapping the indices of the new
+                network back to the ones of the given network
+    :rtype:     Tuple (TanNetwork, array of integers)
+    """
+    graph = tan_network.compact_graph
+    if graph is None:
+        raise ValueError("Reordering requires a TanNetwork relying on a compact graph")
+
+    stops_count = tan_network.stops_count
+    if len(order) != stops_count or set(order) != set(range(stops_count)):
+        raise ValueError("The order must be a permutation of the {} stops indices".format(stops_count))
+
+    original_indices = array('q', order)
+    new_indices = array('q', [0]) * stops_count
+    for new_index, original_index in enumerate(original_indices):
+        new_indices[original_index] = new_index
+
+    stops = [tan_network.get_stop_from_index(original_index) for original_index in original_indices]
+    stop_index_map = {stop_id: new_indices[original_index]
+                      for stop_id, original_index in tan_network.stop_indices.items()}
+    latitudes, longitudes = tan_network.coordinates_table
+
+    starts, ends, weights = array('l'), array('l'), array('d')
+    for new_index, original_index in enumerate(original_indices):
+        first_slot, end_slot = graph.offsets[original_index], graph.offsets[original_index + 1]
+        starts.extend(array('l', [new_index]) * (end_slot - first_slot))
+        ends.extend(map(new_indices.__getitem__, graph.targets[first_slot:end_slot]))
+        weights.extend(graph.weights[first_slot:end_slot])
+
+    reordered_network = TanNetwork.from_tables(stops, stop_index_map,
+                                               array('d', map(latitudes.__getitem__, original_indices)),
+                                               array('d', map(longitudes.__getitem__, original_indices)),
+                                               CompactDirectedGraph.from_indexed_edges(stops, starts, ends, weights))
+    return reordered_network, original_indices
+
+
+def _get_curve_order(tan_network, get_curve_distance):
+    """ :return: Stops indices sorted by their distance along a curve, over a grid spanning their bounding box """
+    latitudes, longitudes = tan_network.coordinates_table
+    stop_indices = sorted(tan_network.stop_indices.values())
+    removed_indices = sorted(set(range(tan_network.stops_count)).difference(stop_indices))
+    if not stop_indices:
+        return array('q', removed_indices)
+
+    min_latitude = min(latitudes[index] for index in stop_indices)
+    min_longitude = min(longitudes[index] for index in stop_indices)
+    max_coordinate = (1 << _CURVE_BITS) - 1
+    latitude_scale = max_coordinate / ((max(latitudes[index] for index in stop_indices) - min_latitude) or 1.0)
+    longitude_scale = max_coordinate / ((max(longitudes[index] for index in stop_indices) - min_longitude) or 1.0)
+
+    curve_distances = {index: get_curve_distance(int((longitudes[index] - min_longitude) * longitude_scale),
+                                                 int((latitudes[index] - min_latitude) * latitude_scale))
+                       for index in stop_indices}
+    stop_indices.sort(key=curve_distances.__getitem__)
+
+    return array('q', stop_indices + removed_indices)
+
+
+def _get_hilbert_distance(x, y):
+    """ :return: Position of the given grid cell along the Hilbert curve covering the grid """
+    distance = 0
+    side = 1 << (_CURVE_BITS - 1)
+    while side:
+        x_bit = 1 if x & side else 0
+        y_bit = 1 if y & side else 0
+        distance += side * side * ((3 * x_bit) ^ y_bit)
+
+        # Rotate the quadrant, so that the curve within it has the same orientation as the whole curve
+        x, y = x & (side - 1), y & (side - 1)
+        if y_bit == 0:
+            if x_bit == 1:
+                x, y = side - 1 - x, side - 1 - y
+            x, y = y, x
+        side >>= 1
+
+    return distance
+
+
+def _get_morton_distance(x, y):
+    """ :return: Position of the given grid cell along the Morton curve covering the grid, interleaving their bits """
+    return _spread_bits(x) | (_spread_bits(y) << 1)
+
+
+def _spread_bits(value):
+    """ :return: Given 16 bits value, with a zero bit inserted before each of its bits """
+    value = (value | (value << 8)) & 0x00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F
+    value = (value | (value << 2)) & 0x33333333
+    return (value | (value << 1)) & 0x55555555
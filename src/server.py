@@ -0,0 +1,194 @@
+""" Implements a query server, answering shortest path queries over sockets on a network loaded once. """
+
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from src.snapshot import load_snapshot
+from src.tan_network import TanStop
+
+
+class QueryServer:
+    """
+    Answers shortest path queries on a TanNetwork over stream sockets (TCP or Unix), the network being loaded once.
+
+    Each connection carries line-delimited JSON. Every request line {"id": ..., "start": ..., "goal": ...}, the start
+    and goal being stops descriptions as given by the puzzle's input (such as "StopArea:ABDU"), is answered by a line
+    {"id": ..., "path": [names of the path's stops]}, the path being empty if there is no valid path, or by a line
+    {"id": ..., "error": message}. Responses are written as soon as they are ready, hence possibly out of order; their
+    id tells them apart.
+
+    Identical queries in flight at the same time, on any connection, share a single search.
+    The searches are CPU-bound, so they are run by an executor rather than by the event loop, and at most as many at a
+    time as the executor has workers, so that its queue never grows. The searches of a TanNetwork reuse the same search
+    data, hence a single thread by default; use from_snapshot for several worker processes.
+    Each connection has at most max_pending_queries queries in flight: beyond that, it is not read any further until
+    some are answered, and the client is slowed down by the filling socket buffers. Writing the responses also waits for
+    the client to read them.
+    """
+
+    def __init__(self, tan_network, max_pending_queries=64):
+        """
+        :parameter  tan_network:    Network to answer queries on
+        :type       tan_network:    TanNetwork
+
+        :parameter  max_pending_queries:    Maximum number of queries in flight on each connection
+        :type       max_pending_queries:    Integer
+        """
+        self._initialize(ThreadPoolExecutor(max_workers=1), partial(_search, tan_network), 1, max_pending_queries)
+
+    @classmethod
+    def from_snapshot(cls, snapshot_path, workers_count=1, max_pending_queries=64):
+        """
+        Build a server whose searches are run by several worker processes, each one memory mapping the same snapshot;
+        the snapshot is only loaded by the workers.
+
+        :parameter  snapshot_path:  Path of a snapshot file, see snapshot.save_snapshot
+        :type       snapshot_path:  String
+
+        :parameter  workers_count:  Number of worker processes
+        :type       workers_count:  Integer
+        """
+        server = cls.__new__(cls)
+        server._initialize(ProcessPoolExecutor(workers_count, initializer=_initialize_worker,
+                                               initargs=(snapshot_path,)),
+                           _search_in_worker, workers_count, max_pending_queries)
+        return server
+
+    def _initialize(self, executor, search, workers_count, max_pending_queries):
+        """
+        :parameter  executor:       Executor running the searches
+        :parameter  search:         Function computing the path names between two stops ids, run by the executor
+        :parameter  workers_count:  Number of searches the executor runs at a time
+        """
+        self._max_pending_queries = max_pending_queries
+        self._executor = executor
+        self._search = search
+        self._search_slots = asyncio.Semaphore(workers_count)
+        self._in_flight_searches = {}  # Future of each search in flight, by (start stop id, goal stop id)
+        self._server = None
+
+        self.queries_count = 0
+        self.searches_count = 0
+
+    async def start_tcp(self, host="127.0.0.1", port=0):
+        """
+        Start accepting connections on a TCP socket; port 0 picks any free port.
+
+        :return:    Server accepting the connections, giving the actual address through its sockets
+        :rtype:     asyncio.Server
+        """
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    async def start_unix(self, path):
+        """
+        Start accepting connections on a Unix socket.
+
+        :rtype:     asyncio.Server
+        """
+        self._server = await asyncio.start_unix_server(self._handle_connection, path)
+        return self._server
+
+    async def close(self):
+        """ Stop accepting connections, and stop the executor's workers. """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        # Waiting for the workers blocks, hence is left to another thread rather than to the event loop
+        await asyncio.get_running_loop().run_in_executor(None, partial(self._executor.shutdown, cancel_futures=True))
+
+    async def get_path_names(self, start_stop_description, goal_stop_description):
+        """
+        :return:    Names of the stops of the shortest path between the given stops; empty list if there is no path
+        :rtype:     List of strings
+
+        :raises     ValueError: If a stop description is invalid
+        :raises     KeyError:   If a stop is not part of the network
+        """
+        key = (TanStop.extract_field_value('id', start_stop_description),
+               TanStop.extract_field_value('id', goal_stop_description))
+        self.queries_count += 1
+
+        future = self._in_flight_searches.get(key)
+        if future is None:
+            future = self._in_flight_searches[key] = asyncio.ensure_future(self._run_search(*key))
+            future.add_done_callback(lambda _: self._in_flight_searches.pop(key))
+
+        # Shielded, so that a query being cancelled does not cancel the search shared with other queries
+        return await asyncio.shield(future)
+
+    async def _run_search(self, start_id, goal_id):
+        async with self._search_slots:
+            self.searches_count += 1
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._search, start_id, goal_id)
+
+    async def _handle_connection(self, reader, writer):
+        pending_slots = asyncio.Semaphore(self._max_pending_queries)
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        try:
+            while True:
+                await pending_slots.acquire()
+                line = await reader.readline()
+                if not line:
+                    break
+
+                task = asyncio.create_task(self._answer(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: pending_slots.release())
+
+            await asyncio.gather(*tasks)
+        except (ConnectionError, ValueError):  # The latter if a line exceeds the stream reader's limit
+            for task in tasks:
+                task.cancel()
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _answer(self, line, writer, write_lock):
+        query_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Queries must be JSON objects")
+
+            query_id = request.get("id")
+            start, goal = request.get("start"), request.get("goal")
+            if not isinstance(start, str) or not isinstance(goal, str):
+                raise ValueError("Queries require start and goal stops descriptions")
+
+            response = {"id": query_id, "path": await self.get_path_names(start, goal)}
+        except KeyError as error:
+            response = {"id": query_id, "error": "Unknown stop id: {}".format(error)}
+        except ValueError as error:
+            response = {"id": query_id, "error": str(error)}
+        except Exception as error:  # Such as a BrokenProcessPool, if a worker process died; the connection goes on
+            response = {"id": query_id, "error": "Search failed: {}".format(str(error) or type(error).__name__)}
+
+        async with write_lock:
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+
+
+def _search(tan_network, start_id, goal_id):
+    return [stop.name for stop in tan_network.get_shortest_path_between_ids(start_id, goal_id)]
+
+
+# State of a worker process, set once by _initialize_worker
+_worker_tan_network = None
+
+
+def _initialize_worker(snapshot_path):
+    global _worker_tan_network
+    _worker_tan_network = load_snapshot(snapshot_path)
+
+
+def _search_in_worker(start_id, goal_id):
+    return _search(_worker_tan_network, start_id, goal_id)
@@ -0,0 +1,196 @@
+""" Implements the persistence of built TanNetwork instances, as binary snapshots loaded through memory mapping. """
+
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+
+from src.graph import CompactDirectedGraph
+from src.tan_network import TanNetwork, TanStop
+
+
+SNAPSHOT_MAGIC = b"TANSNAP\0"
+SNAPSHOT_VERSION = 2
+
+_BYTE_ORDER_MARK = 0x01020304
+_HEADER = struct.Struct("=8sIIIQ")  # Magic, version, byte order mark, sections count, network version
+_SECTION_ENTRY = struct.Struct("=QQ")  # Position in the file, bytes count
+
+# Sections of a snapshot, in their order within the file, along with the typecode of their items
+_SECTIONS = [("id_offsets", 'q'),
+             ("id_bytes", 'B'),
+             ("id_order", 'q'),  # Indices of the stops still part of the network, sorted by stop id
+             ("name_offsets", 'q'),
+             ("name_bytes", 'B'),
+             ("latitudes", 'd'),
+             ("longitudes", 'd'),
+             ("offsets", 'q'),
+             ("targets", 'q'),
+             ("weights", 'd')]
+
+
+def save_snapshot(tan_network, file_path):
+    """
+    Save a network into a binary snapshot file, holding its stops, its coordinates table and its compact graph.
+    The version of the network is saved along, so that the snapshots outdated by later changes of the network can be
+    told apart (see get_snapshot_network_version).
+
+    :parameter  tan_network:    Network to save; it must rely on a compact graph
+    :type       tan_network:    TanNetwork
+    """
+    if tan_network.compact_graph is None:
+        raise ValueError("Snapshots require a TanNetwork relying on a compact graph")
+
+    stops = [tan_network.get_stop_from_index(index) for index in range(tan_network.stops_count)]
+    id_offsets, id_bytes = _encode_strings(stop.id for stop in stops)
+    name_offsets, name_bytes = _encode_strings(stop.name for stop in stops)
+    id_order = array('q', sorted(tan_network.stop_indices.values(), key=lambda index: stops[index].id))
+    latitudes, longitudes = tan_network.coordinates_table
+    graph = tan_network.compact_graph
+
+    sections = [id_offsets, id_bytes, id_order, name_offsets, name_bytes,
+                array('d', latitudes), array('d', longitudes),
+                array('q', graph.offsets), array('q', graph.targets), array('d', graph.weights)]
+
+    position = _HEADER.size + len(sections) * _SECTION_ENTRY.size
+    section_entries = []
+    for section in sections:
+        position = _align(position)
+        bytes_count = len(section) * section.itemsize
+        section_entries.append((position, bytes_count))
+        position += bytes_count
+
+    with open(file_path, "wb") as file_stream:
+        file_stream.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, _BYTE_ORDER_MARK, len(sections),
+                                       tan_network.version))
+        for section_entry in section_entries:
+            file_stream.write(_SECTION_ENTRY.pack(*section_entry))
+
+        for section, (section_position, _) in zip(sections, section_entries):
+            file_stream.write(bytes(section_position - file_stream.tell()))
+            file_stream.write(section.tobytes())
+
+
+def load_snapshot(file_path):
+    """
+    Load a network from a binary snapshot file.
+    The file is memory mapped and read in place: nothing is parsed, and stops objects are only built when accessed.
+
+    :return:    Network relying on a compact graph
+    :rtype:     TanNetwork
+    """
+    with open(file_path, "rb") as file_stream:
+        file_map = mmap.mmap(file_stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+    buffer = memoryview(file_map)
+    network_version = _read_header(buffer, file_path)
+
+    sections = {}
+    for section_index, (section_name, typecode) in enumerate(_SECTIONS):
+        position, bytes_count = _SECTION_ENTRY.unpack_from(buffer, _HEADER.size + section_index * _SECTION_ENTRY.size)
+        sections[section_name] = buffer[position:position + bytes_count].cast(typecode)
+
+    stop_ids = _StringTable(sections["id_offsets"], sections["id_bytes"])
+    stop_names = _StringTable(sections["name_offsets"], sections["name_bytes"])
+    latitudes, longitudes = sections["latitudes"], sections["longitudes"]
+
+    tan_network = TanNetwork.from_tables(_SnapshotStops(stop_ids, stop_names, latitudes, longitudes),
+                                         _SnapshotStopIndexMap(stop_ids, sections["id_order"]),
+                                         latitudes, longitudes,
+                                         CompactDirectedGraph.from_rows(sections["offsets"], sections["targets"],
+                                                                        sections["weights"]))
+    tan_network.version = network_version
+    return tan_network
+
+
+def get_snapshot_network_version(file_path):
+    """
+    :return:    Version of the network when the snapshot was saved; the snapshot is outdated if the network has been
+                changed since, i.e. if its current version is greater
+    :rtype:     Integer
+    """
+    with open(file_path, "rb") as file_stream:
+        return _read_header(file_stream.read(_HEADER.size), file_path)
+
+
+def _read_header(buffer, file_path):
+    """ :return: Version of the network saved in the snapshot, once its header is checked """
+    if len(buffer) < _HEADER.size:
+        raise ValueError("{} is not a TanNetwork snapshot".format(file_path))
+
+    magic, version, byte_order_mark, sections_count, network_version = _HEADER.unpack_from(buffer)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("{} is not a TanNetwork snapshot".format(file_path))
+    if version != SNAPSHOT_VERSION:
+        raise ValueError("Unsupported snapshot version {} (expected {})".format(version, SNAPSHOT_VERSION))
+    if byte_order_mark != _BYTE_ORDER_MARK or sections_count != len(_SECTIONS):
+        raise ValueError("{} was saved on an incompatible platform".format(file_path))
+
+    return network_version
+
+
+def _encode_strings(strings):
+    offsets = array('q', [0])
+    encoded_strings = bytearray()
+    for string in strings:
+        encoded_strings += string.encode("utf-8")
+        offsets.append(len(encoded_strings))
+
+    return offsets, array('B', encoded_strings)
+
+
+def _align(position, alignment=8):
+    return (position + alignment - 1) // alignment * alignment
+
+
+class _StringTable(Sequence):
+    """ Read-only sequence of strings, decoded on access from a table of offsets and a buffer of UTF-8 bytes. """
+
+    def __init__(self, offsets, encoded_strings):
+        self._offsets = offsets
+        self._encoded_strings = encoded_strings
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        return bytes(self._encoded_strings[self._offsets[index]:self._offsets[index + 1]]).decode("utf-8")
+
+
+class _SnapshotStops(Sequence):
+    """ Read-only sequence of the stops of a snapshot, each TanStop being built on access. """
+
+    def __init__(self, stop_ids, stop_names, latitudes, longitudes):
+        self._stop_ids = stop_ids
+        self._stop_names = stop_names
+        self._latitudes = latitudes
+        self._longitudes = longitudes
+
+    def __len__(self):
+        return len(self._stop_ids)
+
+    def __getitem__(self, index):
+        return TanStop.from_fields(self._stop_ids[index], self._stop_names[index],
+                                   self._latitudes[index], self._longitudes[index])
+
+
+class _SnapshotStopIndexMap(Mapping):
+    """ Read-only mapping of the stops ids to their indices, looked up by bisection within the sorted ids. """
+
+    def __init__(self, stop_ids, id_order):
+        self._stop_ids = stop_ids
+        self._id_order = id_order
+
+    def __len__(self):
+        return len(self._id_order)
+
+    def __iter__(self):
+        return (self._stop_ids[index] for index in self._id_order)
+
+    def __getitem__(self, stop_id):
+        position = bisect_left(self._id_order, stop_id, key=self._stop_ids.__getitem__)
+        if position < len(self._id_order) and self._stop_ids[self._id_order[position]] == stop_id:
+            return self._id_order[position]
+
+        raise KeyError(stop_id)
@@ -0,0 +1,222 @@
+""" Implements a spatial index over the stops coordinates, for nearest stops and bounding box lookups. """
+
+import math
+from array import array
+from heapq import heappush, heappushpop
+
+from src.tan_network import EARTH_RADIUS_KM
+
+
+class SpatialIndex:
+    """
+    Uniform grid over the coordinates of the stops, each cell listing the indices of the stops it contains.
+
+    The distances are the ones of the puzzle's formula (see TanNetwork.get_distance). The nearest stops are searched
+    ring of cells by ring of cells around the given point, until the stops found are closer than any stop outside the
+    scanned block of cells could be.
+
+    Stops added outside of the grid's bounds after it was built are kept apart, and examined by every query.
+    """
+
+    def __init__(self, latitudes, longitudes, stop_indices, stops_per_cell=2):
+        """
+        :parameter  latitudes, longitudes:  Coordinates table of the stops
+        :type       latitudes, longitudes:  Sequences of floats, indexed like the stops
+
+        :parameter  stop_indices:   Indices of the stops to index
+        :type       stop_indices:   Iterable of integers
+
+        :parameter  stops_per_cell: Average number of stops per cell the grid is sized for
+        :type       stops_per_cell: Integer
+        """
+        self._latitudes = array('d', latitudes)
+        self._longitudes = array('d', longitudes)
+        stop_indices = list(stop_indices)
+
+        if stop_indices:
+            self._min_latitude = min(self._latitudes[index] for index in stop_indices)
+            self._max_latitude = max(self._latitudes[index] for index in stop_indices)
+            self._min_longitude = min(self._longitudes[index] for index in stop_indices)
+            self._max_longitude = max(self._longitudes[index] for index in stop_indices)
+        else:
+            self._min_latitude = self._max_latitude = self._min_longitude = self._max_longitude = 0.0
+
+        # Cells as square as possible with regard to distances, the longitudes being scaled by the latitude's cosine
+        latitude_span = self._max_latitude - self._min_latitude
+        longitude_span = (self._max_longitude - self._min_longitude) * \
+            abs(math.cos((self._min_latitude + self._max_latitude) / 2))
+        cells_count = max(1, len(stop_indices) // stops_per_cell)
+        if latitude_span and longitude_span:
+            cell_span = math.sqrt(latitude_span * longitude_span / cells_count)
+        else:  # All the stops are aligned, along a parallel or a meridian
+            cell_span = max(latitude_span, longitude_span) / cells_count
+
+        self._rows_count = max(1, min(cells_count, math.ceil(latitude_span / cell_span) if cell_span else 1))
+        self._columns_count = max(1, min(cells_count, math.ceil(longitude_span / cell_span) if cell_span else 1))
+        self._cell_height = latitude_span / self._rows_count or 1.0
+        self._cell_width = (self._max_longitude - self._min_longitude) / self._columns_count or 1.0
+
+        self._cells = {}  # Indices of the stops within each cell, by (row, column)
+        self._outliers = set()  # Indices of the stops added outside of the grid's bounds
+        self._extreme_latitudes = (self._min_latitude, self._max_latitude)  # Including the outliers
+
+        for index in stop_indices:
+            self._cells.setdefault(self._get_cell(self._latitudes[index], self._longitudes[index]), []).append(index)
+
+    def __len__(self):
+        return sum(len(cell) for cell in self._cells.values()) + len(self._outliers)
+
+    def add(self, stop_index, latitude, longitude):
+        """ Index a stop, typically one just added to the network. """
+        while len(self._latitudes) <= stop_index:
+            self._latitudes.append(math.nan)
+            self._longitudes.append(math.nan)
+        self._latitudes[stop_index], self._longitudes[stop_index] = latitude, longitude
+
+        if self._min_latitude <= latitude <= self._max_latitude and \
+                self._min_longitude <= longitude <= self._max_longitude:
+            self._cells.setdefault(self._get_cell(latitude, longitude), []).append(stop_index)
+        else:
+            self._outliers.add(stop_index)
+            self._extreme_latitudes = (min(self._extreme_latitudes[0], latitude),
+                                       max(self._extreme_latitudes[1], latitude))
+
+    def remove(self, stop_index):
+        """
+        Stop indexing a stop, typically one just removed from the network.
+
+        :raises     KeyError:   If the stop is not indexed
+        """
+        if stop_index in self._outliers:
+            self._outliers.remove(stop_index)
+            return
+
+        cell = self._get_cell(self._latitudes[stop_index], self._longitudes[stop_index])
+        try:
+            self._cells[cell].remove(stop_index)
+        except (KeyError, ValueError):
+            raise KeyError(stop_index) from None
+
+    def get_nearest_stop_indices(self, latitude, longitude, count=1):
+        """
+        :parameter  latitude, longitude:    Coordinates of the point to search around, in the unit of the stops ones
+        :type       latitude, longitude:    Floats
+
+        :parameter  count:  Number of stops to find
+        :type       count:  Integer
+
+        :return:    Indices of the given number of stops closest to the given point (fewer if fewer are indexed),
+                    from the closest one, along with their distances to the point
+        :rtype:     List of (Integer, Float)
+        """
+        # Heap of (-distance, -stop index), the farthest of the nearest stops first (the highest index, among equally
+        # distant ones)
+        nearest = []
+
+        def examine(stop_indices):
+            for index in stop_indices:
+                entry = (-self._get_distance(latitude, longitude, index), -index)
+                if len(nearest) < count:
+                    heappush(nearest, entry)
+                elif entry > nearest[0]:
+                    heappushpop(nearest, entry)
+
+        if count > 0:
+            examine(self._outliers)
+            row, column = self._get_cell(latitude, longitude)
+            cosine_bound = self._get_cosine_bound(latitude)
+
+            for radius in range(max(self._rows_count, self._columns_count)):
+                examine(stop_index for cell in self._get_ring(row, column, radius)
+                        for stop_index in self._cells.get(cell, ()))
+
+                if len(nearest) == count and \
+                        -nearest[0][0] <= self._get_distance_bound(latitude, longitude, row, column, radius,
+                                                                   cosine_bound):
+                    break
+
+        return [(-negative_index, -negative_distance)
+                for negative_distance, negative_index in sorted(nearest, reverse=True)]
+
+    def get_stop_indices_within(self, min_latitude, min_longitude, max_latitude, max_longitude):
+        """ :return: Indices of the stops within the given bounding box, bounds included, by increasing index """
+        min_row, min_column = self._get_cell(min_latitude, min_longitude)
+        max_row, max_column = self._get_cell(max_latitude, max_longitude)
+
+        candidates = list(self._outliers)
+        for row in range(min_row, max_row + 1):
+            for column in range(min_column, max_column + 1):
+                candidates.extend(self._cells.get((row, column), ()))
+
+        return sorted(index for index in candidates
+                      if min_latitude <= self._latitudes[index] <= max_latitude and
+                      min_longitude <= self._longitudes[index] <= max_longitude)
+
+    def _get_cell(self, latitude, longitude):
+        """ :return: Row and column of the cell containing the given point, or of the closest cell to it """
+        row = int((latitude - self._min_latitude) // self._cell_height)
+        column = int((longitude - self._min_longitude) // self._cell_width)
+        return min(max(row, 0), self._rows_count - 1), min(max(column, 0), self._columns_count - 1)
+
+    def _get_ring(self, row, column, radius):
+        """ :return: Cells of the grid at the given Chebyshev distance from the given cell """
+        if radius == 0:
+            return [(row, column)]
+
+        rows = range(max(row - radius, 0), min(row + radius, self._rows_count - 1) + 1)
+        columns = range(max(column - radius, 0), min(column + radius, self._columns_count - 1) + 1)
+        ring = []
+        for ring_row in (row - radius, row + radius):
+            if 0 <= ring_row < self._rows_count:
+                ring.extend((ring_row, ring_column) for ring_column in columns)
+        for ring_column in (column - radius, column + radius):
+            if 0 <= ring_column < self._columns_count:
+                ring.extend((ring_row, ring_column) for ring_row in rows if abs(ring_row - row) != radius)
+
+        return ring
+
+    def _get_distance_bound(self, latitude, longitude, row, column, radius, cosine_bound):
+        """
+        :return:    Lower bound of the distance between the given point and the stops of the grid outside of the block
+                    of cells within the given radius of the given cell
+        """
+        # Stops outside of the block are beyond one of its sides; the sides along the grid's border have none beyond
+        latitude_gap = min(latitude - (self._min_latitude + (row - radius) * self._cell_height)
+                           if row - radius > 0 else math.inf,
+                           self._min_latitude + (row + radius + 1) * self._cell_height - latitude
+                           if row + radius < self._rows_count - 1 else math.inf)
+        longitude_gap = min(longitude - (self._min_longitude + (column - radius) * self._cell_width)
+                            if column - radius > 0 else math.inf,
+                            self._min_longitude + (column + radius + 1) * self._cell_width - longitude
+                            if column + radius < self._columns_count - 1 else math.inf)
+
+        return EARTH_RADIUS_KM * min(max(latitude_gap, 0.0), max(longitude_gap, 0.0) * cosine_bound)
+
+    def _get_cosine_bound(self, latitude):
+        """
+        :return:    Lower bound of the absolute cosine of the mean of the given latitude and of any stop's latitude,
+                    which scales the longitudes differences within the puzzle's formula
+        """
+        lowest, highest = sorted(((latitude + extreme_latitude) / 2) for extreme_latitude in self._extreme_latitudes)
+        # |cos| reaches 0 at every odd multiple of pi/2, and is otherwise the smallest at the interval's bounds
+        if math.floor(lowest / math.pi - 0.5) != math.floor(highest / math.pi - 0.5):
+            return 0.0
+
+        return min(abs(math.cos(lowest)), abs(math.cos(highest)))
+
+    def _get_distance(self, latitude, longitude, stop_index):
+        stop_latitude = self._latitudes[stop_index]
+        x = (self._longitudes[stop_index] - longitude) * math.cos((latitude + stop_latitude) / 2)
+        y = stop_latitude - latitude
+        return math.sqrt(x*x + y*y) * EARTH_RADIUS_KM
+
+
+def build_spatial_index(tan_network, stops_per_cell=2):
+    """
+    :parameter  tan_network:    Network whose stops to index
+    :type       tan_network:    TanNetwork
+
+    :rtype:     SpatialIndex
+    """
+    latitudes, longitudes = tan_network.coordinates_table
+    return SpatialIndex(latitudes, longitudes, tan_network.stop_indices.values(), stops_per_cell)
@@ -1,35 +1,271 @@
 """ Implements the logic related to the puzzle's context. """
 
 import math
-import re
+from array import array
 
-from src.graph import DirectedEdge, DirectedGraph
+from src.graph import CompactDirectedGraph, DirectedEdge, DirectedGraph, ShortestPathCache
 
 
 EARTH_RADIUS_KM = 6371
+STOP_ID_PREFIX = 'StopArea:'
 
 
 class TanNetwork(DirectedGraph):
     """
     Represents the transportation network described in the puzzle.
     Since this network routes are stated to be directed, it is represented as a directed graph.
+
+    The shortest path searches can optionally be delegated to a CompactDirectedGraph, which uses far less memory and
+    runs faster on large networks; the DirectedGraph representation is then left empty.
     """
 
-    def __init__(self, stops_descriptions, routes_descriptions):
+    def __init__(self, stops_descriptions, routes_descriptions, compact=False):
         """
+        Both descriptions are consumed only once, stops first, so they can be iterators streaming the puzzle's input
+        (see main.read_puzzle_input) rather than lists held in memory.
+
         :parameter  stops_descriptions:   Descriptions of the stops as given by the puzzle's input
-        :type       stops_descriptions:   List of strings
+        :type       stops_descriptions:   Iterable of strings
 
         :parameter  routes_descriptions:   Descriptions of the routes as given by the puzzle's input
-        :type       routes_descriptions:   List of strings
+        :type       routes_descriptions:   Iterable of strings
+
+        :parameter  compact:    Whether to rely on a CompactDirectedGraph rather than on the DirectedGraph
+                                representation
+        :type       compact:    Boolean
+        """
+        self._path_cache = None
+        self._landmarks = None
+        self._contraction_hierarchy = None
+        self._spatial_index = None
+        self._timetable = None
+        self._stops = [TanStop(string) for string in stops_descriptions]
+        self._stop_index_map = {stop.id: index for index, stop in enumerate(self._stops)}
+
+        # Coordinates table, indexed like the stops
+        self._latitudes = array('d', (stop.latitude for stop in self._stops))
+        self._longitudes = array('d', (stop.longitude for stop in self._stops))
+
+        # The routes stops are looked up inline rather than through get_route_indices_from_string, so that no tuple
+        # is allocated per route
+        route_starts = array('l')
+        route_ends = array('l')
+        stop_index_map = self._stop_index_map
+        extract_id_value = TanStop._extract_id_value
+        for route_string in routes_descriptions:
+            route_stop_strings = route_string.split()
+            route_starts.append(stop_index_map[extract_id_value(route_stop_strings[0])])
+            route_ends.append(stop_index_map[extract_id_value(route_stop_strings[1])])
+
+        route_weights = self.get_distances(route_starts, route_ends)
+
+        if compact:
+            self._compact_graph = CompactDirectedGraph.from_indexed_edges(self._stops, route_starts, route_ends,
+                                                                         route_weights)
+            self._route_weights = None
+            super(TanNetwork, self).__init__([])
+        else:
+            self._compact_graph = None
+            self._route_weights = {}
+            super(TanNetwork, self).__init__([])
+            for start_index, end_index, weight in zip(route_starts, route_ends, route_weights):
+                start_stop, end_stop = self._stops[start_index], self._stops[end_index]
+                self._route_weights.setdefault(start_stop, {})[end_stop] = weight
+                self.add_edge_between(start_stop, end_stop)
+
+            # Stops without routes are registered too, so that every stop of the network is a vertex of the graph
+            for stop in self._stops:
+                if stop not in self.representation:
+                    self.add_vertex(stop)
+
+    @classmethod
+    def from_tables(cls, stops, stop_index_map, latitudes, longitudes, compact_graph):
+        """
+        Build a network relying on a compact graph, around already built tables rather than on the puzzle's input.
+
+        :parameter  stops:              Stops of the network, the position of each one being its index
+        :type       stops:              Sequence of TanStop
+
+        :parameter  stop_index_map:     Index of each stop, by stop id
+        :type       stop_index_map:     Mapping of strings to integers
+
+        :parameter  latitudes, longitudes:  Coordinates table of the stops
+        :type       latitudes, longitudes:  Sequences of floats, indexed like the stops
+
+        :parameter  compact_graph:      Graph of the routes, whose vertices indices are the stops indices
+        :type       compact_graph:      CompactDirectedGraph
+        """
+        tan_network = cls.__new__(cls)
+        tan_network._path_cache = None
+        tan_network._landmarks = None
+        tan_network._contraction_hierarchy = None
+        tan_network._spatial_index = None
+        tan_network._timetable = None
+        tan_network._stops = stops
+        tan_network._stop_index_map = stop_index_map
+        tan_network._latitudes = latitudes
+        tan_network._longitudes = longitudes
+        tan_network._compact_graph = compact_graph
+        tan_network._route_weights = None
+        super(TanNetwork, tan_network).__init__([])
+        return tan_network
+
+    def add_stop(self, stop_description):
+        """
+        Add a stop to the network, without any route.
+        The cached paths remain valid, and the landmarks are extended to the new stop; the contraction hierarchy and
+        the timetable, if any, are dropped.
+
+        :parameter  stop_description:   Description of the stop, as given by the puzzle's input
+        :type       stop_description:   String
+
+        :return:    The added stop
+        :rtype:     TanStop
+        """
+        stop = TanStop(stop_description)
+        if stop.id in self._stop_index_map:
+            raise ValueError("Stop {} is already part of the network".format(stop.id))
+
+        previous_version = self.version
+        self._make_tables_mutable()
+        self._stop_index_map[stop.id] = len(self._stops)
+        self._stops.append(stop)
+        self._latitudes.append(stop.latitude)
+        self._longitudes.append(stop.longitude)
+
+        if self._compact_graph is not None:
+            self._compact_graph.add_vertex(stop)
+            self.version += 1
+        else:
+            self.add_vertex(stop)
+
+        if self._landmarks is not None:
+            self._landmarks.add_vertex()
+        if self._spatial_index is not None:
+            self._spatial_index.add(self._stop_index_map[stop.id], stop.latitude, stop.longitude)
+        self._contraction_hierarchy = None
+        self._timetable = None
+        self._repair_path_cache(previous_version)
+
+        return stop
+
+    def remove_stop(self, stop_id):
+        """
+        Remove a stop from the network, along with all the routes going to or from it.
+        Only the cached paths involving the stop are dropped, and the landmarks remain valid; the contraction
+        hierarchy and the timetable, if any, are dropped.
+
+        The index of the stop within the coordinates table is not reused, so that the indices of the other stops, and
+        the data derived from them, remain valid.
+
+        :parameter  stop_id:    The unique identifier of the stop
+        :type       stop_id:    String
+
+        :raises     KeyError:   If the stop is not part of the network
+        """
+        stop_index = self._stop_index_map[stop_id]
+        previous_version = self.version
+
+        if self._compact_graph is not None:
+            graph = self._compact_graph
+            reverse_offsets, sources, _ = graph.reverse_rows
+            adjacent_indices = set(graph.targets[graph.offsets[stop_index]:graph.offsets[stop_index + 1]])
+            adjacent_indices.update(sources[reverse_offsets[stop_index]:reverse_offsets[stop_index + 1]])
+
+            for adjacent_index in adjacent_indices:
+                for start_index, end_index in ((stop_index, adjacent_index), (adjacent_index, stop_index)):
+                    if graph.has_index_edge(start_index, end_index):
+                        graph.remove_index_edge(start_index, end_index)
+
+            self.version += 1
+        else:
+            stop = self._stops[stop_index]
+            self._route_weights.pop(stop, None)
+            for predecessor in self.reverse_representation[stop]:
+                self._route_weights.get(predecessor, {}).pop(stop, None)
+
+            self.remove_vertex(stop)
+
+        self._make_tables_mutable()
+        del self._stop_index_map[stop_id]
+        if self._spatial_index is not None:
+            self._spatial_index.remove(stop_index)
+
+        # Removing routes cannot make any path shorter: the landmarks remain valid
+        self._contraction_hierarchy = None
+        self._timetable = None
+        self._repair_path_cache(previous_version, removed_stop_ids=[stop_id])
+
+    def add_route(self, route_description):
+        """
+        Add a route to the network, if it is not already part of it.
+        The cached paths are dropped, as the route may shorten any of them; only the landmarks whose costs are
+        shortened by the route are computed again, and the contraction hierarchy and the timetable, if any, are dropped.
+
+        :parameter  route_description:  Description of the route, as given by the puzzle's input
+        :type       route_description:  String
+        """
+        start_index, end_index = self.get_route_indices_from_string(route_description)
+        weight = self.get_distances([start_index], [end_index])[0]
+
+        if self._compact_graph is not None:
+            if self._compact_graph.has_index_edge(start_index, end_index):
+                return
+
+            self._compact_graph.add_index_edge(start_index, end_index, weight)
+            self.version += 1
+            if self._landmarks is not None:
+                self._landmarks.repair(self._compact_graph, added_edge=(start_index, end_index, weight))
+        else:
+            start_stop, end_stop = self._stops[start_index], self._stops[end_index]
+            if end_stop in self.representation.get(start_stop, ()):
+                return
+
+            self._route_weights.setdefault(start_stop, {})[end_stop] = weight
+            self.add_edge(DirectedEdge(start_stop, end_stop))
+
+        self._contraction_hierarchy = None
+        self._timetable = None
+
+    def remove_route(self, route_description):
         """
-        stops = [TanStop(string) for string in stops_descriptions]
-        self._stop_id_map = {stop.id: stop for stop in stops}
+        Remove a route from the network.
+        Only the cached paths going through the route are dropped, and the landmarks remain valid; the contraction
+        hierarchy and the timetable, if any, are dropped.
 
-        routes = [self.get_route_from_string(route_string)
-                  for route_string in routes_descriptions]
+        :parameter  route_description:  Description of the route, as given by the puzzle's input
+        :type       route_description:  String
 
-        super(TanNetwork, self).__init__(routes)
+        :raises     KeyError:   If the route is not part of the network
+        """
+        start_index, end_index = self.get_route_indices_from_string(route_description)
+        start_stop, end_stop = self._stops[start_index], self._stops[end_index]
+        previous_version = self.version
+
+        if self._compact_graph is not None:
+            self._compact_graph.remove_index_edge(start_index, end_index)
+            self.version += 1
+        else:
+            self.remove_edge(DirectedEdge(start_stop, end_stop))
+            del self._route_weights[start_stop][end_stop]
+
+        # Removing routes cannot make any path shorter: the landmarks remain valid
+        self._contraction_hierarchy = None
+        self._timetable = None
+        self._repair_path_cache(previous_version, removed_routes_ids=[(start_stop.id, end_stop.id)])
+
+    def _repair_path_cache(self, previous_version, removed_routes_ids=(), removed_stop_ids=()):
+        if self._path_cache is not None:
+            self._path_cache.repair(previous_version, self.version, removed_routes_ids, removed_stop_ids)
+
+    def _make_tables_mutable(self):
+        """ Copy the stops and coordinates tables into resizable containers, if they are not (see from_tables). """
+        if not isinstance(self._stops, list):
+            self._stops = list(self._stops)
+        if not isinstance(self._stop_index_map, dict):
+            self._stop_index_map = dict(self._stop_index_map)
+        if not isinstance(self._latitudes, array):
+            self._latitudes, self._longitudes = array('d', self._latitudes), array('d', self._longitudes)
 
     def get_route_from_string(self, route_description):
         """
@@ -45,6 +281,18 @@ class TanNetwork(DirectedGraph):
         
         return DirectedEdge(stop_start, stop_end)
 
+    def get_route_indices_from_string(self, route_description):
+        """
+        :parameter  route_description:   Description of a route as given by the puzzle's input
+        :type       route_description:   String
+
+        :return:    Indices of the start and end stops of the route, within this instance's coordinates table
+        :rtype:     Tuple of two integers
+        """
+        route_stop_strings = route_description.split()
+        return (self.get_stop_index_from_string(route_stop_strings[0]),
+                self.get_stop_index_from_string(route_stop_strings[1]))
+
     def get_stop_from_string(self, stop_description):
         """
         :parameter  stop_description:   Description of a stop as given by the puzzle's input
@@ -56,6 +304,16 @@ class TanNetwork(DirectedGraph):
         stop_id = TanStop.extract_field_value('id', stop_description)
         return self.get_stop_from_id(stop_id)
 
+    def get_stop_index_from_string(self, stop_description):
+        """
+        :parameter  stop_description:   Description of a stop as given by the puzzle's input
+        :type       stop_description:   String
+
+        :return:    Index of the corresponding stop, within this instance's coordinates table
+        :rtype:     Integer
+        """
+        return self._stop_index_map[TanStop.extract_field_value('id', stop_description)]
+
     def get_stop_from_id(self, stop_id):
         """
         :parameter  stop_id:    The unique identifier of a stop
@@ -64,9 +322,39 @@ class TanNetwork(DirectedGraph):
         :return:    Corresponding stop object, used within this instance
         :rtype:     TanStop
         """
-        return self._stop_id_map[stop_id]
+        return self._stops[self._stop_index_map[stop_id]]
+
+    def get_stop_from_index(self, stop_index):
+        """
+        :parameter  stop_index: Index of a stop, within this instance's coordinates table
+        :type       stop_index: Integer
+
+        :return:    Corresponding stop object, used within this instance
+        :rtype:     TanStop
+        """
+        return self._stops[stop_index]
 
-    def get_shortest_path(self, start_stop_description, goal_stop_description):
+    @property
+    def stops_count(self):
+        """ :return: Number of stops composing the network """
+        return len(self._stops)
+
+    @property
+    def stop_indices(self):
+        """ :return: Index of each stop of the network, by stop id """
+        return self._stop_index_map
+
+    @property
+    def compact_graph(self):
+        """ :return: CompactDirectedGraph the searches are delegated to; None if relying on DirectedGraph instead """
+        return self._compact_graph
+
+    @property
+    def coordinates_table(self):
+        """ :return: Latitudes and longitudes of the stops, as two arrays indexed like the stops """
+        return self._latitudes, self._longitudes
+
+    def get_shortest_path(self, start_stop_description, goal_stop_description, bidirectional=False, statistics=None):
         """
         :parameter  start_stop_description:  Description of the stop to start from, as given by the puzzle's input
         :type       start_stop_description:  String
@@ -74,13 +362,339 @@ class TanNetwork(DirectedGraph):
         :parameter  goal_stop_description:   Description of the stop to reach, as given by the puzzle's input
         :type       goal_stop_description:   String
 
+        :parameter  bidirectional:  Whether to rely on the bidirectional variant of the A* algorithm, which explores
+                                    fewer stops on long trips
+        :type       bidirectional:  Boolean
+
+        :parameter  statistics:     If given, records the operations and phase durations of the A* searches (the
+                                    bidirectional and contraction hierarchy searches are not instrumented)
+        :type       statistics:     SearchStatistics
+
         :return:    Shortest path between both given stops. Empty list if there is no valid path.
         :rtype:     List of TanStop
         """
-        start_stop = self.get_stop_from_string(start_stop_description)
-        goal_stop = self.get_stop_from_string(goal_stop_description)
+        return self.get_shortest_path_between_ids(TanStop.extract_field_value('id', start_stop_description),
+                                                  TanStop.extract_field_value('id', goal_stop_description),
+                                                  bidirectional, statistics)
+
+    def get_shortest_path_between_ids(self, start_id, goal_id, bidirectional=False, statistics=None):
+        """
+        Same as get_shortest_path, the stops being given by their ids.
+
+        :type   start_id, goal_id:  Strings
+        """
+        if self._path_cache is not None:
+            path = self._path_cache.get(start_id, goal_id, self.version)
+            if path is not None:
+                return path
+
+        if self._compact_graph is not None:
+            start_index, goal_index = self._stop_index_map[start_id], self._stop_index_map[goal_id]
+            if self._contraction_hierarchy is not None:
+                index_path = self._contraction_hierarchy.get_shortest_index_path(start_index, goal_index)
+            elif bidirectional:
+                index_path = self._compact_graph.get_shortest_index_path_bidirectional_a_star(
+                    start_index, goal_index, self._get_index_heuristic(goal_index, start_index=start_index),
+                    self._get_index_heuristic(start_index, reverse=True, start_index=goal_index))
+            else:
+                index_path = self._compact_graph.get_shortest_index_path_a_star(
+                    start_index, goal_index, self._get_index_heuristic(goal_index, start_index=start_index),
+                    statistics=statistics)
+            path = [self._stops[index] for index in index_path]
+        elif bidirectional:
+            path = self.get_shortest_path_bidirectional_a_star(self.get_stop_from_id(start_id),
+                                                               self.get_stop_from_id(goal_id),
+                                                               self.get_distance)
+        else:
+            path = super(TanNetwork, self).get_shortest_path_a_star(self.get_stop_from_id(start_id),
+                                                                    self.get_stop_from_id(goal_id),
+                                                                    self.get_distance, statistics)
+
+        if self._path_cache is not None:
+            self._path_cache.put(start_id, goal_id, path)
+
+        return path
+
+    def get_k_shortest_paths(self, start_stop_description, goal_stop_description, paths_count):
+        """
+        Compute alternatives to the shortest path: the shortest loopless paths between two stops, by increasing
+        distance (see DirectedGraph.get_k_shortest_paths).
+
+        :parameter  paths_count:    Maximum number of paths to find; fewer are returned if there are no others
+        :type       paths_count:    Integer
+
+        :return:    Paths between both given stops, by increasing distance. Empty list if there is no valid path
+        :rtype:     List of lists of TanStop
+        """
+        start_index = self.get_stop_index_from_string(start_stop_description)
+        goal_index = self.get_stop_index_from_string(goal_stop_description)
+
+        if self._compact_graph is not None:
+            return [[self._stops[index] for index in index_path]
+                    for index_path in self._compact_graph.get_k_shortest_index_paths(start_index, goal_index,
+                                                                                    paths_count)]
+
+        return super(TanNetwork, self).get_k_shortest_paths(self._stops[start_index], self._stops[goal_index],
+                                                            paths_count)
+
+    def get_shortest_path_between_coordinates(self, start_latitude, start_longitude, goal_latitude, goal_longitude,
+                                              bidirectional=False):
+        """
+        Compute the shortest path between the stops closest to two points; requires a spatial index.
+
+        :parameter  start_latitude, start_longitude, goal_latitude, goal_longitude: Coordinates of both points, in the
+                                                                                    unit of the puzzle's input
+        :type       start_latitude, start_longitude, goal_latitude, goal_longitude: Floats
+
+        :return:    Shortest path between the stops closest to both given points. Empty list if there is no valid path
+                    or no stop at all.
+        :rtype:     List of TanStop
+        """
+        start_stops = self.get_nearest_stops(start_latitude, start_longitude)
+        goal_stops = self.get_nearest_stops(goal_latitude, goal_longitude)
+        if not start_stops or not goal_stops:
+            return []
+
+        return self.get_shortest_path_between_ids(start_stops[0].id, goal_stops[0].id, bidirectional)
+
+    def get_nearest_stops(self, latitude, longitude, count=1):
+        """
+        Find the stops closest to a point, by the puzzle's distance; requires a spatial index.
 
-        return super(TanNetwork, self).get_shortest_path_a_star(start_stop, goal_stop, self.get_distance)
+        :parameter  latitude, longitude:    Coordinates of the point, in the unit of the puzzle's input
+        :type       latitude, longitude:    Floats
+
+        :parameter  count:  Number of stops to find
+        :type       count:  Integer
+
+        :return:    The given number of stops closest to the point (fewer if the network has fewer), from the closest
+        :rtype:     List of TanStop
+        """
+        return [self._stops[index]
+                for index, _ in self._get_spatial_index().get_nearest_stop_indices(latitude, longitude, count)]
+
+    def get_stops_within(self, min_latitude, min_longitude, max_latitude, max_longitude):
+        """
+        Find the stops within a bounding box; requires a spatial index.
+
+        :type       min_latitude, min_longitude, max_latitude, max_longitude:   Floats
+
+        :return:    Stops whose coordinates are within the given bounds, bounds included
+        :rtype:     List of TanStop
+        """
+        return [self._stops[index] for index in self._get_spatial_index().get_stop_indices_within(
+            min_latitude, min_longitude, max_latitude, max_longitude)]
+
+    def _get_spatial_index(self):
+        if self._spatial_index is None:
+            raise ValueError("Coordinates lookups require a spatial index (see use_spatial_index)")
+
+        return self._spatial_index
+
+    def get_shortest_path_tree(self, start_stop_description, max_distance=math.inf):
+        """
+        Compute, with a single search, the shortest paths from a stop to all the stops it reaches; e.g. for finding
+        every stop reachable within a given travel distance.
+
+        :parameter  start_stop_description: Description of the stop to start from, as given by the puzzle's input
+        :type       start_stop_description: String
+
+        :parameter  max_distance:   If given, the stops farther than this travel distance are left out of the tree
+        :type       max_distance:   Float
+
+        :return:    Tree of the shortest paths from the given stop, whose stops are looked up by id
+        :rtype:     ShortestPathTree
+        """
+        if self._compact_graph is None:
+            tree = super(TanNetwork, self).get_shortest_path_tree(self.get_stop_from_string(start_stop_description),
+                                                                 max_distance)
+            return tree.map_vertices(lambda stop: stop, lambda stop: stop.id)
+
+        index_tree = self._compact_graph.get_shortest_index_path_tree(
+            self.get_stop_index_from_string(start_stop_description), max_distance)
+        return index_tree.map_vertices(self._stops.__getitem__, lambda stop: stop.id)
+
+    def enable_path_cache(self, capacity):
+        """
+        Cache the results of get_shortest_path, which then only searches for paths it has not already found.
+        Changes of the network only drop the cached paths they may affect (see add_stop, remove_stop, add_route and
+        remove_route).
+
+        :parameter  capacity:   Maximum number of paths to keep
+        :type       capacity:   Integer
+
+        :return:    The cache, also exposing its hits, misses and evictions counters
+        :rtype:     ShortestPathCache
+        """
+        self._path_cache = ShortestPathCache(capacity, get_vertex_key=lambda stop: stop.id)
+        return self._path_cache
+
+    def get_shortest_paths(self, stop_description_pairs):
+        """
+        Batch version of get_shortest_path, meant for answering many queries on the same network.
+
+        With a compact graph, the search data is allocated once and reused by all the queries, and the queries sharing
+        the same start stop are answered by a single one-to-many sweep.
+
+        :parameter  stop_description_pairs:  Descriptions of the start and goal stops of each query
+        :type       stop_description_pairs:  Iterable of (String, String)
+
+        :return:    Shortest path of each query, in the given order. Empty list for each query without valid path.
+        :rtype:     List of lists of TanStop
+        """
+        if self._compact_graph is None:
+            return [self.get_shortest_path(start, goal) for start, goal in stop_description_pairs]
+
+        index_pairs = [(self.get_stop_index_from_string(start_description),
+                         self.get_stop_index_from_string(goal_description))
+                        for start_description, goal_description in stop_description_pairs]
+        index_paths = self._compact_graph.get_shortest_index_paths(index_pairs, self._get_index_heuristic)
+
+        return [[self._stops[index] for index in index_path] for index_path in index_paths]
+
+    def get_edge_weight(self, start_stop, end_stop):
+        """ Reads the route length computed at construction time, rather than computing it again. """
+        try:
+            return self._route_weights[start_stop][end_stop]
+        except KeyError:  # Case of a route added after construction
+            return self.get_distance(start_stop, end_stop)
+
+    def get_distances(self, start_indices, end_indices):
+        """
+        Compute, in a single pass over the coordinates table, the distances between pairs of stops.
+        The formula is the same as the one of get_distance.
+
+        :type   start_indices, end_indices: Sequences of stop indices, of the same length
+        :rtype:                             array of floats
+        """
+        latitudes, longitudes = self._latitudes, self._longitudes
+        cos, sqrt = math.cos, math.sqrt
+
+        distances = array('d')
+        for start_index, end_index in zip(start_indices, end_indices):
+            latitude_1, latitude_2 = latitudes[start_index], latitudes[end_index]
+            x = (longitudes[end_index] - longitudes[start_index]) * cos((latitude_1 + latitude_2)/2)
+            y = latitude_2 - latitude_1
+            distances.append(sqrt(x*x + y*y) * EARTH_RADIUS_KM)
+
+        return distances
+
+    def use_landmarks(self, landmarks, active_landmarks_count=None):
+        """
+        Make the searches rely on the landmarks heuristic (ALT algorithm) on top of the straight line distance, which
+        noticeably reduces the number of stops they explore.
+
+        :parameter  landmarks:  Landmarks computed on this network's compact graph (see landmarks.compute_landmarks)
+        :type       landmarks:  landmarks.Landmarks
+
+        :parameter  active_landmarks_count: If given, number of landmarks used by each query, picked as the ones
+                                            giving the best lower bounds for its start stop
+        :type       active_landmarks_count: Integer
+        """
+        if self._compact_graph is None:
+            raise ValueError("Landmarks require a TanNetwork relying on a compact graph")
+
+        self._landmarks = landmarks
+        self._active_landmarks_count = active_landmarks_count
+
+    def use_contraction_hierarchy(self, contraction_hierarchy):
+        """
+        Make get_shortest_path rely on the given contraction hierarchy, rather than on A* searches.
+
+        :parameter  contraction_hierarchy:  Hierarchy built from this network's compact graph
+                                            (see contraction.build_contraction_hierarchy)
+        :type       contraction_hierarchy:  contraction.ContractionHierarchy
+        """
+        if self._compact_graph is None:
+            raise ValueError("Contraction hierarchies require a TanNetwork relying on a compact graph")
+
+        self._contraction_hierarchy = contraction_hierarchy
+
+    def use_spatial_index(self, spatial_index):
+        """
+        Make the nearest stops and bounding box lookups rely on the given spatial index, which is then kept up to date
+        with the stops added to or removed from the network.
+
+        :parameter  spatial_index:  Index built on this network's stops (see spatial_index.build_spatial_index)
+        :type       spatial_index:  spatial_index.SpatialIndex
+        """
+        self._spatial_index = spatial_index
+
+    def use_timetable(self, timetable):
+        """
+        Make the earliest arrival searches rely on the given timetable, until the stops or routes of the network are
+        updated: the timetable is then dropped, as it no longer matches them.
+
+        :parameter  timetable:  Timetable of this network's routes (see timetable.build_timetable)
+        :type       timetable:  timetable.Timetable
+        """
+        self._timetable = timetable
+
+    def get_earliest_arrival_path(self, start_stop_description, goal_stop_description, departure_time,
+                                  connection_scan=False):
+        """
+        :parameter  start_stop_description, goal_stop_description:  Descriptions of the stops to travel between, as
+                                                                    given by the puzzle's input
+        :type       start_stop_description, goal_stop_description:  Strings
+
+        :parameter  departure_time: Time from which the start stop can be left, in the timetable's unit
+        :type       departure_time: Integer
+
+        :parameter  connection_scan:    Whether to scan the timetable's connections rather than to run a
+                                        time-dependent Dijkstra search (see Timetable.get_earliest_arrival_connections)
+        :type       connection_scan:    Boolean
+
+        :return:    Path reaching the goal stop the earliest, each stop along with the time it is reached at (the
+                    departure time for the start stop). Empty list if there is no valid path.
+        :rtype:     List of (TanStop, Integer)
+        """
+        if self._timetable is None:
+            raise ValueError("Earliest arrival searches require a timetable (see TanNetwork.use_timetable)")
+
+        start_index = self.get_stop_index_from_string(start_stop_description)
+        goal_index = self.get_stop_index_from_string(goal_stop_description)
+        connections = self._timetable.get_earliest_arrival_connections(start_index, goal_index, departure_time,
+                                                                       connection_scan)
+        if connections is None:
+            return []
+
+        return [(self._stops[start_index], departure_time)] + [(self._stops[connection.arrival_stop],
+                                                                 connection.arrival_time)
+                                                                for connection in connections]
+
+    def _get_index_heuristic(self, stop_index, reverse=False, start_index=None):
+        """
+        :parameter  reverse:        Whether to estimate the distances from the given stop rather than to it
+        :parameter  start_index:    Index of the stop the search starts from, if known
+
+        :return:    Function estimating the distance from a stop, given by its index, to the given stop
+        """
+        straight_line_heuristic = self.build_index_heuristic(self._latitudes, self._longitudes, stop_index)
+        if self._landmarks is None:
+            return straight_line_heuristic
+
+        landmarks_heuristic = self._landmarks.build_index_heuristic(stop_index, reverse, start_index,
+                                                                    self._active_landmarks_count)
+        return lambda index: max(straight_line_heuristic(index), landmarks_heuristic(index))
+
+    @staticmethod
+    def build_index_heuristic(latitudes, longitudes, goal_index):
+        """
+        :parameter  latitudes, longitudes:  Coordinates table of the stops
+        :type       latitudes, longitudes:  Sequences of floats, indexed like the stops
+
+        :return:    Function estimating the distance from a stop, given by its index, to the given goal stop
+        """
+        goal_latitude, goal_longitude = latitudes[goal_index], longitudes[goal_index]
+        cos, sqrt = math.cos, math.sqrt
+
+        def index_heuristic(index):
+            latitude = latitudes[index]
+            x = (goal_longitude - longitudes[index]) * cos((latitude + goal_latitude)/2)
+            y = goal_latitude - latitude
+            return sqrt(x*x + y*y) * EARTH_RADIUS_KM
+
+        return index_heuristic
 
     @staticmethod
     def get_distance(stop_1, stop_2):
@@ -96,7 +710,12 @@ class TanNetwork(DirectedGraph):
 
 
 class TanStop:
-    """ Represents a stop of the transportation network described in the puzzle. """
+    """
+    Represents a stop of the transportation network described in the puzzle.
+    Its fields are held in slots rather than in a per instance dictionary, as networks may count millions of stops.
+    """
+
+    __slots__ = ('id', 'name', 'latitude', 'longitude')
 
     _fields_csv_indices = {'id':       0,
                            'name':     1,
@@ -108,13 +727,22 @@ class TanStop:
         :parameter  input_string:   Description of a stop as given by the puzzle's input
         :type       input_string:   String
         """
-        fields = input_string.split(',')
-
-        for field, csv_index in self._fields_csv_indices.items():
-            field_string = fields[csv_index]
-            field_value = self.extract_field_value(field, field_string)
-
-            self.__setattr__(field, field_value)
+        fields = input_string.split(',', 5)
+
+        self.id = self._extract_id_value(fields[0])
+        self.name = self._extract_name_value(fields[1])
+        self.latitude = self._extract_latitude_value(fields[3])
+        self.longitude = self._extract_longitude_value(fields[4])
+
+    @classmethod
+    def from_fields(cls, stop_id, name, latitude, longitude):
+        """ Build a stop from its already extracted fields values, rather than from the puzzle's input. """
+        stop = cls.__new__(cls)
+        stop.id = stop_id
+        stop.name = name
+        stop.latitude = latitude
+        stop.longitude = longitude
+        return stop
 
     def __str__(self):
         return self.name
@@ -132,9 +760,13 @@ class TanStop:
 
     @staticmethod
     def _extract_id_value(string):
-        stop_id_re = re.compile('StopArea\:([^ ]+)')
-        id_match = stop_id_re.match(string)
-        return id_match.groups()[0]
+        # Plain string operations rather than a regular expression, as this is called for every stop and route
+        if string.startswith(STOP_ID_PREFIX):
+            stop_id = string[len(STOP_ID_PREFIX):].split(' ', 1)[0]
+            if stop_id:
+                return stop_id
+
+        raise ValueError("Invalid stop id description: {!r}".format(string))
 
     @staticmethod
     def _extract_name_value(string):
@@ -0,0 +1,267 @@
+""" Implements the timetables of the routes of networks, and the earliest arrival searches relying on them. """
+
+import math
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from heapq import heappop, heappush
+from itertools import islice
+from operator import le
+
+
+Connection = namedtuple('Connection', ['departure_stop', 'arrival_stop', 'departure_time', 'arrival_time'])
+
+# Above this many distinct times per connection, sorting the connections by departure time is done by comparisons
+# rather than by counting
+_COUNTING_SORT_MAX_SPREAD = 16
+
+
+class Timetable:
+    """
+    Departures of the vehicles along the routes of a network, each one being a connection: a vehicle leaving the
+    route's start stop at a given time, and reaching its end stop at a later time. Times are integers, such as seconds
+    since the start of the service day; changing vehicles is assumed to take no time.
+
+    The connections are stored in flat arrays rather than as objects, twice:
+    - route by route, the routes being grouped by start stop as within a compressed sparse row layout, and each route's
+      departures being sorted. The departure reaching the route's end stop the earliest, among a departure and the
+      later ones, is precomputed for each departure, so that catching the next departure is not assumed to be the
+      best option (travel times varying along the day). Time-dependent Dijkstra searches rely on this layout.
+    - all together, sorted by departure time. Connection scan searches rely on this layout.
+    """
+
+    def __init__(self, stops_count, departure_stops, arrival_stops, departure_times, arrival_times):
+        """
+        :parameter  stops_count:    Number of stops of the network, the stops being given by their indices
+        :type       stops_count:    Integer
+
+        :parameter  departure_stops, arrival_stops, departure_times, arrival_times: Start stop index, end stop index,
+                                                                                    departure time and arrival time of
+                                                                                    each connection, in any order
+        :type       departure_stops, arrival_stops, departure_times, arrival_times: Sequences of integers of the same
+                                                                                    length
+
+        :raises     ValueError: If a connection does not arrive after it departs
+        """
+        self._stops_count = stops_count
+        connections_count = len(departure_times)
+        # Connections taking no time could feed connections departing at the same time, but sorted before them
+        if any(map(le, arrival_times, departure_times)):
+            raise ValueError("Connections must arrive after they depart")
+
+        time_order = _sort_by_time(departure_times)
+        self._departure_stops = array('i', map(departure_stops.__getitem__, time_order))
+        self._arrival_stops = array('i', map(arrival_stops.__getitem__, time_order))
+        self._departure_times = array('i', map(departure_times.__getitem__, time_order))
+        self._arrival_times = array('i', map(arrival_times.__getitem__, time_order))
+
+        # Routes sorted by start stop then end stop, each one being an index of the following arrays
+        route_indices = {route: index for index, route in enumerate(sorted(set(zip(departure_stops, arrival_stops))))}
+        self._route_offsets = array('l', [0]) * (stops_count + 1)  # Routes of each stop, as within CompactDirectedGraph
+        self._route_ends = array('i', [0]) * len(route_indices)
+        for (start, end), route in route_indices.items():
+            self._route_offsets[start + 1] += 1
+            self._route_ends[route] = end
+        for stop in range(stops_count):
+            self._route_offsets[stop + 1] += self._route_offsets[stop]
+
+        # Departures of each route, by increasing time, sorted stably by route from the time order
+        connection_routes = array('l', map(route_indices.__getitem__, zip(self._departure_stops, self._arrival_stops)))
+        self._schedule_offsets = array('l', [0]) * (len(route_indices) + 1)
+        for route in connection_routes:
+            self._schedule_offsets[route + 1] += 1
+        for route in range(len(route_indices)):
+            self._schedule_offsets[route + 1] += self._schedule_offsets[route]
+
+        self._schedule_departures = array('i', [0]) * connections_count
+        self._schedule_arrivals = array('i', [0]) * connections_count
+        next_slots = self._schedule_offsets[:-1]
+        for route, departure_time, arrival_time in zip(connection_routes, self._departure_times, self._arrival_times):
+            slot = next_slots[route]
+            next_slots[route] += 1
+            self._schedule_departures[slot] = departure_time
+            self._schedule_arrivals[slot] = arrival_time
+
+        # Position of the earliest arrival among each departure and the later ones of the same route
+        self._schedule_best_positions = array('l', range(connections_count))
+        for route in range(len(route_indices)):
+            for position in reversed(range(self._schedule_offsets[route], self._schedule_offsets[route + 1] - 1)):
+                later_best_position = self._schedule_best_positions[position + 1]
+                if self._schedule_arrivals[later_best_position] < self._schedule_arrivals[position]:
+                    self._schedule_best_positions[position] = later_best_position
+
+    @property
+    def connections_count(self):
+        return len(self._departure_times)
+
+    @property
+    def routes_count(self):
+        return len(self._route_ends)
+
+    def get_earliest_arrival_connections(self, start_index, goal_index, departure_time, connection_scan=False):
+        """
+        :parameter  start_index, goal_index:    Indices of the stops to travel between
+        :type       start_index, goal_index:    Integers
+
+        :parameter  departure_time: Time from which the start stop can be left
+        :type       departure_time: Integer
+
+        :parameter  connection_scan:    Whether to scan the connections by departure time, rather than to run a
+                                        time-dependent Dijkstra search. The scan reads every connection departing
+                                        between the departure time and the arrival time at the goal stop, wherever
+                                        it runs, whereas the search only reads the routes of the stops reached
+                                        before the goal stop, hence is usually faster.
+        :type       connection_scan:    Boolean
+
+        :return:    Connections to take to reach the goal stop the earliest, in order; empty list if the start and goal
+                    stops are the same, None if the goal stop cannot be reached
+        :rtype:     List of Connection
+        """
+        if start_index == goal_index:
+            return []
+
+        if connection_scan:
+            return self._scan_connections(start_index, goal_index, departure_time)
+
+        return self._search_time_dependent(start_index, goal_index, departure_time)
+
+    def _scan_connections(self, start_index, goal_index, departure_time):
+        arrival_times = array('d', [math.inf]) * self._stops_count
+        arrival_times[start_index] = departure_time
+        in_connections = {}  # Position of the connection reaching each stop the earliest
+
+        first_position = bisect_left(self._departure_times, departure_time)
+        scanned_connections = zip(range(first_position, len(self._departure_times)),
+                                  islice(self._departure_times, first_position, None),
+                                  islice(self._departure_stops, first_position, None),
+                                  islice(self._arrival_stops, first_position, None),
+                                  islice(self._arrival_times, first_position, None))
+
+        for position, connection_departure_time, departure_stop, arrival_stop, arrival_time in scanned_connections:
+            # No connection leaving at or after the goal is reached can reach it earlier
+            if connection_departure_time >= arrival_times[goal_index]:
+                break
+
+            if arrival_times[departure_stop] <= connection_departure_time and \
+                    arrival_time < arrival_times[arrival_stop]:
+                arrival_times[arrival_stop] = arrival_time
+                in_connections[arrival_stop] = position
+
+        if goal_index not in in_connections:
+            return None
+
+        connections = []
+        stop = goal_index
+        while stop != start_index:
+            position = in_connections[stop]
+            connections.append(Connection(self._departure_stops[position], stop,
+                                          self._departure_times[position], self._arrival_times[position]))
+            stop = self._departure_stops[position]
+
+        connections.reverse()
+        return connections
+
+    def _search_time_dependent(self, start_index, goal_index, departure_time):
+        route_offsets, route_ends = self._route_offsets, self._route_ends
+        schedule_offsets, schedule_departures = self._schedule_offsets, self._schedule_departures
+        schedule_arrivals, schedule_best_positions = self._schedule_arrivals, self._schedule_best_positions
+
+        arrival_times = {start_index: departure_time}
+        in_connections = {}  # Departure stop and schedule position of the connection reaching each stop the earliest
+        priority_queue = [(departure_time, start_index)]
+
+        while priority_queue:
+            time, stop = heappop(priority_queue)
+            if stop == goal_index:
+                break
+            if time > arrival_times[stop]:  # Stale entry, the stop being reached earlier since it was queued
+                continue
+
+            for route in range(route_offsets[stop], route_offsets[stop + 1]):
+                end_position = schedule_offsets[route + 1]
+                position = bisect_left(schedule_departures, time, schedule_offsets[route], end_position)
+                if position == end_position:  # No departure left on this route
+                    continue
+
+                position = schedule_best_positions[position]
+                arrival_time = schedule_arrivals[position]
+                end = route_ends[route]
+                if arrival_time < arrival_times.get(end, math.inf):
+                    arrival_times[end] = arrival_time
+                    in_connections[end] = (stop, position)
+                    heappush(priority_queue, (arrival_time, end))
+
+        if goal_index not in in_connections:
+            return None
+
+        connections = []
+        stop = goal_index
+        while stop != start_index:
+            departure_stop, position = in_connections[stop]
+            connections.append(Connection(departure_stop, stop, schedule_departures[position],
+                                          schedule_arrivals[position]))
+            stop = departure_stop
+
+        connections.reverse()
+        return connections
+
+
+def build_timetable(tan_network, route_schedules):
+    """
+    :parameter  tan_network:        Network whose routes the schedules are given for
+    :type       tan_network:        TanNetwork
+
+    :parameter  route_schedules:    Schedule of each route: its description as given by the puzzle's input, its
+                                    departure times, and either its travel time or the travel time of each departure
+    :type       route_schedules:    Iterable of (String, Iterable of integers, Integer or Sequence of integers)
+
+    :rtype:     Timetable
+    """
+    departure_stops, arrival_stops = array('l'), array('l')
+    departure_times, arrival_times = array('l'), array('l')
+
+    for route_description, route_departure_times, travel_times in route_schedules:
+        start_index, end_index = tan_network.get_route_indices_from_string(route_description)
+        first_position = len(departure_times)
+        departure_times.extend(route_departure_times)
+        departures_count = len(departure_times) - first_position
+
+        if isinstance(travel_times, int):
+            arrival_times.extend(departure_time + travel_times for departure_time in departure_times[first_position:])
+        else:
+            if len(travel_times) != departures_count:
+                raise ValueError("Route {!r} has {} departures but {} travel times".format(
+                    route_description, departures_count, len(travel_times)))
+            arrival_times.extend(departure_time + travel_time
+                                 for departure_time, travel_time in zip(departure_times[first_position:],
+                                                                        travel_times))
+
+        departure_stops.extend(array('l', [start_index]) * departures_count)
+        arrival_stops.extend(array('l', [end_index]) * departures_count)
+
+    return Timetable(tan_network.stops_count, departure_stops, arrival_stops, departure_times, arrival_times)
+
+
+def _sort_by_time(times):
+    """ :return: Positions of the given times, sorted stably by time """
+    if not times:
+        return array('l')
+
+    min_time = min(times)
+    spread = max(times) - min_time + 1
+    if spread > _COUNTING_SORT_MAX_SPREAD * len(times):
+        return array('l', sorted(range(len(times)), key=times.__getitem__))
+
+    offsets = array('l', [0]) * (spread + 1)
+    for time in times:
+        offsets[time - min_time + 1] += 1
+    for slot in range(spread):
+        offsets[slot + 1] += offsets[slot]
+
+    order = array('l', [0]) * len(times)
+    for position, time in enumerate(times):
+        slot = offsets[time - min_time]
+        offsets[time - min_time] += 1
+        order[slot] = position
+
+    return order
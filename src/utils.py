@@ -1,6 +1,7 @@
 """ Implements utility classes and functions. """
 
 from heapq import heappop, heappush
+from time import perf_counter
 
 
 class PriorityQueue:
@@ -17,5 +18,220 @@ class PriorityQueue:
     def pop(self):
         return heappop(self._queue)[2]
 
+    def peek_priority(self):
+        """ :return: Priority of the next element to pop """
+        return self._queue[0][0]
+
     def is_empty(self):
         return not self._queue
+
+
+class IndexedPriorityQueue:
+    """
+    Implements a priority queue holding each element at most once, and whose elements priorities can be decreased.
+
+    It is a binary heap of (priority, counter, element) entries, along with the position of each element within the
+    heap; the elements must therefore be hashable, like integer vertex ids.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._positions = {}  # Position of each queued element within the heap
+        self._counter = 0  # Used to choose an element in case of a priority tie
+
+    def push(self, priority, element):
+        """
+        Queue the given element, or decrease its priority if it is already queued with a higher one.
+
+        :return:    Whether the element was queued or its priority decreased
+        :rtype:     Boolean
+        """
+        try:
+            position = self._positions[element]
+        except KeyError:
+            self._heap.append((priority, self._counter, element))
+            self._counter += 1
+            self._sift_up(len(self._heap) - 1)
+            return True
+
+        queued_priority, counter, _ = self._heap[position]
+        if priority >= queued_priority:
+            return False
+
+        self._heap[position] = (priority, counter, element)
+        self._sift_up(position)
+        return True
+
+    def pop(self):
+        """ :return: Element of lowest priority, removed from the queue """
+        heap = self._heap
+        last_entry = heap.pop()
+
+        if not heap:
+            del self._positions[last_entry[2]]
+            return last_entry[2]
+
+        element = heap[0][2]
+        del self._positions[element]
+        heap[0] = last_entry
+        self._positions[last_entry[2]] = 0
+        self._sift_down(0)
+
+        return element
+
+    def peek_priority(self):
+        """ :return: Priority of the next element to pop """
+        return self._heap[0][0]
+
+    def get_priority(self, element):
+        """ :return: Priority of the given queued element """
+        return self._heap[self._positions[element]][0]
+
+    def is_empty(self):
+        return not self._heap
+
+    def __contains__(self, element):
+        return element in self._positions
+
+    def __len__(self):
+        return len(self._heap)
+
+    def _sift_up(self, position):
+        heap, positions = self._heap, self._positions
+        entry = heap[position]
+
+        while position > 0:
+            parent_position = (position - 1) >> 1
+            parent_entry = heap[parent_position]
+            if parent_entry < entry:  # The counters being unique, the elements themselves are never compared
+                break
+
+            heap[position] = parent_entry
+            positions[parent_entry[2]] = position
+            position = parent_position
+
+        heap[position] = entry
+        positions[entry[2]] = position
+
+    def _sift_down(self, position):
+        heap, positions = self._heap, self._positions
+        entry = heap[position]
+        size = len(heap)
+
+        while True:
+            child_position = 2 * position + 1
+            if child_position >= size:
+                break
+
+            if child_position + 1 < size and heap[child_position + 1] < heap[child_position]:
+                child_position += 1
+
+            child_entry = heap[child_position]
+            if entry < child_entry:
+                break
+
+            heap[position] = child_entry
+            positions[child_entry[2]] = position
+            position = child_position
+
+        heap[position] = entry
+        positions[entry[2]] = position
+
+
+class SearchStatistics:
+    """
+    Collects counters and phase durations of shortest path searches, for profiling purposes.
+    Searches only fill it when given one, so that they do not pay for the instrumentation otherwise; the counters add
+    up over all the searches it was given to, until reset.
+
+    Counters:
+    - queries:          Number of searches
+    - vertices_settled: Number of vertices whose shortest path was found (i.e. popped from the queue and expanded)
+    - edges_scanned:    Number of edges examined while expanding vertices
+    - edges_relaxed:    Number of edges which improved the cost of their end vertex
+    - heap_pushes, heap_pops:   Operations performed on the search queue
+    - decreased_keys:   Priorities decreased within an indexed queue, rather than pushing a new entry
+    - stale_pops:       Popped entries which were outdated (i.e. whose vertex was already settled)
+    - peak_heap_size:   Maximum size reached by the search queue
+    - phase_durations:  Time spent in each phase of the searches, in seconds, by phase name
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.queries = 0
+        self.vertices_settled = 0
+        self.edges_scanned = 0
+        self.edges_relaxed = 0
+        self.heap_pushes = 0
+        self.heap_pops = 0
+        self.decreased_keys = 0
+        self.stale_pops = 0
+        self.peak_heap_size = 0
+        self.phase_durations = {}
+
+        self._phase = None
+        self._phase_start_time = None
+
+    def push(self, heap, item):
+        """ Counting replacement of heapq.heappush """
+        heappush(heap, item)
+        self.heap_pushes += 1
+        if len(heap) > self.peak_heap_size:
+            self.peak_heap_size = len(heap)
+
+    def pop(self, heap):
+        """ Counting replacement of heapq.heappop """
+        self.heap_pops += 1
+        return heappop(heap)
+
+    def start_phase(self, phase):
+        """ Stop timing the current phase, if any, and start timing the given one """
+        now = perf_counter()
+        if self._phase is not None:
+            duration = now - self._phase_start_time
+            self.phase_durations[self._phase] = self.phase_durations.get(self._phase, 0.0) + duration
+
+        self._phase, self._phase_start_time = phase, now
+
+    def stop_phase(self):
+        """ Stop timing the current phase, if any """
+        self.start_phase(None)
+
+    def as_dict(self):
+        """ :return: Counters and phase durations, as a dictionary which can be serialized to JSON """
+        return {'queries': self.queries,
+                'vertices_settled': self.vertices_settled,
+                'edges_scanned': self.edges_scanned,
+                'edges_relaxed': self.edges_relaxed,
+                'heap_pushes': self.heap_pushes,
+                'heap_pops': self.heap_pops,
+                'decreased_keys': self.decreased_keys,
+                'stale_pops': self.stale_pops,
+                'peak_heap_size': self.peak_heap_size,
+                'phase_durations': dict(self.phase_durations)}
+
+
+class InstrumentedPriorityQueue(IndexedPriorityQueue):
+    """ Indexed priority queue recording its operations in a SearchStatistics. """
+
+    def __init__(self, statistics):
+        super().__init__()
+        self._statistics = statistics
+
+    def push(self, priority, element):
+        is_queued = element in self._positions
+        has_changed = super().push(priority, element)
+
+        if not is_queued:
+            self._statistics.heap_pushes += 1
+            self._statistics.peak_heap_size = max(self._statistics.peak_heap_size, len(self._heap))
+        elif has_changed:
+            self._statistics.decreased_keys += 1
+
+        return has_changed
+
+    def pop(self):
+        self._statistics.heap_pops += 1
+        return super().pop()
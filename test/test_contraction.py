@@ -0,0 +1,82 @@
+import os
+import random
+import tempfile
+
+from src.contraction import build_contraction_hierarchy, load_contraction_hierarchy, save_contraction_hierarchy
+from src.graph import CompactDirectedGraph, DirectedEdge
+from src.tan_network import TanNetwork
+from utils_ut import EXAMPLE_ROUTES, EXAMPLE_STOPS, TestCaseAAA
+
+
+class TestContractionHierarchy_Queries(TestCaseAAA):
+    """
+    Ensures the paths found through a contraction hierarchy are valid paths of the original graph, whose costs are the
+    shortest ones; on random graphs, with or without parallel edges and unreachable vertices.
+    """
+
+    def _arrange(self, vertices_count, edges_count, seed):
+        random_generator = random.Random(seed)
+        self._weights = {}
+        for _ in range(edges_count):
+            start, end = random_generator.randrange(vertices_count), random_generator.randrange(vertices_count)
+            self._weights[(start, end)] = random_generator.randint(1, 10)
+
+        self._graph = CompactDirectedGraph([DirectedEdge(*edge) for edge in self._weights],
+                                           lambda start, end: self._weights[(start, end)], range(vertices_count))
+
+    def _act(self):
+        self._uut = build_contraction_hierarchy(self._graph, witness_search_limit=8)
+
+    def _assert(self):
+        vertices = self._graph.vertices
+        for start in vertices:
+            expected_costs = self._graph.get_distances_from(start)
+            for goal in vertices:
+                path = self._uut.get_shortest_index_path(start, goal)
+                if expected_costs[goal] == float('inf'):
+                    self.assertEqual(path, [])
+                    continue
+
+                self.assertEqual((path[0], path[-1]), (start, goal))
+                self.assertEqual(sum(self._weights[edge] for edge in zip(path[:-1], path[1:])), expected_costs[goal])
+
+    def test_sparse(self):
+        self._arrange(vertices_count=30, edges_count=45, seed=1)
+        self._act()
+        self._assert()
+
+    def test_dense(self):
+        self._arrange(vertices_count=20, edges_count=120, seed=2)
+        self._act()
+        self._assert()
+
+
+class TestContractionHierarchy_TanNetwork(TestCaseAAA):
+    """ Ensures a network relying on a saved and loaded contraction hierarchy gives the same paths as A* searches. """
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._file_path = os.path.join(self._directory.name, "network.hierarchy")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _arrange(self):
+        self._tan_network = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES, compact=True)
+        self._stop_description_pairs = [(start, goal)
+                                        for start in ["StopArea:ABDU", "StopArea:ABLA", "StopArea:ACHA"]
+                                        for goal in ["StopArea:ABDU", "StopArea:ABLA", "StopArea:ACHA"]]
+        self._expected_paths = [self._tan_network.get_shortest_path(*pair) for pair in self._stop_description_pairs]
+
+    def _act(self):
+        save_contraction_hierarchy(build_contraction_hierarchy(self._tan_network.compact_graph), self._file_path)
+        self._tan_network.use_contraction_hierarchy(load_contraction_hierarchy(self._file_path))
+
+    def _assert(self):
+        self.assertEqual([self._tan_network.get_shortest_path(*pair) for pair in self._stop_description_pairs],
+                         self._expected_paths)
+
+    def test_example(self):
+        self._arrange()
+        self._act()
+        self._assert()
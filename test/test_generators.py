@@ -0,0 +1,80 @@
+import random
+
+from benchmarks.generators import (generate_grid_network, generate_islands_network, generate_queries,
+                                   generate_radial_network, generate_route_schedules, generate_unreachable_queries)
+from src.tan_network import TanNetwork
+from src.timetable import build_timetable
+from utils_ut import TestCaseAAA
+
+
+class TestGenerators_Networks(TestCaseAAA):
+    """ Ensures the generated networks are valid puzzle inputs, in which random queries can be answered. """
+
+    def _arrange(self, generate_network):
+        self._stops, self._routes = generate_network()
+        self._queries = generate_queries(self._stops, 20, random.Random(0))
+
+    def _act(self):
+        tan_network = TanNetwork(self._stops, self._routes, compact=True)
+        self._uut = [tan_network.get_shortest_path(start, goal) for start, goal in self._queries]
+
+    def _assert(self):
+        self.assertTrue(all(self._uut))
+
+    def test_grid(self):
+        self._arrange(lambda: generate_grid_network(6, bridge_rows=[2]))
+        self._act()
+        self._assert()
+
+    def test_radial(self):
+        self._arrange(lambda: generate_radial_network(4, 5))
+        self._act()
+        self._assert()
+
+    def test_islands(self):
+        self._arrange(lambda: generate_islands_network(1, 5))
+        self._act()
+        self._assert()
+
+
+class TestGenerators_UnreachableQueries(TestCaseAAA):
+    """ Ensures the unreachable queries generated for islands networks have no solution. """
+
+    def _arrange(self):
+        self._stops, self._routes = generate_islands_network(3, 4)
+        self._queries = generate_unreachable_queries(3, 4, 20, random.Random(0))
+
+    def _act(self):
+        tan_network = TanNetwork(self._stops, self._routes, compact=True)
+        self._uut = [tan_network.get_shortest_path(start, goal) for start, goal in self._queries]
+
+    def _assert(self):
+        self.assertEqual(self._uut, [[]] * 20)
+
+    def test_unreachable_queries(self):
+        self._arrange()
+        self._act()
+        self._assert()
+
+
+class TestGenerators_RouteSchedules(TestCaseAAA):
+    """ Ensures the generated timetables allow to reach every stop of a grid network, departing in the morning. """
+
+    def _arrange(self):
+        self._stops, self._routes = generate_grid_network(4)
+        self._queries = generate_queries(self._stops, 20, random.Random(0))
+
+    def _act(self):
+        tan_network = TanNetwork(self._stops, self._routes, compact=True)
+        tan_network.use_timetable(build_timetable(tan_network,
+                                                  generate_route_schedules(self._routes, random.Random(0))))
+        self._uut = [tan_network.get_earliest_arrival_path(start, goal, 8 * 3600) for start, goal in self._queries]
+
+    def _assert(self):
+        self.assertTrue(all(self._uut))
+        self.assertTrue(all(path[-1][1] < 12 * 3600 for path in self._uut))
+
+    def test_route_schedules(self):
+        self._arrange()
+        self._act()
+        self._assert()
@@ -1,6 +1,9 @@
+import math
+import random
 from unittest.mock import patch
 
-from src.graph import DirectedEdge, DirectedGraph
+from src.graph import CompactDirectedGraph, DirectedEdge, DirectedGraph, ShortestPathCache
+from src.utils import SearchStatistics
 from utils_ut import TestCaseAAA
 
 
@@ -16,6 +19,7 @@ B = DummyVertex("B")
 C = DummyVertex("C")
 D = DummyVertex("D")
 E = DummyVertex("E")
+F = DummyVertex("F")  # Part of no edge
 
 
 def generate_directed_edges(edge_tuples):
@@ -90,6 +94,20 @@ class TestDirectedGraph_Init(TestCaseAAA):
                                               C: set([B])})
 
 
+class TestDirectedGraph_AddEdgeBetween(TestDirectedGraph_Init):
+    """ Ensures that bulk loading edges without DirectedEdge instances gives the same representation. """
+
+    def _act(self):
+        self._uut = DirectedGraph([])
+        for edge in self._edges:
+            self._uut.add_edge_between(edge.start, edge.end)
+
+    def _assert(self, expected_representation):
+        super()._assert(expected_representation)
+        self.assertEqual(self._uut.reverse_representation, DirectedGraph(self._edges).reverse_representation)
+        self.assertEqual(self._uut.version, len(self._edges))
+
+
 class TestDirectedGraph_AStar(TestCaseAAA):
     """
     Tests the A* implementation's results, while using:
@@ -165,3 +183,552 @@ class TestDirectedGraph_AStar(TestCaseAAA):
         self._arrange(start=A, goal=E)
         self._act()
         self._assert(expected_path=[A, C, E])
+
+
+class TestDirectedGraph_BidirectionalAStar(TestDirectedGraph_AStar):
+    """ Runs the A* test case against the bidirectional variant of the algorithm. """
+
+    def _act(self):
+        with patch.object(self._uut, 'get_distance', side_effect=self._get_distance_mock):
+            self._result_no_heuristic = self._uut.get_shortest_path_bidirectional_a_star(self._start, self._goal,
+                                                                                         lambda *args: 0)
+            self._result_exact_heuristic = self._uut.get_shortest_path_bidirectional_a_star(self._start, self._goal,
+                                                                                            self._get_distance_mock)
+
+    def test_reverse_representation(self):
+        self.assertEqual(self._uut.reverse_representation, {A: set([C, D]),
+                                                            B: set([A, E]),
+                                                            C: set([A]),
+                                                            D: set([A, E]),
+                                                            E: set([C, D])})
+
+
+class TestDirectedGraph_ShortestPathTree(TestCaseAAA):
+    """ Ensures the paths read from shortest path trees are the ones found by A*, within the given limits. """
+
+    setUp = TestDirectedGraph_AStar.setUp
+    _get_distance_mock = TestDirectedGraph_AStar._get_distance_mock
+
+    def _arrange(self, start, max_cost=math.inf, goals=None):
+        self._start = start
+        self._max_cost = max_cost
+        self._goals = goals
+
+    def _act(self):
+        with patch.object(self._uut, 'get_distance', side_effect=self._get_distance_mock):
+            self._result = self._get_shortest_path_tree()
+            self._expected_paths = {goal: self._uut.get_shortest_path_a_star(self._start, goal, lambda *args: 0)
+                                    for goal in (A, B, C, D, E)}
+
+    def _get_shortest_path_tree(self):
+        return self._uut.get_shortest_path_tree(self._start, self._max_cost, self._goals)
+
+    def _assert(self, expected_vertices):
+        self.assertEqual(set(self._result.vertices), set(expected_vertices))
+        self.assertEqual(list(self._result.costs), sorted(self._result.costs))
+        for goal, expected_path in self._expected_paths.items():
+            if goal in expected_vertices:
+                self.assertEqual(self._result.get_path(goal), expected_path)
+                self.assertEqual(self._result.get_cost(goal), sum(self._get_distance_mock(start, end)
+                                                                  for start, end in zip(expected_path,
+                                                                                        expected_path[1:])))
+            else:
+                self.assertEqual(self._result.get_path(goal), [])
+                self.assertEqual(self._result.get_cost(goal), math.inf)
+
+    def test_all_vertices(self):
+        self._arrange(start=A)
+        self._act()
+        self._assert(expected_vertices=[A, B, C, D, E])
+
+    def test_unreachable_vertices(self):
+        self._arrange(start=B)
+        self._act()
+        self._assert(expected_vertices=[B])
+
+    def test_max_cost(self):
+        self._arrange(start=A, max_cost=2)
+        self._act()
+        self._assert(expected_vertices=[A, B, D])
+
+    def test_goals(self):
+        self._arrange(start=E, goals=[D])
+        self._act()
+        self._assert(expected_vertices=[E, B, D])
+
+    def test_vertex_without_edges(self):
+        self._arrange(start=F)
+        self._act()
+        self._assert(expected_vertices=[F])
+
+
+class TestCompactDirectedGraph_ShortestPathTree(TestDirectedGraph_ShortestPathTree):
+    """ Runs the shortest path tree test case against CompactDirectedGraph. """
+
+    def setUp(self):
+        super(TestCompactDirectedGraph_ShortestPathTree, self).setUp()
+        self._dict_graph = self._uut
+        edges = [DirectedEdge(start, end) for start, ends in self._dict_graph.representation.items() for end in ends]
+        self._uut = CompactDirectedGraph(edges, self._get_distance_mock, vertices=[F])
+
+    def _act(self):
+        self._result = self._get_shortest_path_tree()
+        with patch.object(self._dict_graph, 'get_distance', side_effect=self._get_distance_mock):
+            self._expected_paths = {goal: self._dict_graph.get_shortest_path_a_star(self._start, goal, lambda *args: 0)
+                                    for goal in (A, B, C, D, E)}
+
+    def _get_shortest_path_tree(self):
+        goal_indices = None if self._goals is None else [self._uut.get_vertex_index(goal) for goal in self._goals]
+        index_tree = self._uut.get_shortest_index_path_tree(self._uut.get_vertex_index(self._start), self._max_cost,
+                                                            goal_indices)
+        return index_tree.map_vertices(self._uut.get_vertex)
+
+
+class TestDirectedGraph_SearchStatistics(TestCaseAAA):
+    """
+    Ensures the A* searches fill the statistics they are given, without altering their results.
+    The path to C is improved (A -> B -> C rather than A -> C) while C is queued: DirectedGraph decreases its priority,
+    while CompactDirectedGraph pushes another entry, the outdated one being popped before the goal D.
+    """
+
+    WEIGHTS = {(A, B): 1, (A, C): 5, (B, C): 1, (C, D): 10}
+    EXPECTED_QUEUE_OPERATIONS = {'heap_pushes': 4, 'heap_pops': 4, 'decreased_keys': 1, 'stale_pops': 0}
+
+    def setUp(self):
+        self._uut = DirectedGraph(generate_directed_edges(self.WEIGHTS.keys()))
+        self._uut.get_edge_weight = lambda start, end: self.WEIGHTS[(start, end)]
+
+    def _arrange(self, queries_count):
+        self._queries_count = queries_count
+        self._statistics = SearchStatistics()
+
+    def _act(self):
+        self._results = [self._uut.get_shortest_path_a_star(A, D, lambda *args: 0, self._statistics)
+                         for _ in range(self._queries_count)]
+
+    def _assert(self):
+        self.assertEqual(self._results, [[A, B, C, D]] * self._queries_count)
+
+        statistics = self._statistics.as_dict()
+        self.assertEqual(statistics['queries'], self._queries_count)
+        self.assertEqual(statistics['vertices_settled'], 4 * self._queries_count)
+        self.assertEqual(statistics['edges_scanned'], 4 * self._queries_count)
+        self.assertEqual(statistics['edges_relaxed'], 4 * self._queries_count)
+        self.assertEqual(statistics['peak_heap_size'], 2)
+        for name, expected_count in self.EXPECTED_QUEUE_OPERATIONS.items():
+            self.assertEqual(statistics[name], expected_count * self._queries_count)
+
+        self.assertTrue(set(['search', 'reconstruction']) <= statistics['phase_durations'].keys())
+
+    def test_one_query(self):
+        self._arrange(queries_count=1)
+        self._act()
+        self._assert()
+
+    def test_accumulated_queries(self):
+        self._arrange(queries_count=3)
+        self._act()
+        self._assert()
+
+
+class TestCompactDirectedGraph_SearchStatistics(TestDirectedGraph_SearchStatistics):
+    """ Runs the search statistics test case against CompactDirectedGraph, whose counters are partly derived. """
+
+    EXPECTED_QUEUE_OPERATIONS = {'heap_pushes': 5, 'heap_pops': 5, 'decreased_keys': 0, 'stale_pops': 1}
+
+    def setUp(self):
+        self._uut = CompactDirectedGraph(generate_directed_edges(self.WEIGHTS.keys()),
+                                         lambda start, end: self.WEIGHTS[(start, end)])
+
+
+class TestCompactDirectedGraph_Init(TestCaseAAA):
+    """ Ensures the compressed sparse row layout of CompactDirectedGraph instances is properly built. """
+
+    def _arrange(self, edge_tuples, vertices=()):
+        self._edges = generate_directed_edges(edge_tuples)
+        self._vertices = vertices
+
+    def _act(self):
+        self._uut = CompactDirectedGraph(self._edges, lambda *args: 1, self._vertices)
+
+    def _assert(self, expected_representation):
+        representation = {}
+        for index, vertex in enumerate(self._uut.vertices):
+            slots = range(self._uut.offsets[index], self._uut.offsets[index + 1])
+            representation[vertex] = set(self._uut.get_vertex(self._uut.targets[slot]) for slot in slots)
+
+        self.assertEqual(representation, expected_representation)
+
+    def test_empty(self):
+        self._arrange(edge_tuples=[])
+        self._act()
+        self._assert(expected_representation={})
+
+    def test_isolated_vertex(self):
+        self._arrange(edge_tuples=[(A, B)], vertices=[C])
+        self._act()
+        self._assert(expected_representation={A: set([B]),
+                                              B: set(),
+                                              C: set()})
+
+    def test_closed(self):
+        self._arrange(edge_tuples=[(A, B),
+                                   (C, B),
+                                   (B, A),
+                                   (A, C)])
+        self._act()
+        self._assert(expected_representation={A: set([B, C]),
+                                              B: set([A]),
+                                              C: set([B])})
+
+
+class TestCompactDirectedGraph_AStar(TestDirectedGraph_AStar):
+    """ Runs the DirectedGraph A* test case against CompactDirectedGraph, whose weights are computed when built. """
+
+    def setUp(self):
+        super(TestCompactDirectedGraph_AStar, self).setUp()
+        edges = generate_directed_edges([(A, B), (E, B),
+                                         (A, C), (C, A), (C, E),
+                                         (A, D), (D, A), (D, E), (E, D)])
+        self._uut = CompactDirectedGraph(edges, self._get_distance_mock)
+
+    def _act(self):
+        self._result_no_heuristic = self._uut.get_shortest_path_a_star(self._start, self._goal, lambda *args: 0)
+        self._result_exact_heuristic = self._uut.get_shortest_path_a_star(self._start, self._goal,
+                                                                          self._get_distance_mock)
+
+
+class TestCompactDirectedGraph_BidirectionalAStar(TestCompactDirectedGraph_AStar):
+    """ Runs the A* test case against the bidirectional variant of the algorithm, with a compact graph. """
+
+    def _get_shortest_path(self, cost_heuristic):
+        start_index, goal_index = self._uut.get_vertex_index(self._start), self._uut.get_vertex_index(self._goal)
+        index_path = self._uut.get_shortest_index_path_bidirectional_a_star(
+            start_index, goal_index,
+            lambda index: cost_heuristic(self._uut.get_vertex(index), self._goal),
+            lambda index: cost_heuristic(self._start, self._uut.get_vertex(index)))
+        return [self._uut.get_vertex(index) for index in index_path]
+
+    def _act(self):
+        self._result_no_heuristic = self._get_shortest_path(lambda *args: 0)
+        self._result_exact_heuristic = self._get_shortest_path(self._get_distance_mock)
+
+
+class TestCompactDirectedGraph_OneToMany(TestCompactDirectedGraph_AStar):
+    """
+    Ensures a single one-to-many sweep gives the same paths as the A* test case, and that its search data can be
+    reused across successive sweeps.
+    """
+
+    def _arrange(self, start, goals):
+        self._start = start
+        self._goals = goals
+
+    def _act(self):
+        goal_indices = [self._uut.get_vertex_index(goal) for goal in self._goals]
+        self._results = [self._uut.get_shortest_index_paths_from(self._uut.get_vertex_index(self._start),
+                                                                 goal_indices)
+                         for _ in range(2)]
+
+    def _assert(self, expected_paths):
+        for result in self._results:
+            self.assertEqual([[self._uut.get_vertex(index) for index in path] for path in result], expected_paths)
+
+    def test_no_path(self):
+        self._arrange(start=B, goals=[C, A])
+        self._act()
+        self._assert(expected_paths=[[], []])
+
+    def test_one_edge_one_path(self):
+        self._arrange(start=E, goals=[B])
+        self._act()
+        self._assert(expected_paths=[[E, B]])
+
+    def test_one_edge_two_paths(self):
+        self._arrange(start=C, goals=[E])
+        self._act()
+        self._assert(expected_paths=[[C, E]])
+
+    def test_two_edges_one_path(self):
+        self._arrange(start=E, goals=[A, D])
+        self._act()
+        self._assert(expected_paths=[[E, D, A], [E, D]])
+
+    def test_two_edges_two_paths(self):
+        self._arrange(start=A, goals=[E, B, D, A])
+        self._act()
+        self._assert(expected_paths=[[A, C, E], [A, B], [A, D], [A]])
+
+
+class TestShortestPathCache(TestCaseAAA):
+    """ Ensures the paths are looked up, evicted and invalidated as expected, and that the counters reflect it. """
+
+    def setUp(self):
+        self._uut = ShortestPathCache(capacity=2)
+        self._uut.get(A, E, version=0)
+        self._uut.put(A, E, [A, C, E])
+
+    def _arrange(self, start, goal, version=0):
+        self._start = start
+        self._goal = goal
+        self._version = version
+
+    def _act(self):
+        self._result = self._uut.get(self._start, self._goal, self._version)
+
+    def _assert(self, expected_path, expected_counters):
+        self.assertEqual(self._result, expected_path)
+        self.assertEqual((self._uut.hits, self._uut.prefix_hits, self._uut.misses, self._uut.evictions,
+                          self._uut.invalidations), expected_counters)
+
+    def test_hit(self):
+        self._arrange(start=A, goal=E)
+        self._act()
+        self._assert(expected_path=[A, C, E], expected_counters=(1, 0, 1, 0, 0))
+
+    def test_prefix_hit(self):
+        self._arrange(start=A, goal=C)
+        self._act()
+        self._assert(expected_path=[A, C], expected_counters=(1, 1, 1, 0, 0))
+
+    def test_miss(self):
+        self._arrange(start=C, goal=E)
+        self._act()
+        self._assert(expected_path=None, expected_counters=(0, 0, 2, 0, 0))
+
+    def test_no_path_hit(self):
+        self._uut.put(B, C, [])
+        self._arrange(start=B, goal=C)
+        self._act()
+        self._assert(expected_path=[], expected_counters=(1, 0, 1, 0, 0))
+
+    def test_eviction(self):
+        self._uut.put(E, A, [E, D, A])
+        self._uut.get(A, E, version=0)  # A -> E becomes the most recently used path
+        self._uut.put(C, A, [C, A])
+        self._arrange(start=E, goal=D)
+        self._act()
+        self._assert(expected_path=None, expected_counters=(1, 0, 2, 1, 0))
+
+    def test_invalidation(self):
+        self._arrange(start=A, goal=E, version=1)
+        self._act()
+        self._assert(expected_path=None, expected_counters=(0, 0, 2, 0, 1))
+
+    def test_repair_removed_edge(self):
+        self._uut.put(B, C, [])
+        self._uut.repair(previous_version=0, version=1, removed_edges_keys=[(C, E)])
+        self._arrange(start=B, goal=C, version=1)
+        self._act()
+        self._assert(expected_path=[], expected_counters=(1, 0, 1, 0, 0))
+        self._arrange(start=A, goal=E, version=1)
+        self._act()
+        self._assert(expected_path=None, expected_counters=(1, 0, 2, 0, 0))
+        self.assertEqual(self._uut.discarded, 1)
+
+    def test_repair_removed_vertex(self):
+        self._uut.put(B, C, [])
+        self._uut.repair(previous_version=0, version=1, removed_vertices_keys=[B])
+        self._arrange(start=A, goal=C, version=1)
+        self._act()
+        self._assert(expected_path=[A, C], expected_counters=(1, 1, 1, 0, 0))
+        self._arrange(start=B, goal=C, version=1)
+        self._act()
+        self._assert(expected_path=None, expected_counters=(1, 1, 2, 0, 0))
+
+    def test_repair_outdated(self):
+        self._uut.repair(previous_version=1, version=2)
+        self._arrange(start=A, goal=E, version=2)
+        self._act()
+        self._assert(expected_path=None, expected_counters=(0, 0, 2, 0, 1))
+
+
+class TestDirectedGraph_Version(TestCaseAAA):
+    """ Ensures the version of a graph changes whenever an edge is added. """
+
+    def _arrange(self):
+        self._uut = DirectedGraph(generate_directed_edges([(A, B)]))
+        self._initial_version = self._uut.version
+
+    def _act(self):
+        self._uut.add_edge(DirectedEdge(B, C))
+
+    def _assert(self):
+        self.assertGreater(self._uut.version, self._initial_version)
+
+    def test_add_edge(self):
+        self._arrange()
+        self._act()
+        self._assert()
+
+
+class TestDirectedGraph_Removal(TestCaseAAA):
+    """ Ensures the edges and vertices are removed from both representations of the graph. """
+
+    def _arrange(self):
+        self._uut = DirectedGraph(generate_directed_edges([(A, B), (B, A), (B, C), (C, C), (D, B)]))
+        self._initial_version = self._uut.version
+
+    def _assert(self, expected_representation, expected_reverse_representation):
+        self.assertEqual(self._uut.representation, expected_representation)
+        self.assertEqual(self._uut.reverse_representation, expected_reverse_representation)
+        self.assertGreater(self._uut.version, self._initial_version)
+
+    def test_remove_edge(self):
+        self._arrange()
+        self._uut.remove_edge(DirectedEdge(B, A))
+        self._assert(expected_representation={A: set([B]), B: set([C]), C: set([C]), D: set([B])},
+                     expected_reverse_representation={A: set(), B: set([A, D]), C: set([B, C]), D: set()})
+
+    def test_remove_vertex(self):
+        self._arrange()
+        self._uut.remove_vertex(B)
+        self._assert(expected_representation={A: set(), C: set([C]), D: set()},
+                     expected_reverse_representation={A: set(), C: set([C]), D: set()})
+
+    def test_remove_looping_vertex(self):
+        self._arrange()
+        self._uut.remove_vertex(C)
+        self._assert(expected_representation={A: set([B]), B: set([A]), D: set([B])},
+                     expected_reverse_representation={A: set([B]), B: set([A, D]), D: set()})
+
+    def test_remove_unknown_edge(self):
+        self._arrange()
+        self.assertRaises(KeyError, self._uut.remove_edge, DirectedEdge(A, C))
+
+
+class TestCompactDirectedGraph_Updates(TestCaseAAA):
+    """ Ensures the rows of a compact graph, and its reversed rows, remain consistent once changed in place. """
+
+    def _arrange(self, build_reverse_rows):
+        self._uut = CompactDirectedGraph(generate_directed_edges([(A, B), (B, C), (C, A), (A, C)]),
+                                         lambda *args: 1)
+        if build_reverse_rows:
+            self._uut.reverse_rows
+
+    def _act(self):
+        a, b, c = (self._uut.get_vertex_index(vertex) for vertex in (A, B, C))
+        d = self._uut.add_vertex(D)
+        self._uut.add_index_edge(d, a, 2)
+        self._uut.add_index_edge(b, d, 3)
+        self._uut.remove_index_edge(a, c)
+
+    def _assert(self):
+        edges = set()
+        for index, vertex in enumerate(self._uut.vertices):
+            for slot in range(self._uut.offsets[index], self._uut.offsets[index + 1]):
+                edges.add((vertex, self._uut.get_vertex(self._uut.targets[slot]), self._uut.weights[slot]))
+
+        reverse_offsets, sources, reverse_weights = self._uut.reverse_rows
+        reverse_edges = set()
+        for index, vertex in enumerate(self._uut.vertices):
+            for slot in range(reverse_offsets[index], reverse_offsets[index + 1]):
+                reverse_edges.add((self._uut.get_vertex(sources[slot]), vertex, reverse_weights[slot]))
+
+        self.assertEqual(edges, set([(A, B, 1), (B, C, 1), (C, A, 1), (D, A, 2), (B, D, 3)]))
+        self.assertEqual(reverse_edges, edges)
+        self.assertEqual(self._uut.get_shortest_path_a_star(C, D, lambda *args: 0), [C, A, B, D])
+
+    def test_without_reverse_rows(self):
+        self._arrange(build_reverse_rows=False)
+        self._act()
+        self._assert()
+
+    def test_with_reverse_rows(self):
+        self._arrange(build_reverse_rows=True)
+        self._act()
+        self._assert()
+
+    def test_remove_unknown_edge(self):
+        self._arrange(build_reverse_rows=False)
+        self.assertRaises(KeyError, self._uut.remove_index_edge, 0, 0)
+
+
+def get_simple_path_costs(weights, start, goal):
+    """ :return: Costs of all the loopless paths between the given vertices, by increasing cost """
+    costs = []
+
+    def explore(path, cost):
+        if path[-1] == goal:
+            costs.append(cost)
+            return
+        for (edge_start, edge_end), weight in weights.items():
+            if edge_start == path[-1] and edge_end not in path:
+                explore(path + [edge_end], cost + weight)
+
+    explore([start], 0.0)
+    return sorted(costs)
+
+
+class TestDirectedGraph_KShortestPaths(TestCaseAAA):
+    """
+    Ensures the paths found are loopless paths of the graph, distinct from each other, and the cheapest ones, as
+    found by enumerating all the loopless paths.
+    """
+
+    def _arrange(self, weights, start, goal, paths_count):
+        self._weights = weights
+        self._query = (start, goal, paths_count)
+
+    def _act(self):
+        uut = DirectedGraph(generate_directed_edges(self._weights.keys()))
+        with patch.object(uut, 'get_edge_weight', side_effect=lambda start, end: self._weights[(start, end)]):
+            self._result = uut.get_k_shortest_paths(*self._query)
+
+    def _assert(self):
+        start, goal, paths_count = self._query
+        expected_costs = get_simple_path_costs(self._weights, start, goal)[:paths_count]
+
+        costs = []
+        for path in self._result:
+            self.assertEqual((path[0], path[-1]), (start, goal))
+            self.assertEqual(len(set(path)), len(path))
+            costs.append(sum(self._weights[edge] for edge in zip(path, path[1:])))
+
+        self.assertEqual(len(set(map(tuple, self._result))), len(self._result))
+        self.assertEqual(len(costs), len(expected_costs))
+        for cost, expected_cost in zip(costs, expected_costs):
+            self.assertAlmostEqual(cost, expected_cost)
+
+    def test_alternatives(self):
+        self._arrange(weights={(A, B): 1, (B, E): 1, (A, C): 1, (C, E): 2, (A, D): 3, (D, E): 1, (B, C): 0.5,
+                               (C, B): 0.5},
+                      start=A, goal=E, paths_count=10)
+        self._act()
+        self._assert()
+
+    def test_fewer_paths(self):
+        self._arrange(weights={(A, B): 1, (B, C): 1, (A, C): 3}, start=A, goal=C, paths_count=5)
+        self._act()
+        self._assert()
+
+    def test_unreachable(self):
+        self._arrange(weights={(A, B): 1, (C, B): 1}, start=A, goal=C, paths_count=3)
+        self._act()
+        self._assert()
+
+    def test_same_vertex(self):
+        self._arrange(weights={(A, B): 1, (B, A): 1}, start=A, goal=A, paths_count=3)
+        self._act()
+        self._assert()
+
+    def test_random(self):
+        random_generator = random.Random(0)
+        for _ in range(20):
+            weights = {tuple(random_generator.sample(range(7), 2)): random_generator.randint(1, 5) for _ in range(18)}
+            self._arrange(weights, start=0, goal=6, paths_count=random_generator.randint(1, 12))
+            self._act()
+            self._assert()
+
+
+class TestCompactDirectedGraph_KShortestPaths(TestDirectedGraph_KShortestPaths):
+    """ Runs the k shortest paths test case against CompactDirectedGraph. """
+
+    def _act(self):
+        start, goal, paths_count = self._query
+        uut = CompactDirectedGraph(generate_directed_edges(self._weights.keys()),
+                                   lambda edge_start, edge_end: self._weights[(edge_start, edge_end)],
+                                   vertices=[start, goal])
+        index_paths = uut.get_k_shortest_index_paths(uut.get_vertex_index(start), uut.get_vertex_index(goal),
+                                                     paths_count)
+        self._result = [[uut.get_vertex(index) for index in index_path] for index_path in index_paths]
@@ -0,0 +1,129 @@
+import os
+import tempfile
+
+from src.graph import CompactDirectedGraph, DirectedEdge
+from src.landmarks import Landmarks, _interleave, compute_landmarks, load_landmarks, save_landmarks
+from src.tan_network import TanNetwork
+from utils_ut import EXAMPLE_ROUTES, EXAMPLE_STOPS, TestCaseAAA
+
+
+# Two one-way loops, linked both ways between vertices 0 and 4, plus an isolated vertex
+WEIGHTED_EDGES = [(0, 1, 1), (1, 2, 4), (2, 3, 1), (3, 0, 2),
+                  (4, 5, 2), (5, 6, 2), (6, 4, 3),
+                  (0, 4, 7), (4, 0, 1)]
+VERTICES_COUNT = 8
+
+
+class TestLandmarks_LowerBounds(TestCaseAAA):
+    """ Ensures the landmarks heuristic never overestimates the cost of the shortest paths, in both directions. """
+
+    def _arrange(self, landmarks_count):
+        weights = {(start, end): weight for start, end, weight in WEIGHTED_EDGES}
+        self._graph = CompactDirectedGraph([DirectedEdge(start, end) for start, end, _ in WEIGHTED_EDGES],
+                                           lambda start, end: weights[(start, end)], range(VERTICES_COUNT))
+        self._landmarks_count = landmarks_count
+
+    def _act(self):
+        self._uut = compute_landmarks(self._graph, self._landmarks_count)
+
+    def _assert(self):
+        self.assertEqual(len(set(self._uut.landmark_indices)), min(self._landmarks_count, VERTICES_COUNT))
+
+        for start in range(VERTICES_COUNT):
+            costs = self._graph.get_distances_from(start)
+            for goal in range(VERTICES_COUNT):
+                forward_bound = self._uut.build_index_heuristic(goal)(start)
+                backward_bound = self._uut.build_index_heuristic(start, reverse=True)(goal)
+                self.assertLessEqual(forward_bound, costs[goal])
+                self.assertLessEqual(backward_bound, costs[goal])
+                if start == goal:
+                    self.assertEqual(forward_bound, 0)
+
+    def test_one_landmark(self):
+        self._arrange(landmarks_count=1)
+        self._act()
+        self._assert()
+
+    def test_several_landmarks(self):
+        self._arrange(landmarks_count=3)
+        self._act()
+        self._assert()
+
+    def test_more_landmarks_than_vertices(self):
+        self._arrange(landmarks_count=20)
+        self._act()
+        self._assert()
+
+
+class TestLandmarks_Repair(TestCaseAAA):
+    """ Ensures the landmarks costs remain exact once repaired after the addition of a vertex and of edges. """
+
+    def _arrange(self, added_edges):
+        weights = {(start, end): weight for start, end, weight in WEIGHTED_EDGES}
+        self._graph = CompactDirectedGraph([DirectedEdge(start, end) for start, end, _ in WEIGHTED_EDGES],
+                                           lambda start, end: weights[(start, end)], range(VERTICES_COUNT))
+        self._uut = compute_landmarks(self._graph, landmarks_count=3)
+        self._added_edges = added_edges
+
+    def _act(self):
+        self._graph.add_vertex(VERTICES_COUNT)
+        self._uut.add_vertex()
+        self._repaired_count = 0
+        for added_edge in self._added_edges:
+            self._graph.add_index_edge(*added_edge)
+            self._repaired_count += self._uut.repair(self._graph, added_edge)
+
+    def _assert(self, expected_repaired_count):
+        self.assertEqual(self._repaired_count, expected_repaired_count)
+
+        expected_landmarks = Landmarks(self._uut.landmark_indices,
+                                       _interleave([self._graph.get_distances_from(index)
+                                                    for index in self._uut.landmark_indices], VERTICES_COUNT + 1),
+                                       _interleave([self._graph.get_distances_from(index, reverse=True)
+                                                    for index in self._uut.landmark_indices], VERTICES_COUNT + 1))
+        self.assertEqual(self._uut._costs_from_landmarks, expected_landmarks._costs_from_landmarks)
+        self.assertEqual(self._uut._costs_to_landmarks, expected_landmarks._costs_to_landmarks)
+
+    def test_useless_edge(self):
+        self._arrange(added_edges=[(0, 2, 10)])
+        self._act()
+        self._assert(expected_repaired_count=0)
+
+    def test_shortcut(self):
+        self._arrange(added_edges=[(2, 6, 0.5), (VERTICES_COUNT, 3, 1), (7, VERTICES_COUNT, 1)])
+        self._act()
+        self._assert(expected_repaired_count=7)
+
+
+class TestLandmarks_Persistence(TestCaseAAA):
+    """ Ensures saved landmarks are loaded back identically, and give the same paths as the straight line heuristic. """
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._file_path = os.path.join(self._directory.name, "network.landmarks")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _arrange(self):
+        self._tan_network = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES, compact=True)
+        self._landmarks = compute_landmarks(self._tan_network.compact_graph, landmarks_count=2)
+
+    def _act(self):
+        save_landmarks(self._landmarks, self._file_path)
+        self._uut = load_landmarks(self._file_path)
+
+    def _assert(self):
+        self.assertEqual(list(self._uut.landmark_indices), list(self._landmarks.landmark_indices))
+
+        expected_path = self._tan_network.get_shortest_path("StopArea:ABDU", "StopArea:ACHA")
+        self._tan_network.use_landmarks(self._uut)
+        for bidirectional in (False, True):
+            path = self._tan_network.get_shortest_path("StopArea:ABDU", "StopArea:ACHA", bidirectional)
+            self.assertEqual(path, expected_path)
+            self.assertEqual(self._tan_network.get_shortest_path("StopArea:ACHA", "StopArea:ABDU", bidirectional), [])
+
+    def test_round_trip(self):
+        self._arrange()
+        self._act()
+        self._assert()
@@ -1,5 +1,8 @@
-from src.main import solve_puzzle
-from utils_ut import TestCaseAAA
+import io
+
+from src.main import format_output, solve_puzzle, solve_puzzle_from_stream, write_output, write_outputs
+from src.tan_network import TanNetwork
+from utils_ut import EXAMPLE_ROUTES, EXAMPLE_STOPS, TestCaseAAA
 
 
 class TestFunctionnality(TestCaseAAA):
@@ -18,9 +21,15 @@ class TestFunctionnality(TestCaseAAA):
                                     self._goal_id_input,
                                     self._stops_input,
                                     self._routes_input)
+        self._result_compact = solve_puzzle(self._start_id_input,
+                                            self._goal_id_input,
+                                            self._stops_input,
+                                            self._routes_input,
+                                            compact=True)
 
     def _assert(self, expected_output):
         self.assertEqual(self._result, expected_output)
+        self.assertEqual(self._result_compact, expected_output)
 
     def test_example(self):
         self._arrange(start_id_input="StopArea:ABDU",
@@ -32,3 +41,51 @@ class TestFunctionnality(TestCaseAAA):
                                     "StopArea:ABLA StopArea:ACHA"])
         self._act()
         self._assert(expected_output="Abel Durand\nAvenue Blanche")
+
+
+class TestFunctionnality_Stream(TestFunctionnality):
+    """ Same as TestFunctionnality, the puzzle's input being read from a text stream. """
+
+    def _act(self):
+        input_lines = ([self._start_id_input, self._goal_id_input, str(len(self._stops_input))] + self._stops_input +
+                       [str(len(self._routes_input))] + self._routes_input)
+        input_text = "\n".join(input_lines) + "\n"
+
+        self._result = solve_puzzle_from_stream(io.StringIO(input_text))
+        self._result_compact = solve_puzzle_from_stream(io.StringIO(input_text), compact=True)
+
+
+class TestWriteOutput(TestCaseAAA):
+    """ Ensures the outputs written to a stream match the formatted ones, each one followed by a line break. """
+
+    def _arrange(self, stop_description_pairs):
+        tan_network = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES)
+        self._paths = [tan_network.get_shortest_path(start, goal) for start, goal in stop_description_pairs]
+
+    def _act(self):
+        self._results = []
+        for path in self._paths:
+            stream = io.StringIO()
+            write_output(path, stream)
+            self._results.append(stream.getvalue())
+
+        stream = io.StringIO()
+        write_outputs(self._paths, stream)
+        self._batch_result = stream.getvalue()
+
+    def _assert(self):
+        expected_outputs = [format_output(path) + "\n" for path in self._paths]
+        self.assertEqual(self._results, expected_outputs)
+        self.assertEqual(self._batch_result, "".join(expected_outputs))
+
+    def test_paths(self):
+        self._arrange(stop_description_pairs=[("StopArea:ABDU", "StopArea:ACHA"),
+                                              ("StopArea:ACHA", "StopArea:ABDU"),
+                                              ("StopArea:ABLA", "StopArea:ABLA")])
+        self._act()
+        self._assert()
+
+    def test_no_paths(self):
+        self._arrange(stop_description_pairs=[])
+        self._act()
+        self._assert()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+from multiprocessing.shared_memory import SharedMemory
+from unittest.mock import patch
+
+from src.parallel import ParallelQueryRunner
+from src.snapshot import load_snapshot, save_snapshot
+from src.tan_network import TanNetwork
+from utils_ut import EXAMPLE_ROUTES, EXAMPLE_STOPS, TestCaseAAA
+
+
+class TestParallelQueryRunner(TestCaseAAA):
+    """ Ensures the queries answered by worker processes match the serial ones, and keep the given order. """
+
+    def _arrange(self, stop_description_pairs, chunk_size, from_snapshot=False):
+        self._tan_network = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES, compact=True)
+        if from_snapshot:
+            # The network's tables are then memoryviews over the snapshot file, rather than arrays
+            with tempfile.TemporaryDirectory() as directory:
+                snapshot_path = os.path.join(directory, "network.snapshot")
+                save_snapshot(self._tan_network, snapshot_path)
+                self._tan_network = load_snapshot(snapshot_path)
+        self._stop_description_pairs = stop_description_pairs
+        self._chunk_size = chunk_size
+
+    def _act(self):
+        with ParallelQueryRunner(self._tan_network, workers_count=2, chunk_size=self._chunk_size) as uut:
+            self._result = uut.get_shortest_paths(self._stop_description_pairs)
+
+    def _assert(self):
+        # Compared by ids, as the stops of a snapshot are built anew on each access
+        self.assertEqual([[stop.id for stop in path] for path in self._result],
+                         [[stop.id for stop in path]
+                          for path in self._tan_network.get_shortest_paths(self._stop_description_pairs)])
+
+    def test_single_chunk(self):
+        self._arrange(stop_description_pairs=[("StopArea:ABDU", "StopArea:ACHA"),
+                                              ("StopArea:ACHA", "StopArea:ABDU")],
+                      chunk_size=256)
+        self._act()
+        self._assert()
+
+    def test_several_chunks(self):
+        self._arrange(stop_description_pairs=[("StopArea:ABDU", "StopArea:ACHA"),
+                                              ("StopArea:ABLA", "StopArea:ACHA"),
+                                              ("StopArea:ACHA", "StopArea:ABDU"),
+                                              ("StopArea:ABDU", "StopArea:ABLA"),
+                                              ("StopArea:ABDU", "StopArea:ABDU")],
+                      chunk_size=2)
+        self._act()
+        self._assert()
+
+    def test_snapshot(self):
+        self._arrange(stop_description_pairs=[("StopArea:ABDU", "StopArea:ACHA"),
+                                              ("StopArea:ACHA", "StopArea:ABDU"),
+                                              ("StopArea:ABLA", "StopArea:ACHA")],
+                      chunk_size=2, from_snapshot=True)
+        self._act()
+        self._assert()
+
+    def test_not_compact(self):
+        with self.assertRaises(ValueError):
+            ParallelQueryRunner(TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES))
+
+    def test_failed_start(self):
+        # No worker can be started: the shared memory block allocated beforehand is released
+        shared_memory_blocks = []
+
+        def create_shared_memory(**kwargs):
+            shared_memory_blocks.append(SharedMemory(**kwargs))
+            return shared_memory_blocks[-1]
+
+        with patch('src.parallel.SharedMemory', side_effect=create_shared_memory):
+            with self.assertRaises(ValueError):
+                ParallelQueryRunner(TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES, compact=True), workers_count=0)
+
+        self.assertEqual(len(shared_memory_blocks), 1)
+        with self.assertRaises(FileNotFoundError):
+            SharedMemory(name=shared_memory_blocks[0].name)
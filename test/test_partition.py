@@ -0,0 +1,194 @@
+import math
+import os
+import random
+import tempfile
+
+from benchmarks.generators import format_route, format_stop, generate_grid_network, generate_islands_network
+from src.partition import (PartitionCoordinator, PartitionedQueryEngine, build_partition, load_cell, load_overlay,
+                           load_partition, save_partition)
+from src.tan_network import TanNetwork
+from utils_ut import EXAMPLE_ROUTES, EXAMPLE_STOPS, TestCaseAAA
+
+
+def generate_random_network(stops_count, routes_count, random_generator):
+    """ :return: Descriptions of stops scattered at random, linked by one-way routes between random stops """
+    stops = [format_stop("R{}".format(index), "Stop {}".format(index), 47.2 + random_generator.random() / 10,
+                         -1.6 + random_generator.random() / 10)
+             for index in range(stops_count)]
+    routes = {format_route("R{}".format(random_generator.randrange(stops_count)),
+                           "R{}".format(random_generator.randrange(stops_count)))
+              for _ in range(routes_count)}
+
+    return stops, sorted(routes)
+
+
+def get_edge_weights(compact_graph):
+    return {(start, compact_graph.targets[slot]): compact_graph.weights[slot]
+            for start in range(len(compact_graph.offsets) - 1)
+            for slot in range(compact_graph.offsets[start], compact_graph.offsets[start + 1])}
+
+
+class TestPartition_Cells(TestCaseAAA):
+    """
+    Ensures every stop belongs to a single cell of bounded size, and that the boundary stops are exactly the stops
+    having routes to or from other cells.
+    """
+
+    def _arrange(self, stops, routes, max_cell_size):
+        self._tan_network = TanNetwork(stops, routes, compact=True)
+        self._max_cell_size = max_cell_size
+
+    def _act(self):
+        self._uut = build_partition(self._tan_network, self._max_cell_size)
+
+    def _assert(self, expected_cells_count):
+        stop_cells = self._uut.overlay.stop_cells
+        self.assertEqual(len(self._uut.cells), expected_cells_count)
+        self.assertEqual(self._uut.overlay.cells_count, expected_cells_count)
+
+        for cell_index, cell in enumerate(self._uut.cells):
+            self.assertLessEqual(len(cell.stops), self._max_cell_size)
+            self.assertTrue(all(stop_cells[stop_index] == cell_index for stop_index in cell.stops))
+        self.assertEqual(sorted(stop_index for cell in self._uut.cells for stop_index in cell.stops),
+                         sorted(self._tan_network.stop_indices.values()))
+
+        expected_boundary_stops = {stop_index for edge in get_edge_weights(self._tan_network.compact_graph)
+                                   if stop_cells[edge[0]] != stop_cells[edge[1]] for stop_index in edge}
+        self.assertEqual(sorted(self._uut.overlay.boundary_stops), sorted(expected_boundary_stops))
+        self.assertEqual(sorted(cell.stops[boundary_index] for cell in self._uut.cells
+                                for boundary_index in cell.boundary_indices),
+                         sorted(expected_boundary_stops))
+
+    def test_grid(self):
+        self._arrange(*generate_grid_network(10), max_cell_size=16)
+        self._act()
+        self._assert(expected_cells_count=8)
+
+    def test_square_cells(self):
+        # Bisecting along the longer side gives 4x4 cells, whose boundaries are the two middle rows and columns
+        self._arrange(*generate_grid_network(8), max_cell_size=16)
+        self._act()
+        self._assert(expected_cells_count=4)
+        self.assertEqual(len(self._uut.overlay.boundary_stops), 28)
+
+    def test_single_cell(self):
+        self._arrange(EXAMPLE_STOPS, EXAMPLE_ROUTES, max_cell_size=3)
+        self._act()
+        self._assert(expected_cells_count=1)
+
+    def test_removed_stop(self):
+        self._arrange(EXAMPLE_STOPS, EXAMPLE_ROUTES, max_cell_size=1)
+        self._tan_network.remove_stop("ABLA")
+        self._act()
+        self._assert(expected_cells_count=2)
+        self.assertEqual(self._uut.overlay.stop_cells[1], -1)
+
+    def test_not_compact(self):
+        with self.assertRaises(ValueError):
+            build_partition(TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES))
+
+
+class TestPartitionedQueryEngine(TestCaseAAA):
+    """
+    Ensures the paths found through the overlay are valid paths of the network, whose costs are the shortest ones;
+    including paths leaving their cell and coming back to it, and stops unreachable from each other.
+    """
+
+    def _arrange(self, stops, routes, max_cell_size, queries_count, seed=0):
+        self._tan_network = TanNetwork(stops, routes, compact=True)
+        self._max_cell_size = max_cell_size
+
+        random_generator = random.Random(seed)
+        stop_indices = sorted(self._tan_network.stop_indices.values())
+        self._queries = [(random_generator.choice(stop_indices), random_generator.choice(stop_indices))
+                         for _ in range(queries_count)]
+
+    def _act(self):
+        partition = build_partition(self._tan_network, self._max_cell_size)
+        uut = PartitionedQueryEngine(partition.overlay, partition.cells.__getitem__)
+        self._paths = [uut.get_shortest_index_path(*query) for query in self._queries]
+
+    def _assert(self):
+        graph = self._tan_network.compact_graph
+        edge_weights = get_edge_weights(graph)
+
+        for (start_index, goal_index), path in zip(self._queries, self._paths):
+            expected_cost = graph.get_distances_from(start_index)[goal_index]
+            if expected_cost == math.inf:
+                self.assertEqual(path, [])
+                continue
+
+            self.assertEqual((path[0], path[-1]), (start_index, goal_index))
+            self.assertAlmostEqual(sum(edge_weights[edge] for edge in zip(path, path[1:])), expected_cost)
+
+    def test_grid(self):
+        self._arrange(*generate_grid_network(12, bridge_rows=(0, 11)), max_cell_size=10, queries_count=200)
+        self._act()
+        self._assert()
+
+    def test_islands(self):
+        self._arrange(*generate_islands_network(3, 5), max_cell_size=8, queries_count=200)
+        self._act()
+        self._assert()
+
+    def test_random_one_way_routes(self):
+        random_generator = random.Random(1)
+        self._arrange(*generate_random_network(60, 150, random_generator), max_cell_size=6, queries_count=300)
+        self._act()
+        self._assert()
+
+    def test_single_cell(self):
+        self._arrange(EXAMPLE_STOPS, EXAMPLE_ROUTES, max_cell_size=8, queries_count=9)
+        self._act()
+        self._assert()
+
+
+class TestPartition_Files(TestCaseAAA):
+    """
+    Ensures the overlay and the cells saved into a directory are loaded back identically, and that queries answered by
+    worker processes each loading their own cells match the ones answered by a single process.
+    """
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _arrange(self, stops, routes, max_cell_size, queries):
+        self._tan_network = TanNetwork(stops, routes, compact=True)
+        self._partition = build_partition(self._tan_network, max_cell_size)
+        self._queries = queries
+
+    def _act(self):
+        save_partition(self._partition, self._directory.name)
+        self._loaded_partition = load_partition(self._directory.name)
+        with PartitionCoordinator(self._directory.name, workers_count=2) as uut:
+            self._paths = [uut.get_shortest_index_path(*query) for query in self._queries]
+
+    def _assert(self):
+        self.assertEqual(self._loaded_partition.overlay.sections, self._partition.overlay.sections)
+        self.assertEqual([cell.sections for cell in self._loaded_partition.cells],
+                         [cell.sections for cell in self._partition.cells])
+
+        engine = PartitionedQueryEngine(self._partition.overlay, self._partition.cells.__getitem__)
+        self.assertEqual(self._paths, [engine.get_shortest_index_path(*query) for query in self._queries])
+
+    def test_grid(self):
+        random_generator = random.Random(2)
+        self._arrange(*generate_grid_network(8), max_cell_size=10,
+                      queries=[(random_generator.randrange(64), random_generator.randrange(64)) for _ in range(50)])
+        self._act()
+        self._assert()
+
+    def test_independent_cells(self):
+        save_partition(build_partition(TanNetwork(*generate_grid_network(4), compact=True), 4), self._directory.name)
+        overlay = load_overlay(self._directory.name)
+        cell = load_cell(self._directory.name, overlay.stop_cells[5])
+        self.assertIn(5, cell.stops)
+
+    def test_invalid_file(self):
+        with open(os.path.join(self._directory.name, "overlay.partition"), "wb") as file_stream:
+            file_stream.write(b"NOTAPART" + bytes(8))
+        with self.assertRaises(ValueError):
+            load_overlay(self._directory.name)
@@ -0,0 +1,134 @@
+import random
+
+from benchmarks.generators import format_route, format_stop, generate_grid_network, generate_islands_network
+from src.main import format_output
+from src.reordering import get_breadth_first_order, get_hilbert_order, get_morton_order, reorder_network
+from src.tan_network import TanNetwork
+from utils_ut import EXAMPLE_ROUTES, EXAMPLE_STOPS, TestCaseAAA
+
+
+# Stops at the corners of a square, listed in an order none of the curves follows
+SQUARE_STOPS = [format_stop("NE", "North East", 1.0, 1.0),
+                format_stop("SW", "South West", 0.0, 0.0),
+                format_stop("SE", "South East", 0.0, 1.0),
+                format_stop("NW", "North West", 1.0, 0.0)]
+SQUARE_ROUTES = [format_route("NE", "SW"), format_route("SE", "NW")]
+
+
+class TestReordering_Orders(TestCaseAAA):
+    """ Ensures the orders are permutations of the stops indices following their curve, removed stops coming last. """
+
+    def _arrange(self, stops, routes, removed_stop_ids=()):
+        self._tan_network = TanNetwork(stops, routes, compact=True)
+        for stop_id in removed_stop_ids:
+            self._tan_network.remove_stop(stop_id)
+
+    def _act(self, get_order):
+        self._order = get_order(self._tan_network)
+
+    def _assert(self, expected_stop_ids, expected_removed_indices=()):
+        live_indices_count = len(self._tan_network.stop_indices)
+        self.assertEqual(sorted(self._order), list(range(self._tan_network.stops_count)))
+        self.assertEqual([self._tan_network.get_stop_from_index(index).id
+                          for index in self._order[:live_indices_count]], expected_stop_ids)
+        self.assertEqual(list(self._order[live_indices_count:]), list(expected_removed_indices))
+
+    def test_hilbert(self):
+        self._arrange(SQUARE_STOPS, SQUARE_ROUTES)
+        self._act(get_hilbert_order)
+        self._assert(expected_stop_ids=["SW", "NW", "NE", "SE"])
+
+    def test_morton(self):
+        self._arrange(SQUARE_STOPS, SQUARE_ROUTES)
+        self._act(get_morton_order)
+        self._assert(expected_stop_ids=["SW", "SE", "NW", "NE"])
+
+    def test_breadth_first(self):
+        # Each route is a separate part of the network, traversed both ways from its first stop
+        self._arrange(SQUARE_STOPS, SQUARE_ROUTES)
+        self._act(get_breadth_first_order)
+        self._assert(expected_stop_ids=["NE", "SW", "SE", "NW"])
+
+    def test_removed_stop(self):
+        for get_order in (get_hilbert_order, get_morton_order, get_breadth_first_order):
+            self._arrange(EXAMPLE_STOPS, EXAMPLE_ROUTES, removed_stop_ids=["ABLA"])
+            self._act(get_order)
+            self._assert(expected_stop_ids=["ABDU", "ACHA"], expected_removed_indices=[1])
+
+    def test_hilbert_grid(self):
+        # On a grid matching the curve's own, consecutive stops along the curve are neighbors
+        self._arrange(*generate_grid_network(8))
+        self._act(get_hilbert_order)
+        for index, next_index in zip(self._order, self._order[1:]):
+            self.assertEqual(abs(index % 8 - next_index % 8) + abs(index // 8 - next_index // 8), 1)
+
+
+class TestReordering_Network(TestCaseAAA):
+    """
+    Ensures a renumbered network answers the queries with the same paths as the original one, its stops, coordinates
+    and routes being laid out in the given order, and its indices mapping back to the original ones.
+    """
+
+    def _arrange(self, stops, routes, get_order, queries_count=100):
+        random_generator = random.Random(0)
+        stops = list(stops)
+        random_generator.shuffle(stops)
+        self._tan_network = TanNetwork(stops, routes, compact=True)
+        self._order = get_order(self._tan_network)
+
+        stop_ids = ["StopArea:" + stop_id for stop_id in self._tan_network.stop_indices]
+        self._queries = [(random_generator.choice(stop_ids), random_generator.choice(stop_ids))
+                         for _ in range(queries_count)]
+
+    def _act(self):
+        self._uut, self._original_indices = reorder_network(self._tan_network, self._order)
+
+    def _assert(self):
+        self.assertEqual(list(self._original_indices), list(self._order))
+        for new_index, original_index in enumerate(self._original_indices):
+            stop = self._uut.get_stop_from_index(new_index)
+            self.assertIs(stop, self._tan_network.get_stop_from_index(original_index))
+            self.assertEqual(self._uut.stop_indices[stop.id], new_index)
+            self.assertEqual([table[new_index] for table in self._uut.coordinates_table],
+                             [table[original_index] for table in self._tan_network.coordinates_table])
+
+        graph, original_graph = self._uut.compact_graph, self._tan_network.compact_graph
+        self.assertEqual(sorted((self._original_indices[start], self._original_indices[graph.targets[slot]],
+                                 graph.weights[slot])
+                                for start in range(len(graph.offsets) - 1)
+                                for slot in range(graph.offsets[start], graph.offsets[start + 1])),
+                         sorted((start, original_graph.targets[slot], original_graph.weights[slot])
+                                for start in range(len(original_graph.offsets) - 1)
+                                for slot in range(original_graph.offsets[start], original_graph.offsets[start + 1])))
+
+        for start, goal in self._queries:
+            path = self._uut.get_shortest_path(start, goal)
+            expected_path = self._tan_network.get_shortest_path(start, goal)
+            self.assertEqual(format_output(path) == "IMPOSSIBLE", format_output(expected_path) == "IMPOSSIBLE")
+            self.assertAlmostEqual(sum(map(TanNetwork.get_distance, path, path[1:])),
+                                   sum(map(TanNetwork.get_distance, expected_path, expected_path[1:])))
+
+    def test_hilbert(self):
+        self._arrange(*generate_grid_network(10, bridge_rows=(0,)), get_order=get_hilbert_order)
+        self._act()
+        self._assert()
+
+    def test_morton(self):
+        self._arrange(*generate_islands_network(3, 4), get_order=get_morton_order)
+        self._act()
+        self._assert()
+
+    def test_breadth_first(self):
+        self._arrange(*generate_islands_network(3, 4), get_order=get_breadth_first_order)
+        self._act()
+        self._assert()
+
+    def test_invalid_order(self):
+        tan_network = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES, compact=True)
+        for order in ([0, 1], [0, 1, 1], [0, 1, 3]):
+            with self.assertRaises(ValueError):
+                reorder_network(tan_network, order)
+
+    def test_not_compact(self):
+        with self.assertRaises(ValueError):
+            reorder_network(TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES), [0, 1, 2])
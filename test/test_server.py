@@ -0,0 +1,214 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+
+from src.server import QueryServer
+from src.snapshot import save_snapshot
+from src.tan_network import TanNetwork
+from utils_ut import EXAMPLE_ROUTES, EXAMPLE_STOPS, TestCaseAAA
+
+
+async def send_queries(address, request_lines, unix=False):
+    """ :return: Responses to the given request lines, sent at once on a single connection, by query id """
+    if unix:
+        reader, writer = await asyncio.open_unix_connection(address)
+    else:
+        reader, writer = await asyncio.open_connection(*address)
+
+    writer.write("".join(line + "\n" for line in request_lines).encode("utf-8"))
+    await writer.drain()
+
+    responses = {}
+    for _ in request_lines:
+        response = json.loads(await reader.readline())
+        responses[response["id"]] = response
+
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+def format_query(query_id, start, goal):
+    return json.dumps({"id": query_id, "start": start, "goal": goal})
+
+
+def crash_worker(start_id, goal_id):
+    """ Search ending its worker process abruptly, breaking the process pool """
+    os._exit(1)
+
+
+class TestQueryServer(TestCaseAAA):
+    """ Ensures the queries sent over a socket are answered like the network answers them, errors included. """
+
+    def _arrange(self, request_lines, compact=False, search=None):
+        self._tan_network = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES, compact)
+        self._request_lines = request_lines
+        self._search = search
+
+    def _act(self):
+        async def run():
+            uut = QueryServer(self._tan_network)
+            if self._search is not None:
+                uut._search = self._search
+            asyncio_server = await uut.start_tcp()
+            try:
+                return await send_queries(asyncio_server.sockets[0].getsockname(), self._request_lines)
+            finally:
+                await uut.close()
+
+        self._responses = asyncio.run(run())
+
+    def _assert(self, expected_responses):
+        self.assertEqual(self._responses, expected_responses)
+
+    def test_queries(self):
+        self._arrange(request_lines=[format_query(1, "StopArea:ABDU", "StopArea:ACHA"),
+                                     format_query(2, "StopArea:ACHA", "StopArea:ABDU")])
+        self._act()
+        self._assert(expected_responses={1: {"id": 1, "path": ["Abel Durand", "Avenue Blanche", "Angle Chaillou"]},
+                                         2: {"id": 2, "path": []}})
+
+    def test_compact(self):
+        self._arrange(request_lines=[format_query("a", "StopArea:ABLA", "StopArea:ACHA")], compact=True)
+        self._act()
+        self._assert(expected_responses={"a": {"id": "a", "path": ["Avenue Blanche", "Angle Chaillou"]}})
+
+    def test_errors(self):
+        self._arrange(request_lines=[format_query(1, "StopArea:ABDU", "StopArea:UNKNOWN"),
+                                     format_query(2, "ABDU", "StopArea:ACHA"),
+                                     json.dumps({"id": 3, "start": "StopArea:ABDU"}),
+                                     "not json",
+                                     format_query(4, "StopArea:ABDU", "StopArea:ABLA")])
+        self._act()
+        self._assert(expected_responses={
+            1: {"id": 1, "error": "Unknown stop id: 'UNKNOWN'"},
+            2: {"id": 2, "error": "Invalid stop id description: 'ABDU'"},
+            3: {"id": 3, "error": "Queries require start and goal stops descriptions"},
+            None: {"id": None, "error": "Expecting value: line 1 column 1 (char 0)"},
+            4: {"id": 4, "path": ["Abel Durand", "Avenue Blanche"]}})
+
+    def test_failed_search(self):
+        def failing_search(start_id, goal_id):
+            raise RuntimeError("Search data corrupted")
+
+        self._arrange(request_lines=[format_query(1, "StopArea:ABDU", "StopArea:ACHA"),
+                                     format_query(2, "StopArea:ABLA", "StopArea:UNKNOWN")],
+                      search=failing_search)
+        self._act()
+        self._assert(expected_responses={1: {"id": 1, "error": "Search failed: Search data corrupted"},
+                                         2: {"id": 2, "error": "Search failed: Search data corrupted"}})
+
+
+class TestQueryServer_Flow(TestCaseAAA):
+    """
+    Ensures identical queries in flight share a single search, and that a connection is not read any further once it
+    has too many queries in flight.
+    The searches are held back until every query that can be read has been read.
+    """
+
+    def _arrange(self, request_lines, max_pending_queries):
+        self._uut = QueryServer(TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES), max_pending_queries)
+        self._request_lines = request_lines
+        self._searches_released = threading.Event()
+
+    def _act(self):
+        search = self._uut._search
+
+        def held_back_search(*stop_ids):
+            self._searches_released.wait()
+            return search(*stop_ids)
+
+        self._uut._search = held_back_search
+
+        async def run():
+            asyncio_server = await self._uut.start_tcp()
+            try:
+                responses_task = asyncio.create_task(
+                    send_queries(asyncio_server.sockets[0].getsockname(), self._request_lines))
+                await asyncio.sleep(0.2)
+                self._queries_count_held_back = self._uut.queries_count
+                self._searches_released.set()
+                self._responses = await responses_task
+            finally:
+                await self._uut.close()
+
+        asyncio.run(run())
+
+    def _assert(self, expected_queries_count_held_back, expected_searches_count):
+        self.assertEqual(self._queries_count_held_back, expected_queries_count_held_back)
+        self.assertEqual(self._uut.queries_count, len(self._request_lines))
+        self.assertEqual(self._uut.searches_count, expected_searches_count)
+        self.assertEqual(len(self._responses), len(self._request_lines))
+
+    def test_coalescing(self):
+        self._arrange(request_lines=[format_query(1, "StopArea:ABDU", "StopArea:ACHA"),
+                                     format_query(2, "StopArea:ABDU", "StopArea:ACHA"),
+                                     format_query(3, "StopArea:ABDU StopArea:ABLA", "StopArea:ACHA"),
+                                     format_query(4, "StopArea:ABLA", "StopArea:ACHA")],
+                      max_pending_queries=64)
+        self._act()
+        self._assert(expected_queries_count_held_back=4, expected_searches_count=2)
+
+    def test_backpressure(self):
+        self._arrange(request_lines=[format_query(1, "StopArea:ABDU", "StopArea:ACHA"),
+                                     format_query(2, "StopArea:ABLA", "StopArea:ACHA"),
+                                     format_query(3, "StopArea:ACHA", "StopArea:ABDU")],
+                      max_pending_queries=2)
+        self._act()
+        self._assert(expected_queries_count_held_back=2, expected_searches_count=3)
+
+
+class TestQueryServer_Snapshot(TestCaseAAA):
+    """ Ensures the queries are answered by worker processes memory mapping a snapshot, over a Unix socket. """
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._snapshot_path = os.path.join(self._directory.name, "network.snapshot")
+        self._socket_path = os.path.join(self._directory.name, "server.socket")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _arrange(self, request_lines, search=None):
+        save_snapshot(TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES, compact=True), self._snapshot_path)
+        self._request_lines = request_lines
+        self._search = search
+
+    def _act(self):
+        async def run():
+            uut = QueryServer.from_snapshot(self._snapshot_path, workers_count=2)
+            if self._search is not None:
+                uut._search = self._search
+            await uut.start_unix(self._socket_path)
+            try:
+                return await send_queries(self._socket_path, self._request_lines, unix=True)
+            finally:
+                await uut.close()
+
+        self._responses = asyncio.run(run())
+
+    def _assert(self, expected_responses):
+        self.assertEqual(self._responses, expected_responses)
+
+    def test_queries(self):
+        self._arrange(request_lines=[format_query(1, "StopArea:ABDU", "StopArea:ACHA"),
+                                     format_query(2, "StopArea:ABDU", "StopArea:UNKNOWN"),
+                                     format_query(3, "StopArea:ACHA", "StopArea:ACHA")])
+        self._act()
+        self._assert(expected_responses={1: {"id": 1, "path": ["Abel Durand", "Avenue Blanche", "Angle Chaillou"]},
+                                         2: {"id": 2, "error": "Unknown stop id: 'UNKNOWN'"},
+                                         3: {"id": 3, "path": ["Angle Chaillou"]}})
+
+    def test_crashed_worker(self):
+        # Every query is answered with an error, the connection going on once the process pool is broken
+        self._arrange(request_lines=[format_query(1, "StopArea:ABDU", "StopArea:ACHA"),
+                                     format_query(2, "StopArea:ABLA", "StopArea:ACHA"),
+                                     format_query(3, "StopArea:ABDU", "StopArea:UNKNOWN")],
+                      search=crash_worker)
+        self._act()
+        self.assertEqual(sorted(self._responses), [1, 2, 3])
+        for query_id, response in self._responses.items():
+            self.assertEqual(set(response), {"id", "error"})
+            self.assertTrue(response["error"].startswith("Search failed: "))
@@ -0,0 +1,93 @@
+import os
+import tempfile
+
+from src.snapshot import get_snapshot_network_version, load_snapshot, save_snapshot
+from src.tan_network import TanNetwork
+from utils_ut import EXAMPLE_ROUTES, EXAMPLE_STOPS, TestCaseAAA
+
+
+class TestSnapshot(TestCaseAAA):
+    """ Ensures a network loaded from a snapshot answers the same queries as the network it was saved from. """
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._file_path = os.path.join(self._directory.name, "network.snapshot")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _arrange(self, stop_description_pairs):
+        self._tan_network = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES, compact=True)
+        self._stop_description_pairs = stop_description_pairs
+
+    def _act(self):
+        save_snapshot(self._tan_network, self._file_path)
+        self._uut = load_snapshot(self._file_path)
+
+    def _assert(self):
+        for start, goal in self._stop_description_pairs:
+            expected_path = self._tan_network.get_shortest_path(start, goal)
+            path = self._uut.get_shortest_path(start, goal)
+            self.assertEqual([self._get_fields(stop) for stop in path],
+                             [self._get_fields(stop) for stop in expected_path])
+
+    @staticmethod
+    def _get_fields(stop):
+        return stop.id, stop.name, stop.latitude, stop.longitude
+
+    def test_queries(self):
+        self._arrange(stop_description_pairs=[("StopArea:ABDU", "StopArea:ACHA"),
+                                              ("StopArea:ACHA", "StopArea:ABDU"),
+                                              ("StopArea:ABLA", "StopArea:ABLA")])
+        self._act()
+        self._assert()
+
+    def test_unknown_stop(self):
+        self._arrange(stop_description_pairs=[])
+        self._act()
+        with self.assertRaises(KeyError):
+            self._uut.get_stop_from_id("ABCD")
+
+    def test_not_a_snapshot(self):
+        with open(self._file_path, "wb") as file_stream:
+            file_stream.write(bytes(64))
+
+        with self.assertRaises(ValueError):
+            load_snapshot(self._file_path)
+
+
+class TestSnapshot_Updates(TestCaseAAA):
+    """ Ensures the snapshots of changed networks hold their changes and version, and can be changed once loaded. """
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._file_path = os.path.join(self._directory.name, "network.snapshot")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _arrange(self):
+        self._tan_network = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES, compact=True)
+        self._tan_network.remove_stop("ABLA")
+        self._tan_network.add_stop('StopArea:ZZZZ,"Zenith",,47.20000000,-1.60000000,,,1,')
+        self._tan_network.add_route("StopArea:ABDU StopArea:ZZZZ")
+
+    def _act(self):
+        save_snapshot(self._tan_network, self._file_path)
+        self._uut = load_snapshot(self._file_path)
+        self._uut.add_route("StopArea:ZZZZ StopArea:ACHA")
+
+    def _assert(self):
+        self.assertEqual(get_snapshot_network_version(self._file_path), self._tan_network.version)
+        self.assertEqual(self._uut.version, self._tan_network.version + 1)
+        self.assertEqual(len(self._uut.stop_indices), 3)
+        with self.assertRaises(KeyError):
+            self._uut.get_stop_from_id("ABLA")
+
+        path = self._uut.get_shortest_path("StopArea:ABDU", "StopArea:ACHA")
+        self.assertEqual([stop.name for stop in path], ["Abel Durand", "Zenith", "Angle Chaillou"])
+
+    def test_updates(self):
+        self._arrange()
+        self._act()
+        self._assert()
@@ -0,0 +1,113 @@
+import math
+import random
+
+from src.spatial_index import SpatialIndex, build_spatial_index
+from src.tan_network import EARTH_RADIUS_KM, TanNetwork
+from utils_ut import EXAMPLE_ROUTES, EXAMPLE_STOPS, TestCaseAAA
+
+
+def get_distance(latitude_1, longitude_1, latitude_2, longitude_2):
+    x = (longitude_2 - longitude_1) * math.cos((latitude_1 + latitude_2) / 2)
+    y = latitude_2 - latitude_1
+    return math.sqrt(x*x + y*y) * EARTH_RADIUS_KM
+
+
+class TestSpatialIndex_Lookups(TestCaseAAA):
+    """ Ensures the nearest stops and bounding box lookups give the same results as exhaustive scans. """
+
+    def _arrange(self, stops_count, clustered=False):
+        random_generator = random.Random(stops_count)
+        spread = 0.001 if clustered else 0.05
+        self._latitudes = [47.2 + random_generator.uniform(0, spread) for _ in range(stops_count)]
+        self._longitudes = [-1.6 + random_generator.uniform(0, spread) for _ in range(stops_count)]
+        self._points = [(47.2 + random_generator.uniform(-0.02, 0.07), -1.6 + random_generator.uniform(-0.02, 0.07))
+                        for _ in range(30)]
+        self._indices = list(range(stops_count))
+
+    def _act(self):
+        self._uut = SpatialIndex(self._latitudes, self._longitudes, self._indices)
+
+    def _assert(self):
+        self.assertEqual(len(self._uut), len(self._indices))
+        for latitude, longitude in self._points:
+            expected_nearest = sorted((get_distance(latitude, longitude, self._latitudes[index],
+                                                    self._longitudes[index]), index) for index in self._indices)
+            for count in (1, 5):
+                nearest = self._uut.get_nearest_stop_indices(latitude, longitude, count)
+                self.assertEqual([index for index, _ in nearest], [index for _, index in expected_nearest[:count]])
+                for (_, distance), (expected_distance, _) in zip(nearest, expected_nearest):
+                    self.assertAlmostEqual(distance, expected_distance)
+
+            box = (latitude - 0.01, longitude - 0.02, latitude + 0.01, longitude + 0.02)
+            self.assertEqual(self._uut.get_stop_indices_within(*box),
+                             [index for index in self._indices
+                              if box[0] <= self._latitudes[index] <= box[2] and
+                              box[1] <= self._longitudes[index] <= box[3]])
+
+    def test_empty(self):
+        self._arrange(stops_count=0)
+        self._act()
+        self._assert()
+
+    def test_single_stop(self):
+        self._arrange(stops_count=1)
+        self._act()
+        self._assert()
+
+    def test_many_stops(self):
+        self._arrange(stops_count=500)
+        self._act()
+        self._assert()
+
+    def test_clustered_stops(self):
+        self._arrange(stops_count=200, clustered=True)
+        self._act()
+        self._assert()
+
+    def test_updates(self):
+        self._arrange(stops_count=200)
+        self._act()
+        for index in range(0, 200, 3):
+            self._uut.remove(index)
+            self._indices.remove(index)
+        for latitude, longitude in [(47.3, -1.7), (47.21, -1.59), (47.1, -1.5)]:
+            self._uut.add(len(self._latitudes), latitude, longitude)
+            self._indices.append(len(self._latitudes))
+            self._latitudes.append(latitude)
+            self._longitudes.append(longitude)
+        self._assert()
+
+
+class TestSpatialIndex_TanNetwork(TestCaseAAA):
+    """ Ensures networks route between coordinates through their closest stops, kept up to date by network changes. """
+
+    def _arrange(self, compact):
+        self._uut = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES, compact)
+        self._uut.use_spatial_index(build_spatial_index(self._uut))
+
+    def _act(self):
+        self._path = self._uut.get_shortest_path_between_coordinates(47.2203, -1.6032, 47.2697, -1.5722)
+        self._uut.remove_stop("ACHA")
+        self._uut.add_stop('StopArea:ZZZZ,"Zenith",,47.27000000,-1.57000000,,,1,')
+        self._nearest = self._uut.get_nearest_stops(47.2697, -1.5722, count=5)
+        self._within = self._uut.get_stops_within(47.2, -1.61, 47.225, -1.58)
+
+    def _assert(self):
+        self.assertEqual([stop.name for stop in self._path], ["Abel Durand", "Avenue Blanche", "Angle Chaillou"])
+        self.assertEqual([stop.name for stop in self._nearest], ["Zenith", "Avenue Blanche", "Abel Durand"])
+        self.assertEqual([stop.name for stop in self._within], ["Abel Durand"])
+
+    def test_dict_graph(self):
+        self._arrange(compact=False)
+        self._act()
+        self._assert()
+
+    def test_compact_graph(self):
+        self._arrange(compact=True)
+        self._act()
+        self._assert()
+
+    def test_no_spatial_index(self):
+        self._uut = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES)
+        with self.assertRaises(ValueError):
+            self._uut.get_nearest_stops(47.2203, -1.6032)
@@ -1,5 +1,10 @@
-from src.tan_network import TanStop
-from utils_ut import TestCaseAAA
+import math
+
+from benchmarks.generators import format_route, format_stop, generate_grid_network
+from src.graph import DirectedEdge
+from src.landmarks import compute_landmarks
+from src.tan_network import TanNetwork, TanStop
+from utils_ut import EXAMPLE_ROUTES, EXAMPLE_STOPS, TestCaseAAA
 
 
 class TestTanStop_Init(TestCaseAAA):
@@ -15,10 +20,10 @@ class TestTanStop_Init(TestCaseAAA):
         self._uut = TanStop(self._input_string)
 
     def _assert(self, expected_attributes):
-        uut_attributes = vars(self._uut)
-
         for attribute_key, expected_value in expected_attributes.items():
-            self.assertEqual(uut_attributes[attribute_key], expected_value)
+            self.assertEqual(getattr(self._uut, attribute_key), expected_value)
+
+        self.assertFalse(hasattr(self._uut, '__dict__'))
 
     def test_stop_example_1(self):
         self._arrange(input_string='StopArea:ABDU,"Abel Durand",,47.22019661,-1.60337553,,,1,')
@@ -43,3 +48,353 @@ class TestTanStop_Init(TestCaseAAA):
                                           'name': 'Angle Chaillou',
                                           'latitude': 47.26979248,
                                           'longitude': -1.57206627})
+
+
+class TestTanStop_ExtractId(TestCaseAAA):
+    """ Ensures the extraction of stops ids from their descriptions, as found in the stops and routes descriptions. """
+
+    def _arrange(self, string):
+        self._string = string
+
+    def _act(self):
+        self._result = TanStop.extract_field_value('id', self._string)
+
+    def _assert(self, expected_id):
+        self.assertEqual(self._result, expected_id)
+
+    def test_stop_field(self):
+        self._arrange(string='StopArea:ABDU')
+        self._act()
+        self._assert(expected_id='ABDU')
+
+    def test_route(self):
+        self._arrange(string='StopArea:ABDU StopArea:ABLA')
+        self._act()
+        self._assert(expected_id='ABDU')
+
+    def test_invalid(self):
+        for string in ['ABDU', 'StopArea:', 'StopArea: ABDU']:
+            self._arrange(string=string)
+            with self.assertRaises(ValueError):
+                self._act()
+
+
+class TestTanNetwork_Distances(TestCaseAAA):
+    """ Ensures the batched distances computation matches the puzzle's formula, as implemented by get_distance. """
+
+    def _arrange(self, start_indices, end_indices):
+        self._uut = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES)
+        self._start_indices = start_indices
+        self._end_indices = end_indices
+
+    def _act(self):
+        self._result = self._uut.get_distances(self._start_indices, self._end_indices)
+
+    def _assert(self):
+        stops = [self._uut.get_stop_from_id(stop_id) for stop_id in ['ABDU', 'ABLA', 'ACHA']]
+        expected_distances = [TanNetwork.get_distance(stops[start_index], stops[end_index])
+                              for start_index, end_index in zip(self._start_indices, self._end_indices)]
+
+        self.assertEqual(list(self._result), expected_distances)
+
+    def test_routes(self):
+        self._arrange(start_indices=[0, 1], end_indices=[1, 2])
+        self._act()
+        self._assert()
+
+    def test_all_pairs(self):
+        self._arrange(start_indices=[0, 0, 0, 1, 1, 1, 2, 2, 2], end_indices=[0, 1, 2, 0, 1, 2, 0, 1, 2])
+        self._act()
+        self._assert()
+
+
+class TestTanNetwork_ShortestPaths(TestCaseAAA):
+    """ Ensures the batch queries give the same results as individual ones, for both graph representations. """
+
+    def _arrange(self, stop_description_pairs):
+        self._stop_description_pairs = stop_description_pairs
+
+    def _act(self):
+        self._results = [TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES, compact).get_shortest_paths(
+                         self._stop_description_pairs) for compact in (False, True)]
+
+    def _assert(self, expected_names):
+        for result in self._results:
+            self.assertEqual([[stop.name for stop in path] for path in result], expected_names)
+
+    def test_shared_start(self):
+        self._arrange(stop_description_pairs=[("StopArea:ABDU", "StopArea:ACHA"),
+                                              ("StopArea:ABDU", "StopArea:ABLA"),
+                                              ("StopArea:ABDU", "StopArea:ABDU")])
+        self._act()
+        self._assert(expected_names=[["Abel Durand", "Avenue Blanche", "Angle Chaillou"],
+                                     ["Abel Durand", "Avenue Blanche"],
+                                     ["Abel Durand"]])
+
+    def test_mixed_starts(self):
+        self._arrange(stop_description_pairs=[("StopArea:ABLA", "StopArea:ACHA"),
+                                              ("StopArea:ACHA", "StopArea:ABDU"),
+                                              ("StopArea:ABDU", "StopArea:ACHA"),
+                                              ("StopArea:ABLA", "StopArea:ABDU")])
+        self._act()
+        self._assert(expected_names=[["Avenue Blanche", "Angle Chaillou"],
+                                     [],
+                                     ["Abel Durand", "Avenue Blanche", "Angle Chaillou"],
+                                     []])
+
+
+class TestTanNetwork_StopWithoutRoutes(TestCaseAAA):
+    """ Ensures both graph representations answer the same for stops listed in the input but having no routes. """
+
+    def _arrange(self):
+        self._stop_descriptions = ["StopArea:ABDU", "StopArea:ABLA", "StopArea:ACHA"]
+
+    def _act(self):
+        self._results = []
+        for compact in (False, True):
+            uut = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES[:1], compact)  # Angle Chaillou has no routes
+            self._results.append([[stop.name for stop in uut.get_shortest_path(start, goal)]
+                                  for start in self._stop_descriptions for goal in self._stop_descriptions])
+
+    def _assert(self, expected_names):
+        for result in self._results:
+            self.assertEqual(result, expected_names)
+
+    def test_all_pairs(self):
+        self._arrange()
+        self._act()
+        self._assert(expected_names=[["Abel Durand"], ["Abel Durand", "Avenue Blanche"], [],
+                                     [], ["Avenue Blanche"], [],
+                                     [], [], ["Angle Chaillou"]])
+
+
+class TestTanNetwork_PathCache(TestCaseAAA):
+    """ Ensures the cached paths are the searched ones, and are dropped once the network changes. """
+
+    def _arrange(self):
+        self._uut = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES)
+        self._cache = self._uut.enable_path_cache(capacity=8)
+
+    def _act(self, start, goal):
+        self._result = [stop.name for stop in self._uut.get_shortest_path(start, goal)]
+
+    def _assert(self, expected_names, expected_hits, expected_misses):
+        self.assertEqual(self._result, expected_names)
+        self.assertEqual((self._cache.hits, self._cache.misses), (expected_hits, expected_misses))
+
+    def test_prefix(self):
+        self._arrange()
+        self._act("StopArea:ABDU", "StopArea:ACHA")
+        self._assert(["Abel Durand", "Avenue Blanche", "Angle Chaillou"], expected_hits=0, expected_misses=1)
+        self._act("StopArea:ABDU", "StopArea:ABLA")
+        self._assert(["Abel Durand", "Avenue Blanche"], expected_hits=1, expected_misses=1)
+
+    def test_network_change(self):
+        self._arrange()
+        self._act("StopArea:ACHA", "StopArea:ABDU")
+        self._assert([], expected_hits=0, expected_misses=1)
+
+        self._uut.add_edge(DirectedEdge(self._uut.get_stop_from_id("ACHA"), self._uut.get_stop_from_id("ABDU")))
+        self._act("StopArea:ACHA", "StopArea:ABDU")
+        self._assert(["Angle Chaillou", "Abel Durand"], expected_hits=0, expected_misses=2)
+
+    def test_repair(self):
+        self._arrange()
+        self._act("StopArea:ABDU", "StopArea:ABLA")
+        self._assert(["Abel Durand", "Avenue Blanche"], expected_hits=0, expected_misses=1)
+
+        self._uut.add_stop('StopArea:ZZZZ,"Zenith",,47.20000000,-1.60000000,,,1,')
+        self._uut.remove_route("StopArea:ABLA StopArea:ACHA")
+        self._act("StopArea:ABDU", "StopArea:ABLA")
+        self._assert(["Abel Durand", "Avenue Blanche"], expected_hits=1, expected_misses=1)
+        self._act("StopArea:ABLA", "StopArea:ACHA")
+        self._assert([], expected_hits=1, expected_misses=2)
+
+
+class TestTanNetwork_Updates(TestCaseAAA):
+    """
+    Ensures the networks changed in place answer like networks built from scratch from the changed descriptions, for
+    both graph representations, along with their path cache and landmarks.
+    """
+
+    def _arrange(self, compact):
+        self._stops, self._routes = generate_grid_network(4)
+        self._uut = TanNetwork(self._stops, self._routes, compact)
+        self._uut.enable_path_cache(capacity=64)
+        if compact:
+            self._uut.use_landmarks(compute_landmarks(self._uut.compact_graph, landmarks_count=2))
+        self._answer_all_queries()  # Fills the path cache
+
+    def _act(self):
+        self._initial_version = self._uut.version
+
+        self._uut.remove_route("StopArea:S1_1 StopArea:S1_2")
+        self._uut.remove_stop("S2_2")
+        self._uut.add_stop(format_stop("T", "Tunnel", 47.2005, -1.599))
+        self._uut.add_route(format_route("S0_0", "T"))
+        self._uut.add_route(format_route("T", "S3_3"))
+        self._uut.add_route(format_route("T", "S3_3"))  # Already part of the network
+
+        self._routes = [route for route in self._routes
+                        if route != "StopArea:S1_1 StopArea:S1_2" and "StopArea:S2_2" not in route.split()]
+        self._routes += [format_route("S0_0", "T"), format_route("T", "S3_3")]
+        self._stops = [stop for stop in self._stops if not stop.startswith("StopArea:S2_2,")]
+        self._stops.append(format_stop("T", "Tunnel", 47.2005, -1.599))
+
+    def _assert(self):
+        self.assertEqual(self._uut.version, self._initial_version + 5)
+        self.assertRaises(KeyError, self._uut.get_shortest_path, "StopArea:S2_2", "StopArea:S0_0")
+
+        expected_network = TanNetwork(self._stops, self._routes)
+        self.assertEqual(self._answer_all_queries(), self._answer_all_queries(expected_network))
+
+    def _answer_all_queries(self, tan_network=None):
+        tan_network = tan_network or self._uut
+        stop_ids = [stop.split(',', 1)[0] for stop in self._stops]
+        return [round(sum(TanNetwork.get_distance(start, end) for start, end in zip(path, path[1:])), 9)
+                if path else None
+                for path in (tan_network.get_shortest_path(start, goal) for start in stop_ids for goal in stop_ids)]
+
+    def test_dict_graph(self):
+        self._arrange(compact=False)
+        self._act()
+        self._assert()
+
+    def test_compact_graph(self):
+        self._arrange(compact=True)
+        self._act()
+        self._assert()
+
+    def test_stop_without_routes(self):
+        for compact in (False, True):
+            uut = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES[:1], compact)  # Angle Chaillou has no routes
+            uut.remove_stop("ACHA")
+            self.assertRaises(KeyError, uut.get_stop_from_id, "ACHA")
+            self.assertEqual([stop.name for stop in uut.get_shortest_path("StopArea:ABDU", "StopArea:ABLA")],
+                             ["Abel Durand", "Avenue Blanche"])
+
+    def test_existing_stop(self):
+        self._arrange(compact=True)
+        self.assertRaises(ValueError, self._uut.add_stop, self._stops[0])
+
+    def test_unknown_route(self):
+        self._arrange(compact=True)
+        self.assertRaises(KeyError, self._uut.remove_route, "StopArea:S0_0 StopArea:S3_3")
+
+
+class TestTanNetwork_ShortestPathTree(TestCaseAAA):
+    """ Ensures a shortest path tree holds the stops within the given distance, along with their shortest paths. """
+
+    def _arrange(self, compact, max_distance):
+        self._stops, routes = generate_grid_network(5)
+        self._tan_network = TanNetwork(self._stops, routes, compact)
+        self._max_distance = max_distance
+
+    def _act(self):
+        self._uut = self._tan_network.get_shortest_path_tree("StopArea:S1_2", self._max_distance)
+
+    def _assert(self):
+        for stop_description in self._stops:
+            stop_id = stop_description.split(',', 1)[0]
+            path = self._tan_network.get_shortest_path("StopArea:S1_2", stop_id)
+            stop = self._tan_network.get_stop_from_string(stop_id)
+            distance = self._get_length(path)
+
+            if distance <= self._max_distance:
+                tree_path = self._uut.get_path(stop)
+                self.assertAlmostEqual(self._uut.get_cost(stop), distance)
+                self.assertAlmostEqual(self._get_length(tree_path), distance)
+                self.assertEqual((tree_path[0].id, tree_path[-1].id), ("S1_2", stop.id))
+            else:
+                self.assertNotIn(stop, self._uut)
+
+    @staticmethod
+    def _get_length(path):
+        return sum(TanNetwork.get_distance(start, end) for start, end in zip(path, path[1:]))
+
+    def test_dict_graph(self):
+        self._arrange(compact=False, max_distance=15)
+        self._act()
+        self._assert()
+
+    def test_compact_graph(self):
+        self._arrange(compact=True, max_distance=15)
+        self._act()
+        self._assert()
+
+    def test_stop_without_routes(self):
+        for compact in (False, True):
+            tan_network = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES[:1], compact)  # Angle Chaillou has no routes
+            uut = tan_network.get_shortest_path_tree("StopArea:ACHA")
+            self.assertEqual([stop.name for stop in uut.vertices], ["Angle Chaillou"])
+
+    def test_unlimited(self):
+        self._arrange(compact=True, max_distance=math.inf)
+        self._act()
+        self._assert()
+        self.assertEqual(len(self._uut), len(self._stops))
+
+
+class TestTanNetwork_KShortestPaths(TestCaseAAA):
+    """
+    Ensures the alternatives to the shortest path are distinct loopless paths by increasing length, the first one
+    being the shortest path, and that both graph representations agree on their lengths.
+    """
+
+    def _arrange(self, start, goal, paths_count):
+        stops, routes = generate_grid_network(4)
+        self._tan_networks = [TanNetwork(stops, routes, compact) for compact in (False, True)]
+        self._query = (start, goal, paths_count)
+
+    def _act(self):
+        self._results = [tan_network.get_k_shortest_paths(*self._query) for tan_network in self._tan_networks]
+
+    def _assert(self, expected_paths_count):
+        lengths = []
+        for tan_network, paths in zip(self._tan_networks, self._results):
+            self.assertEqual(len(paths), expected_paths_count)
+            if paths:
+                self.assertEqual(paths[0], tan_network.get_shortest_path(*self._query[:2]))
+            for path in paths:
+                self.assertEqual(len(set(path)), len(path))
+            self.assertEqual(len(set(map(tuple, paths))), len(paths))
+
+            path_lengths = [TestTanNetwork_ShortestPathTree._get_length(path) for path in paths]
+            self.assertEqual(path_lengths, sorted(path_lengths))
+            lengths.append(path_lengths)
+
+        for dict_length, compact_length in zip(*lengths):
+            self.assertAlmostEqual(dict_length, compact_length)
+
+    def test_alternatives(self):
+        self._arrange(start="StopArea:S0_0", goal="StopArea:S3_3", paths_count=8)
+        self._act()
+        self._assert(expected_paths_count=8)
+
+    def test_same_stop(self):
+        self._arrange(start="StopArea:S1_1", goal="StopArea:S1_1", paths_count=3)
+        self._act()
+        self._assert(expected_paths_count=1)
+
+
+class TestTanNetwork_BidirectionalShortestPath(TestCaseAAA):
+    """ Ensures the bidirectional searches find the same paths as the default ones, for both graph representations. """
+
+    def _arrange(self, compact):
+        self._uut = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES, compact)
+
+    def _act(self, start, goal):
+        self._result = self._uut.get_shortest_path(start, goal, bidirectional=True)
+        self._expected_result = self._uut.get_shortest_path(start, goal)
+
+    def _assert(self):
+        self.assertEqual(self._result, self._expected_result)
+
+    def test_all_pairs(self):
+        stop_descriptions = ["StopArea:ABDU", "StopArea:ABLA", "StopArea:ACHA"]
+        for compact in (False, True):
+            self._arrange(compact)
+            for start in stop_descriptions:
+                for goal in stop_descriptions:
+                    self._act(start, goal)
+                    self._assert()
@@ -0,0 +1,202 @@
+import math
+import random
+
+from src.tan_network import TanNetwork
+from src.timetable import Connection, Timetable, build_timetable
+from utils_ut import EXAMPLE_ROUTES, EXAMPLE_STOPS, TestCaseAAA
+
+
+def get_earliest_arrival_times(stops_count, connections, start_index, departure_time):
+    """ :return: Earliest arrival time at each stop, relaxing all the connections until nothing changes """
+    arrival_times = [math.inf] * stops_count
+    arrival_times[start_index] = departure_time
+
+    is_changed = True
+    while is_changed:
+        is_changed = False
+        for departure_stop, arrival_stop, connection_departure_time, arrival_time in connections:
+            if arrival_times[departure_stop] <= connection_departure_time and \
+                    arrival_time < arrival_times[arrival_stop]:
+                arrival_times[arrival_stop] = arrival_time
+                is_changed = True
+
+    return arrival_times
+
+
+def generate_connections(stops_count, routes_count, departures_count, random_generator, max_time=1000):
+    connections = []
+    for _ in range(routes_count):
+        start, end = random_generator.sample(range(stops_count), 2)
+        for _ in range(random_generator.randint(1, departures_count)):
+            departure_time = random_generator.randrange(max_time)
+            connections.append((start, end, departure_time, departure_time + random_generator.randint(1, 100)))
+
+    return connections
+
+
+class TestTimetable_EarliestArrival(TestCaseAAA):
+    """
+    Ensures both search modes find journeys reaching the goal at the earliest possible time, as found by relaxing all
+    the connections, and that these journeys are made of connections of the timetable, which can be caught in turn.
+    """
+
+    def _arrange(self, stops_count, connections, queries):
+        self._stops_count = stops_count
+        self._connections = connections
+        self._queries = queries
+
+    def _act(self):
+        uut = Timetable(self._stops_count, *([connection[field] for connection in self._connections]
+                                             for field in range(4)))
+        self._results = {connection_scan: [uut.get_earliest_arrival_connections(*query, connection_scan)
+                                           for query in self._queries]
+                         for connection_scan in (True, False)}
+
+    def _assert(self):
+        for journeys in self._results.values():
+            for (start_index, goal_index, departure_time), journey in zip(self._queries, journeys):
+                expected_time = get_earliest_arrival_times(self._stops_count, self._connections, start_index,
+                                                           departure_time)[goal_index]
+                if start_index == goal_index:
+                    self.assertEqual(journey, [])
+                elif expected_time == math.inf:
+                    self.assertIsNone(journey)
+                else:
+                    self.assertEqual(journey[-1].arrival_time, expected_time)
+                    self._assert_valid(journey, start_index, goal_index, departure_time)
+
+    def _assert_valid(self, journey, start_index, goal_index, departure_time):
+        stop, time = start_index, departure_time
+        for connection in journey:
+            self.assertIn(tuple(connection), self._connections)
+            self.assertEqual(connection.departure_stop, stop)
+            self.assertGreaterEqual(connection.departure_time, time)
+            stop, time = connection.arrival_stop, connection.arrival_time
+
+        self.assertEqual(stop, goal_index)
+
+    def test_empty(self):
+        self._arrange(stops_count=2, connections=[], queries=[(0, 1, 0), (1, 1, 0)])
+        self._act()
+        self._assert()
+
+    def test_line(self):
+        self._arrange(stops_count=3,
+                      connections=[(0, 1, 10, 20), (1, 2, 15, 25), (1, 2, 20, 30), (1, 2, 40, 50)],
+                      queries=[(0, 2, 0), (0, 2, 11), (1, 2, 16), (2, 0, 0), (0, 0, 5)])
+        self._act()
+        self._assert()
+
+    def test_overtaking(self):
+        # The next departure is slower than the one after, which reaches the end stop first
+        self._arrange(stops_count=3,
+                      connections=[(0, 1, 10, 100), (0, 1, 20, 30), (1, 2, 35, 40), (1, 2, 105, 110)],
+                      queries=[(0, 2, 0), (0, 1, 5), (0, 1, 15)])
+        self._act()
+        self._assert()
+
+    def test_same_times(self):
+        # Connections departing at the same time, the first one listed being fed by the second one
+        self._arrange(stops_count=4,
+                      connections=[(1, 2, 10, 20), (0, 1, 5, 10), (3, 1, 5, 10), (2, 3, 20, 25), (0, 3, 5, 20)],
+                      queries=[(0, 2, 0), (0, 3, 5), (3, 2, 0), (1, 3, 10)])
+        self._act()
+        self._assert()
+        self.assertEqual(self._results[True], self._results[False])
+
+    def test_random(self):
+        random_generator = random.Random(0)
+        self._arrange(stops_count=30,
+                      connections=generate_connections(30, 80, 10, random_generator),
+                      queries=[(random_generator.randrange(30), random_generator.randrange(30),
+                                random_generator.randrange(500)) for _ in range(100)])
+        self._act()
+        self._assert()
+
+    def test_sparse_times(self):
+        # Times spread too much for sorting the connections by counting
+        random_generator = random.Random(1)
+        self._arrange(stops_count=10,
+                      connections=generate_connections(10, 20, 3, random_generator, max_time=10 ** 9),
+                      queries=[(random_generator.randrange(10), random_generator.randrange(10),
+                                random_generator.randrange(10 ** 8)) for _ in range(50)])
+        self._act()
+        self._assert()
+
+    def test_arrival_before_departure(self):
+        with self.assertRaises(ValueError):
+            Timetable(2, [0], [1], [10], [5])
+
+    def test_zero_travel_time(self):
+        with self.assertRaises(ValueError):
+            Timetable(3, [1, 0], [2, 1], [10, 10], [10, 10])
+
+
+class TestTimetable_TanNetwork(TestCaseAAA):
+    """ Ensures the earliest arrival paths of a network, its timetable being built from routes descriptions. """
+
+    def _arrange(self, route_schedules, start, goal, departure_time, compact=False):
+        self._tan_network = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES, compact)
+        self._route_schedules = route_schedules
+        self._query = (start, goal, departure_time)
+
+    def _act(self):
+        self._tan_network.use_timetable(build_timetable(self._tan_network, self._route_schedules))
+        self._results = [self._tan_network.get_earliest_arrival_path(*self._query, connection_scan=connection_scan)
+                         for connection_scan in (True, False)]
+
+    def _assert(self, expected_path):
+        for result in self._results:
+            self.assertEqual([(stop.name, time) for stop, time in result], expected_path)
+
+    def test_travel_time(self):
+        self._arrange(route_schedules=[("StopArea:ABDU StopArea:ABLA", [600, 1200, 1800], 300),
+                                       ("StopArea:ABLA StopArea:ACHA", [1000, 2000], 400)],
+                      start="StopArea:ABDU", goal="StopArea:ACHA", departure_time=700)
+        self._act()
+        self._assert(expected_path=[("Abel Durand", 700), ("Avenue Blanche", 1500), ("Angle Chaillou", 2400)])
+
+    def test_travel_times(self):
+        self._arrange(route_schedules=[("StopArea:ABDU StopArea:ABLA", [600, 1200], [900, 100]),
+                                       ("StopArea:ABLA StopArea:ACHA", [1400, 2000], [400, 400])],
+                      start="StopArea:ABDU", goal="StopArea:ACHA", departure_time=0, compact=True)
+        self._act()
+        self._assert(expected_path=[("Abel Durand", 0), ("Avenue Blanche", 1300), ("Angle Chaillou", 1800)])
+
+    def test_same_stop(self):
+        self._arrange(route_schedules=[], start="StopArea:ABLA", goal="StopArea:ABLA", departure_time=50)
+        self._act()
+        self._assert(expected_path=[("Avenue Blanche", 50)])
+
+    def test_too_late(self):
+        self._arrange(route_schedules=[("StopArea:ABDU StopArea:ABLA", [600], 300)],
+                      start="StopArea:ABDU", goal="StopArea:ABLA", departure_time=601)
+        self._act()
+        self._assert(expected_path=[])
+
+    def test_travel_times_count(self):
+        tan_network = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES)
+        with self.assertRaises(ValueError):
+            build_timetable(tan_network, [("StopArea:ABDU StopArea:ABLA", [600, 1200], [300])])
+
+    def test_no_timetable(self):
+        with self.assertRaises(ValueError):
+            TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES).get_earliest_arrival_path("StopArea:ABDU", "StopArea:ABLA", 0)
+
+    def test_updates(self):
+        # The timetable no longer matches the routes once they are updated, hence is dropped
+        for compact in (False, True):
+            for update in (lambda network: network.add_stop('StopArea:ZZZZ,"Zenith",,47.20000000,-1.60000000,,,1,'),
+                           lambda network: network.remove_stop("ABLA"),
+                           lambda network: network.add_route("StopArea:ABDU StopArea:ACHA"),
+                           lambda network: network.remove_route("StopArea:ABDU StopArea:ABLA")):
+                tan_network = TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES, compact)
+                tan_network.use_timetable(build_timetable(tan_network, [("StopArea:ABDU StopArea:ABLA", [600], 300)]))
+                update(tan_network)
+                with self.assertRaises(ValueError):
+                    tan_network.get_earliest_arrival_path("StopArea:ABDU", "StopArea:ACHA", 0)
+
+    def test_connection(self):
+        timetable = build_timetable(TanNetwork(EXAMPLE_STOPS, EXAMPLE_ROUTES),
+                                    [("StopArea:ABDU StopArea:ABLA", [600], 300)])
+        self.assertEqual(timetable.get_earliest_arrival_connections(0, 1, 0), [Connection(0, 1, 600, 900)])
@@ -0,0 +1,54 @@
+import random
+
+from src.utils import IndexedPriorityQueue
+from utils_ut import TestCaseAAA
+
+
+class TestIndexedPriorityQueue(TestCaseAAA):
+    """ Ensures the indexed priority queue pops its elements by increasing priority, each one at most once. """
+
+    def _arrange(self, operations):
+        self._operations = operations
+
+    def _act(self):
+        self._uut = IndexedPriorityQueue()
+        self._push_results = [self._uut.push(priority, element) for priority, element in self._operations]
+        self._queued_elements = set(element for element in range(10) if element in self._uut)
+
+        self._popped = []
+        while not self._uut.is_empty():
+            priority = self._uut.peek_priority()
+            self._popped.append((priority, self._uut.pop()))
+
+    def _assert(self, expected_popped, expected_push_results):
+        self.assertEqual(self._popped, expected_popped)
+        self.assertEqual(self._push_results, expected_push_results)
+        self.assertEqual(self._queued_elements, set(element for _, element in expected_popped))
+        self.assertEqual(len(self._uut), 0)
+
+    def test_empty(self):
+        self._arrange(operations=[])
+        self._act()
+        self._assert(expected_popped=[], expected_push_results=[])
+
+    def test_tie(self):
+        self._arrange(operations=[(1, 2), (1, 0), (1, 1)])
+        self._act()
+        self._assert(expected_popped=[(1, 2), (1, 0), (1, 1)], expected_push_results=[True, True, True])
+
+    def test_decrease_key(self):
+        self._arrange(operations=[(3, 0), (2, 1), (1, 0), (5, 1), (4, 2)])
+        self._act()
+        self._assert(expected_popped=[(1, 0), (2, 1), (4, 2)], expected_push_results=[True, True, True, False, True])
+
+    def test_random(self):
+        random_generator = random.Random(0)
+        operations = [(random_generator.randrange(100), random_generator.randrange(10)) for _ in range(200)]
+        best_priorities = {}
+        for priority, element in operations:
+            best_priorities[element] = min(priority, best_priorities.get(element, priority))
+
+        self._arrange(operations=operations)
+        self._act()
+        self.assertEqual(dict((element, priority) for priority, element in self._popped), best_priorities)
+        self.assertEqual([priority for priority, _ in self._popped], sorted(best_priorities.values()))
@@ -3,6 +3,14 @@
 from unittest import TestCase
 
 
+# Network given as example in the puzzle's description
+EXAMPLE_STOPS = ['StopArea:ABDU,"Abel Durand",,47.22019661,-1.60337553,,,1,',
+                 'StopArea:ABLA,"Avenue Blanche",,47.22973509,-1.58937990,,,1,',
+                 'StopArea:ACHA,"Angle Chaillou",,47.26979248,-1.57206627,,,1,']
+EXAMPLE_ROUTES = ["StopArea:ABDU StopArea:ABLA",
+                  "StopArea:ABLA StopArea:ACHA"]
+
+
 class TestCaseAAA(TestCase):
     """ This class is a template for unit tests, whose structure follow the 'Arrange - Act - Assert' principle. """
 